@@ -0,0 +1,3 @@
+"""
+Benchmarks for the RAG tools, runnable without a GCP project.
+"""
@@ -0,0 +1,398 @@
+"""
+Latency and remote-call benchmarks for the RAG tools against the in-process fake backend.
+
+Usage:
+    python benchmarks/bench_tools.py [--iterations 30] [--latency-scale 0.1]
+                                    [--output results.json] [--baseline results.json]
+
+Each scenario reports p50/p95/mean latency and the number of remote calls per iteration,
+by operation. With --baseline, the run fails if a scenario's p95 latency or remote-call
+count regresses beyond --tolerance.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Run as a script, only benchmarks/ is on the path
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_backend import FakeBackend, FakeToolContext
+
+# Mean latency in seconds of each remote operation, before --latency-scale
+LATENCY_PROFILE = {
+    "rag.list_corpora": 0.08,
+    "rag.list_files": 0.12,
+    "rag.list_page": 0.08,
+    "rag.retrieval_query": 0.25,
+    "rag.import_files": 1.5,
+    "rag.delete_file": 0.05,
+    "rag.create_corpus": 0.5,
+    "gcs.upload": 0.03,
+    "gcs.download": 0.02,
+    "gcs.exists": 0.01,
+    "gcs.get": 0.01,
+    "gcs.list": 0.05,
+    "gcs.delete": 0.02,
+    "gcs.copy": 0.02,
+    "embeddings.get_embeddings": 0.05,
+}
+
+FIXTURE_FILES = 200
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _run_scenario(
+    backend: FakeBackend,
+    name: str,
+    iterations: int,
+    action: Callable[[int], dict],
+    setup: Optional[Callable[[int], None]] = None,
+) -> Dict:
+    """Run `action` `iterations` times, timing it and counting the remote calls it makes."""
+    durations = []
+    calls: Dict[str, int] = {}
+    errors = 0
+    for i in range(iterations):
+        if setup is not None:
+            setup(i)
+        backend.reset_counters()
+        start = time.perf_counter()
+        result = action(i)
+        durations.append(time.perf_counter() - start)
+        if isinstance(result, dict) and result.get("status") == "error":
+            errors += 1
+        for operation, count in backend.calls.items():
+            calls[operation] = calls.get(operation, 0) + count
+
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "p50_ms": _percentile(durations, 0.50) * 1000,
+        "p95_ms": _percentile(durations, 0.95) * 1000,
+        "mean_ms": sum(durations) / len(durations) * 1000,
+        "errors": errors,
+        "remote_calls_per_iteration": {
+            operation: count / iterations for operation, count in sorted(calls.items())
+        },
+    }
+
+
+def _make_fixture_repo(path: str, num_files: int) -> None:
+    """Create a local git repository with a mix of source, docs and ignorable files."""
+    import git
+
+    repo = git.Repo.init(path)
+    for i in range(num_files):
+        directory = os.path.join(path, "src" if i % 2 else "docs", f"pkg{i % 10}")
+        os.makedirs(directory, exist_ok=True)
+        extension = ".py" if i % 2 else ".md"
+        with open(os.path.join(directory, f"file_{i}{extension}"), "w") as f:
+            f.write(f"# file {i}\n" + "cliente receita pipeline dados\n" * 40)
+    os.makedirs(os.path.join(path, "node_modules", "dep"), exist_ok=True)
+    with open(os.path.join(path, "node_modules", "dep", "index.js"), "w") as f:
+        f.write("module.exports = {}\n")
+    with open(os.path.join(path, "package-lock.json"), "w") as f:
+        f.write("{}\n")
+    repo.git.add(A=True)
+    repo.index.commit("fixture")
+    # Serve blob-less clones and blob fetches like GitHub does
+    with repo.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+        config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+
+
+def run_benchmarks(iterations: int, latency_scale: float) -> List[Dict]:
+    """Run every scenario and return their reports."""
+    from rag_agent.config import DEFAULT_EMBEDDING_REQUESTS_PER_MIN
+    from rag_agent.tools.add_data import add_data
+    from rag_agent.tools.delete_document import delete_document
+    from rag_agent.tools.get_corpus_info import get_corpus_info
+    from rag_agent.tools import embeddings, import_batches, lexical_index, local_index, semantic_cache
+    from rag_agent.tools.list_corpora import list_corpora
+    from rag_agent.tools.rag_query import rag_query
+    rag_query_module = sys.modules["rag_agent.tools.rag_query"]
+    from rag_agent.tools.rate_governor import EmbeddingRateGovernor
+    from rag_agent.tools.retrieval_cache import invalidate_retrieval_cache
+    from rag_agent.tools.semantic_cache import invalidate_semantic_cache
+    from rag_agent.tools.utils import invalidate_corpus_catalog
+
+    def invalidate_caches(i: int) -> None:
+        invalidate_retrieval_cache()
+        invalidate_semantic_cache()
+
+    backend = FakeBackend(
+        latency={operation: seconds * latency_scale for operation, seconds in LATENCY_PROFILE.items()},
+        jitter=0.2,
+    )
+    for i in range(5):
+        backend.add_synthetic_corpus(f"client_{i}", num_files=100)
+    corpus_names = [f"client_{i}" for i in range(5)]
+    reports = []
+
+    lexical_dir = tempfile.mkdtemp(prefix="bench_lexical_")
+    # Remote latencies are scaled down, so the embedding quota is scaled up to match
+    governor = EmbeddingRateGovernor(int(DEFAULT_EMBEDDING_REQUESTS_PER_MIN / latency_scale))
+    with backend.installed(), mock.patch.object(lexical_index, "LEXICAL_INDEX_DIR", lexical_dir), mock.patch.object(
+        lexical_index, "HYBRID_RETRIEVAL_CORPORA", corpus_names
+    ), mock.patch.object(embeddings, "embedding_governor", governor), mock.patch.object(
+        import_batches, "embedding_governor", governor
+    ):
+        # Build the lexical indexes up front so background refreshes don't skew the runs
+        for name in corpus_names:
+            lexical_index.refresh_lexical_index(name)
+
+        reports.append(_run_scenario(backend, "list_corpora", iterations, lambda i: list_corpora()))
+
+        reports.append(
+            _run_scenario(
+                backend,
+                "rag_query (uncached)",
+                iterations,
+                lambda i: rag_query(
+                    corpus_name="client_0",
+                    query=f"receita do cliente {i}",
+                    tool_context=FakeToolContext(),
+                ),
+                setup=invalidate_caches,
+            )
+        )
+        reports.append(
+            _run_scenario(
+                backend,
+                "rag_query (repeated)",
+                iterations,
+                lambda i: rag_query(
+                    corpus_name="client_0",
+                    query="receita do cliente",
+                    tool_context=FakeToolContext(),
+                ),
+            )
+        )
+        with mock.patch.object(semantic_cache, "SEMANTIC_CACHE_ENABLED", True):
+            reports.append(
+                _run_scenario(
+                    backend,
+                    "rag_query (rephrased, semantic cache)",
+                    iterations,
+                    lambda i: rag_query(
+                        corpus_name="client_0",
+                        query="do cliente, a receita" if i % 2 else "Cliente receita do",
+                        tool_context=FakeToolContext(),
+                    ),
+                    setup=lambda i: invalidate_retrieval_cache(),
+                )
+            )
+        reports.append(
+            _run_scenario(
+                backend,
+                "rag_query (5-corpus fan-out)",
+                iterations,
+                lambda i: rag_query(
+                    corpus_name="",
+                    query=f"pipeline de dados {i}",
+                    tool_context=FakeToolContext(),
+                    corpus_names=corpus_names,
+                ),
+                setup=invalidate_caches,
+            )
+        )
+
+        # Uncached queries against a degraded backend where 10% of retrievals are 10x slower,
+        # without and with hedged requests
+        backend.slow_rate["rag.retrieval_query"] = 0.1
+        try:
+            for hedged in (False, True):
+                with mock.patch.object(rag_query_module, "HEDGED_RETRIEVAL_ENABLED", hedged):
+                    reports.append(
+                        _run_scenario(
+                            backend,
+                            f"rag_query (uncached, 10% slow tail{', hedged' if hedged else ''})",
+                            iterations,
+                            lambda i: rag_query(
+                                corpus_name="client_1",
+                                query=f"indicadores financeiros {'hedged' if hedged else 'direct'} {i}",
+                                tool_context=FakeToolContext(),
+                            ),
+                            setup=invalidate_caches,
+                        )
+                    )
+        finally:
+            backend.slow_rate.clear()
+
+        # The same uncached queries, answered from a local index of the corpus
+        index_dir = tempfile.mkdtemp(prefix="bench_index_")
+        try:
+            with mock.patch.object(local_index, "LOCAL_INDEX_CORPORA", ["client_0"]), mock.patch.object(
+                local_index, "LOCAL_INDEX_DIR", index_dir
+            ):
+                local_index.refresh_local_index("client_0")
+                reports.append(
+                    _run_scenario(
+                        backend,
+                        "rag_query (uncached, local index)",
+                        iterations,
+                        lambda i: rag_query(
+                            corpus_name="client_0",
+                            query=f"contrato do cliente {i}",
+                            tool_context=FakeToolContext(),
+                        ),
+                        setup=invalidate_caches,
+                    )
+                )
+        finally:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+        reports.append(
+            _run_scenario(
+                backend,
+                "get_corpus_info (first page)",
+                iterations,
+                lambda i: get_corpus_info(corpus_name="client_0", tool_context=FakeToolContext()),
+            )
+        )
+        reports.append(
+            _run_scenario(
+                backend,
+                "get_corpus_info (summary)",
+                iterations,
+                lambda i: get_corpus_info(
+                    corpus_name="client_0", tool_context=FakeToolContext(), summary_only=True
+                ),
+            )
+        )
+
+        # GitHub ingestion against a local repository fixture
+        fixture_dir = tempfile.mkdtemp(prefix="bench_repo_")
+        work_dir = tempfile.mkdtemp(prefix="bench_work_")
+        previous_cwd = os.getcwd()
+        try:
+            _make_fixture_repo(fixture_dir, FIXTURE_FILES)
+            import git
+
+            original_clone_from = git.Repo.clone_from
+
+            def clone_fixture(url, to_path, **kwargs):
+                return original_clone_from(f"file://{fixture_dir}", to_path, **kwargs)
+
+            os.chdir(work_dir)
+            repo_url = "https://github.com/insightesfera/bench-fixture"
+            # Ingestion corpora are not hybrid: the scenarios measure add_data alone,
+            # without the lexical refresh it would trigger
+            with mock.patch.object(git.Repo, "clone_from", side_effect=clone_fixture):
+                ingest_corpora = [backend.create_corpus(f"ingest_{i}").display_name for i in range(iterations)]
+                invalidate_corpus_catalog()  # Corpora created behind the tools' back
+                reports.append(
+                    _run_scenario(
+                        backend,
+                        f"add_data (GitHub, {FIXTURE_FILES} files, first ingest)",
+                        iterations,
+                        lambda i: add_data(
+                            corpus_name=ingest_corpora[i], paths=[repo_url], tool_context=FakeToolContext()
+                        ),
+                    )
+                )
+                reports.append(
+                    _run_scenario(
+                        backend,
+                        f"add_data (GitHub, {FIXTURE_FILES} files, unchanged re-ingest)",
+                        iterations,
+                        lambda i: add_data(
+                            corpus_name=ingest_corpora[i], paths=[repo_url], tool_context=FakeToolContext()
+                        ),
+                    )
+                )
+                reports.append(
+                    _run_scenario(
+                        backend,
+                        f"delete_document (GitHub repo, {FIXTURE_FILES} files)",
+                        iterations,
+                        lambda i: delete_document(
+                            corpus_name=ingest_corpora[i],
+                            document_id="",
+                            tool_context=FakeToolContext(),
+                            repo_url=repo_url,
+                        ),
+                    )
+                )
+        finally:
+            os.chdir(previous_cwd)
+            shutil.rmtree(fixture_dir, ignore_errors=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+    shutil.rmtree(lexical_dir, ignore_errors=True)
+
+    return reports
+
+
+def _print_reports(reports: List[Dict]) -> None:
+    for report in reports:
+        calls = ", ".join(
+            f"{operation}={count:g}" for operation, count in report["remote_calls_per_iteration"].items()
+        )
+        print(
+            f"{report['scenario']:<55} p50 {report['p50_ms']:8.1f} ms  p95 {report['p95_ms']:8.1f} ms  "
+            f"errors {report['errors']}  calls/iter: {calls or 'none'}"
+        )
+
+
+def _compare(reports: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Return a description of every regression against the baseline."""
+    by_name = {report["scenario"]: report for report in baseline}
+    regressions = []
+    for report in reports:
+        previous = by_name.get(report["scenario"])
+        if previous is None:
+            continue
+        if report["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{report['scenario']}: p95 {report['p95_ms']:.1f} ms > baseline {previous['p95_ms']:.1f} ms"
+            )
+        calls = sum(report["remote_calls_per_iteration"].values())
+        previous_calls = sum(previous["remote_calls_per_iteration"].values())
+        if calls > previous_calls * (1 + tolerance):
+            regressions.append(
+                f"{report['scenario']}: {calls:g} remote calls/iter > baseline {previous_calls:g}"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="Multiplier applied to LATENCY_PROFILE")
+    parser.add_argument("--output", help="Write the reports as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against reports previously written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    reports = run_benchmarks(args.iterations, args.latency_scale)
+    _print_reports(reports)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = _compare(reports, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,565 @@
+"""
+In-process fake of the Vertex AI RAG and Cloud Storage surfaces used by the RAG tools.
+
+The fake keeps corpora, RAG files, chunks and GCS objects in memory, so the tools can be
+exercised and benchmarked without a GCP project. Every remote call goes through
+FakeBackend.call(), which counts it, sleeps for the configured latency and raises an
+injected failure at the configured rate.
+
+Usage:
+    backend = FakeBackend(latency={"rag.retrieval_query": 0.1}, failure_rate={"rag.import_files": 0.05})
+    backend.add_synthetic_corpus("docs", num_files=200)
+    with backend.installed():
+        rag_query(corpus_name="docs", query="...", tool_context=FakeToolContext())
+"""
+
+import base64
+import datetime
+import functools
+import hashlib
+import itertools
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional
+from unittest import mock
+
+from google.api_core.exceptions import DeadlineExceeded, NotFound, PreconditionFailed, ServiceUnavailable
+
+_PROJECT = "fake-project"
+_LOCATION = "us-central1"
+_WORD_RE = re.compile(r"\w+")
+
+_EMBEDDING_DIMENSIONS = 64
+
+_VOCABULARY = (
+    "faturamento receita cliente trimestre pipeline dados modelo previsao churn "
+    "contrato proposta relatorio dashboard bigquery storage agente orquestrador "
+    "ingestao embedding corpus consulta latencia custo projeto entrega insight"
+).split()
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class FakeToolContext:
+    """Minimal stand-in for ADK's ToolContext: just a state dict."""
+
+    def __init__(self, state: Optional[Dict] = None):
+        self.state = state if state is not None else {}
+
+
+class _FakePager:
+    """Mimics the Vertex AI list pagers: iterable over every item, with first-page attributes."""
+
+    def __init__(self, backend: "FakeBackend", items: List, page_size: int, page_token: Optional[str], attr: str):
+        self._backend = backend
+        self._items = items
+        self._page_size = page_size
+        self._start = int(page_token) if page_token else 0
+        end = self._start + page_size
+        setattr(self, attr, items[self._start:end])
+        self.next_page_token = str(end) if end < len(items) else ""
+
+    def __iter__(self) -> Iterator:
+        start = self._start
+        while start < len(self._items):
+            if start != self._start:
+                self._backend.call("rag.list_page")
+            yield from self._items[start:start + self._page_size]
+            start += self._page_size
+
+
+def _sdk_errors(action: str) -> Callable[[Callable], Callable]:
+    """Wrap a method's errors like vertexai.rag does: RuntimeError(...) from the API error."""
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                raise RuntimeError(f"Failed in {action} due to: ", e) from e
+
+        return wrapper
+
+    return decorator
+
+
+class _FakeRag:
+    """
+    The subset of vertexai.rag used by the tools. Like the SDK, calls raise their API
+    errors wrapped in RuntimeError; only the listing of later pages raises them as is.
+    """
+
+    # Config classes are plain attribute bags in the fake
+    RagRetrievalConfig = SimpleNamespace
+    Filter = SimpleNamespace
+    RagResource = SimpleNamespace
+    TransformationConfig = SimpleNamespace
+    ChunkingConfig = SimpleNamespace
+    RagEmbeddingModelConfig = SimpleNamespace
+    VertexPredictionEndpoint = SimpleNamespace
+    RagVectorDbConfig = SimpleNamespace
+
+    def __init__(self, backend: "FakeBackend"):
+        self._backend = backend
+
+    @_sdk_errors("listing the RagCorpora")
+    def list_corpora(self, page_size: int = 100, page_token: Optional[str] = None):
+        self._backend.call("rag.list_corpora")
+        with self._backend.lock:
+            corpora = list(self._backend.corpora.values())
+        return _FakePager(self._backend, corpora, page_size, page_token, "rag_corpora")
+
+    @_sdk_errors("RagCorpus creation")
+    def create_corpus(self, display_name: str, backend_config=None, **kwargs):
+        self._backend.call("rag.create_corpus")
+        return self._backend.create_corpus(display_name)
+
+    @_sdk_errors("RagCorpus deletion")
+    def delete_corpus(self, name: str):
+        self._backend.call("rag.delete_corpus")
+        with self._backend.lock:
+            if self._backend.corpora.pop(name, None) is None:
+                raise NotFound(f"Corpus {name} not found")
+            self._backend.files.pop(name, None)
+
+    @_sdk_errors("listing the RagFiles")
+    def list_files(self, corpus_name: str, page_size: int = 100, page_token: Optional[str] = None):
+        self._backend.call("rag.list_files")
+        with self._backend.lock:
+            files = list(self._backend.files.get(corpus_name, {}).values())
+        return _FakePager(self._backend, files, page_size or 100, page_token, "rag_files")
+
+    @_sdk_errors("RagFile deletion")
+    def delete_file(self, name: str, corpus_name: Optional[str] = None):
+        self._backend.call("rag.delete_file")
+        corpus = name.split("/ragFiles/")[0]
+        with self._backend.lock:
+            if self._backend.files.get(corpus, {}).pop(name, None) is None:
+                raise NotFound(f"RAG file {name} not found")
+
+    @_sdk_errors("importing the RagFiles")
+    def import_files(self, corpus_name: str, paths: List[str], transformation_config=None, **kwargs):
+        self._backend.call("rag.import_files", kwargs.get("timeout"))
+        chunk_size = 512
+        if transformation_config is not None and getattr(transformation_config, "chunking_config", None):
+            chunk_size = transformation_config.chunking_config.chunk_size
+        imported = skipped = failed = 0
+        for uri in self._backend.expand_gcs_paths(paths):
+            content = self._backend.read_gcs_uri(uri)
+            if content is None:
+                failed += 1
+                continue
+            if self._backend.find_file(corpus_name, uri) is not None:
+                skipped += 1
+                continue
+            self._backend.add_file(corpus_name, uri, content.decode("utf-8", "replace"), chunk_size)
+            imported += 1
+        return SimpleNamespace(
+            imported_rag_files_count=imported,
+            failed_rag_files_count=failed,
+            skipped_rag_files_count=skipped,
+        )
+
+    @_sdk_errors("retrieving contexts")
+    def retrieval_query(self, rag_resources, text: str, rag_retrieval_config=None, **kwargs):
+        self._backend.call("rag.retrieval_query")
+        top_k = getattr(rag_retrieval_config, "top_k", 3)
+        threshold = 1.0
+        if rag_retrieval_config is not None and getattr(rag_retrieval_config, "filter", None):
+            threshold = getattr(rag_retrieval_config.filter, "vector_distance_threshold", 1.0)
+        query_tokens = set(_tokens(text))
+        scored = []
+        for resource in rag_resources:
+            for chunk in self._backend.chunks_of(resource.rag_corpus):
+                overlap = len(query_tokens & chunk["tokens"])
+                distance = 1.0 - overlap / len(query_tokens) if query_tokens else 1.0
+                if distance <= threshold:
+                    scored.append((distance, chunk))
+        scored.sort(key=lambda item: item[0])
+        contexts = [
+            SimpleNamespace(
+                source_uri=chunk["source_uri"],
+                source_display_name=chunk["display_name"],
+                text=chunk["text"],
+                score=distance,
+            )
+            for distance, chunk in scored[:top_k]
+        ]
+        return SimpleNamespace(contexts=SimpleNamespace(contexts=contexts))
+
+
+class _FakeEmbeddingModel:
+    """Mimics TextEmbeddingModel with hashed bag-of-words vectors."""
+
+    def __init__(self, backend: "FakeBackend"):
+        self._backend = backend
+
+    def get_embeddings(self, texts, **kwargs) -> List[SimpleNamespace]:
+        self._backend.call("embeddings.get_embeddings")
+        embeddings = []
+        for text in texts:
+            values = [0.0] * _EMBEDDING_DIMENSIONS
+            for token in _tokens(getattr(text, "text", text)):
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                values[digest[0] % _EMBEDDING_DIMENSIONS] += 1.0 if digest[1] % 2 else -1.0
+            norm = math.sqrt(sum(value * value for value in values)) or 1.0
+            embeddings.append(SimpleNamespace(values=[value / norm for value in values]))
+        return embeddings
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _md5_base64(data: bytes) -> str:
+    return base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+
+
+class _FakeBlob:
+    def __init__(self, bucket: "_FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.size = None
+        self.md5_hash = None
+        self.updated = None
+        self.metadata = None
+        self.generation = None
+
+    def _check_generation(self, if_generation_match: Optional[int]) -> None:
+        """Raise PreconditionFailed unless the object is at `if_generation_match` (0: does not exist)."""
+        generation = self.bucket.backend.generation_of(self.bucket.name, self.name)
+        if if_generation_match is not None and generation != if_generation_match:
+            raise PreconditionFailed(f"gs://{self.bucket.name}/{self.name} is not at generation {if_generation_match}")
+
+    def _store(self, data: bytes, if_generation_match: Optional[int] = None) -> None:
+        backend = self.bucket.backend
+        with backend.lock:
+            self._check_generation(if_generation_match)
+            backend.objects[(self.bucket.name, self.name)] = data
+            backend.object_updated[(self.bucket.name, self.name)] = _now()
+            backend.object_generation[(self.bucket.name, self.name)] = next(backend._generations)
+
+    def upload_from_filename(self, filename: str, **kwargs) -> None:
+        self.bucket.backend.call("gcs.upload", kwargs.get("timeout"))
+        with open(filename, "rb") as f:
+            self._store(f.read(), kwargs.get("if_generation_match"))
+
+    def upload_from_string(self, data, content_type: Optional[str] = None, **kwargs) -> None:
+        self.bucket.backend.call("gcs.upload", kwargs.get("timeout"))
+        self._store(data.encode("utf-8") if isinstance(data, str) else data, kwargs.get("if_generation_match"))
+
+    def upload_from_file(self, file_obj, **kwargs) -> None:
+        self.bucket.backend.call("gcs.upload", kwargs.get("timeout"))
+        self._store(file_obj.read(), kwargs.get("if_generation_match"))
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        self.bucket.backend.call("gcs.download", kwargs.get("timeout"))
+        with self.bucket.backend.lock:
+            data = self.bucket.backend.objects.get((self.bucket.name, self.name))
+            self.generation = self.bucket.backend.generation_of(self.bucket.name, self.name)
+        if data is None:
+            raise NotFound(f"gs://{self.bucket.name}/{self.name} not found")
+        return data
+
+    def exists(self, **kwargs) -> bool:
+        self.bucket.backend.call("gcs.exists", kwargs.get("timeout"))
+        with self.bucket.backend.lock:
+            return (self.bucket.name, self.name) in self.bucket.backend.objects
+
+    def reload(self, **kwargs) -> None:
+        self.bucket.backend.call("gcs.get", kwargs.get("timeout"))
+        with self.bucket.backend.lock:
+            data = self.bucket.backend.objects.get((self.bucket.name, self.name))
+            self.generation = self.bucket.backend.generation_of(self.bucket.name, self.name)
+        if data is None:
+            raise NotFound(f"gs://{self.bucket.name}/{self.name} not found")
+        self.size = len(data)
+        self.md5_hash = _md5_base64(data)
+        self.updated = self.bucket.backend.object_updated.get((self.bucket.name, self.name))
+
+    def patch(self, **kwargs) -> None:
+        self.bucket.backend.call("gcs.patch", kwargs.get("timeout"))
+        with self.bucket.backend.lock:
+            if (self.bucket.name, self.name) not in self.bucket.backend.objects:
+                raise NotFound(f"gs://{self.bucket.name}/{self.name} not found")
+            self.bucket.backend.object_updated[(self.bucket.name, self.name)] = _now()
+
+    def delete(self, **kwargs) -> None:
+        self.bucket.backend.call("gcs.delete", kwargs.get("timeout"))
+        with self.bucket.backend.lock:
+            if (self.bucket.name, self.name) not in self.bucket.backend.objects:
+                raise NotFound(f"gs://{self.bucket.name}/{self.name} not found")
+            self._check_generation(kwargs.get("if_generation_match"))
+            del self.bucket.backend.objects[(self.bucket.name, self.name)]
+            self.bucket.backend.object_generation.pop((self.bucket.name, self.name), None)
+
+
+class _FakeBucket:
+    def __init__(self, backend: "FakeBackend", name: str):
+        self.backend = backend
+        self.name = name
+
+    def blob(self, name: str, **kwargs) -> _FakeBlob:
+        return _FakeBlob(self, name)
+
+    def get_blob(self, name: str, **kwargs) -> Optional[_FakeBlob]:
+        blob = _FakeBlob(self, name)
+        try:
+            blob.reload(**kwargs)
+        except NotFound:
+            return None
+        return blob
+
+    def copy_blob(
+        self, blob: _FakeBlob, destination_bucket: "_FakeBucket", new_name: Optional[str] = None, **kwargs
+    ) -> _FakeBlob:
+        self.backend.call("gcs.copy", kwargs.get("timeout"))
+        with self.backend.lock:
+            data = self.backend.objects.get((self.name, blob.name))
+        if data is None:
+            raise NotFound(f"gs://{self.name}/{blob.name} not found")
+        copy = destination_bucket.blob(new_name or blob.name)
+        copy._store(data)
+        return copy
+
+    def list_blobs(self, prefix: str = "", **kwargs) -> List[_FakeBlob]:
+        self.backend.call("gcs.list", kwargs.get("timeout"))
+        with self.backend.lock:
+            names = sorted(
+                name for bucket, name in self.backend.objects if bucket == self.name and name.startswith(prefix)
+            )
+            blobs = []
+            for name in names:
+                blob = _FakeBlob(self, name)
+                blob.size = len(self.backend.objects[(self.name, name)])
+                blob.md5_hash = _md5_base64(self.backend.objects[(self.name, name)])
+                blob.updated = self.backend.object_updated.get((self.name, name))
+                blob.generation = self.backend.generation_of(self.name, name)
+                blobs.append(blob)
+        return blobs
+
+
+class _FakeStorageClient:
+    def __init__(self, backend: "FakeBackend"):
+        self._backend = backend
+
+    def bucket(self, name: str) -> _FakeBucket:
+        return _FakeBucket(self._backend, name)
+
+    def list_blobs(self, bucket_or_name, prefix: str = "", **kwargs) -> List[_FakeBlob]:
+        name = bucket_or_name if isinstance(bucket_or_name, str) else bucket_or_name.name
+        return self.bucket(name).list_blobs(prefix=prefix)
+
+
+class FakeBackend:
+    """
+    In-memory Vertex AI RAG + Cloud Storage backend with latency and failure injection.
+
+    Args:
+        latency (Dict[str, float]): Mean latency in seconds per operation name
+                                    (e.g. "rag.retrieval_query", "gcs.upload")
+        default_latency (float): Latency of operations not listed in `latency`
+        jitter (float): Relative latency jitter, e.g. 0.2 for +/-20%
+        failure_rate (Dict[str, float]): Probability that an operation raises ServiceUnavailable
+        slow_rate (Dict[str, float]): Probability that an operation takes `slow_factor` times
+                                      its usual latency (a degraded replica)
+        slow_factor (float): Latency multiplier of slow operations
+        seed (int): Seed of the latency/failure random generator
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Dict[str, float]] = None,
+        default_latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: Optional[Dict[str, float]] = None,
+        slow_rate: Optional[Dict[str, float]] = None,
+        slow_factor: float = 10.0,
+        seed: int = 0,
+    ):
+        self.latency = latency or {}
+        self.default_latency = default_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate or {}
+        self.slow_rate = slow_rate or {}
+        self.slow_factor = slow_factor
+        self.lock = threading.RLock()
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.corpora: Dict[str, SimpleNamespace] = {}
+        self.files: Dict[str, Dict[str, SimpleNamespace]] = {}
+        self.chunks: Dict[str, List[Dict]] = {}
+        self.objects: Dict = {}
+        self.object_updated: Dict = {}
+        self.object_generation: Dict = {}
+        self._ids = itertools.count(1)
+        # Objects put in `objects` directly are at generation 1
+        self._generations = itertools.count(2)
+        self._random = random.Random(seed)
+        self.rag = _FakeRag(self)
+
+    # --- Call accounting ---
+    def call(self, operation: str, timeout: Optional[float] = None) -> None:
+        """
+        Count a remote call, apply its latency and maybe raise an injected failure. A
+        call slower than its request `timeout` raises DeadlineExceeded once it expires.
+        """
+        with self.lock:
+            self.calls[operation] += 1
+            roll = self._random.random()
+            jitter = 1.0 + self.jitter * (2 * self._random.random() - 1)
+            if self._random.random() < self.slow_rate.get(operation, 0.0):
+                jitter *= self.slow_factor
+        delay = self.latency.get(operation, self.default_latency) * jitter
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise DeadlineExceeded(f"{operation} timed out after {timeout:.2f}s")
+        if delay > 0:
+            time.sleep(delay)
+        if roll < self.failure_rate.get(operation, 0.0):
+            with self.lock:
+                self.failures[operation] += 1
+            raise ServiceUnavailable(f"Injected failure in {operation}")
+
+    def generation_of(self, bucket: str, name: str) -> int:
+        """Return the generation of a GCS object, or 0 if it does not exist."""
+        with self.lock:
+            if (bucket, name) not in self.objects:
+                return 0
+            return self.object_generation.get((bucket, name), 1)
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.calls.clear()
+            self.failures.clear()
+
+    # --- Corpus state ---
+    def create_corpus(self, display_name: str) -> SimpleNamespace:
+        with self.lock:
+            name = f"projects/{_PROJECT}/locations/{_LOCATION}/ragCorpora/{next(self._ids)}"
+            corpus = SimpleNamespace(name=name, display_name=display_name, create_time="", update_time="")
+            self.corpora[name] = corpus
+            self.files[name] = {}
+            return corpus
+
+    def add_file(self, corpus_name: str, uri: str, text: str, chunk_size: int = 512) -> SimpleNamespace:
+        with self.lock:
+            name = f"{corpus_name}/ragFiles/{next(self._ids)}"
+            rag_file = SimpleNamespace(
+                name=name,
+                display_name=uri.rsplit("/", 1)[-1],
+                description="",
+                gcs_source=SimpleNamespace(uris=[uri]),
+                create_time="",
+                update_time="",
+                file_status=None,
+            )
+            self.files.setdefault(corpus_name, {})[name] = rag_file
+            words = text.split()
+            for start in range(0, max(len(words), 1), chunk_size):
+                chunk_text = " ".join(words[start:start + chunk_size])
+                self.chunks.setdefault(corpus_name, []).append(
+                    {
+                        "file": name,
+                        "source_uri": uri,
+                        "display_name": rag_file.display_name,
+                        "text": chunk_text,
+                        "tokens": set(_tokens(chunk_text)),
+                    }
+                )
+            return rag_file
+
+    def find_file(self, corpus_name: str, uri: str) -> Optional[SimpleNamespace]:
+        with self.lock:
+            for rag_file in self.files.get(corpus_name, {}).values():
+                if rag_file.gcs_source.uris[0] == uri:
+                    return rag_file
+        return None
+
+    def chunks_of(self, corpus_name: str) -> List[Dict]:
+        with self.lock:
+            live_files = self.files.get(corpus_name, {})
+            return [chunk for chunk in self.chunks.get(corpus_name, []) if chunk["file"] in live_files]
+
+    def add_synthetic_corpus(
+        self, display_name: str, num_files: int = 100, words_per_file: int = 300, seed: int = 1
+    ) -> SimpleNamespace:
+        """Create a corpus of `num_files` synthetic files drawn from a small vocabulary."""
+        generator = random.Random(seed)
+        corpus = self.create_corpus(display_name)
+        for i in range(num_files):
+            text = " ".join(generator.choice(_VOCABULARY) for _ in range(words_per_file))
+            uri = f"gs://synthetic/{display_name}/doc_{i}.txt"
+            self.objects[("synthetic", f"{display_name}/doc_{i}.txt")] = text.encode("utf-8")
+            self.add_file(corpus.name, uri, text)
+        return corpus
+
+    # --- GCS state ---
+    def read_gcs_uri(self, uri: str) -> Optional[bytes]:
+        bucket, _, name = uri[len("gs://"):].partition("/")
+        with self.lock:
+            return self.objects.get((bucket, name))
+
+    def expand_gcs_paths(self, paths: List[str]) -> List[str]:
+        """Expand gs:// directory prefixes into the objects under them, like rag.import_files."""
+        uris = []
+        with self.lock:
+            for path in paths:
+                if not path.startswith("gs://"):
+                    continue
+                bucket, _, name = path[len("gs://"):].partition("/")
+                if (bucket, name) in self.objects:
+                    uris.append(path)
+                    continue
+                prefix = name.rstrip("/") + "/"
+                uris.extend(
+                    f"gs://{bucket}/{object_name}"
+                    for object_bucket, object_name in sorted(self.objects)
+                    if object_bucket == bucket and object_name.startswith(prefix)
+                )
+        return uris
+
+    # --- Installation ---
+    @contextmanager
+    def installed(self) -> Iterator["FakeBackend"]:
+        """
+        Route every loaded rag_agent.tools module to this fake for the duration of the block.
+
+        Replaces the `rag` module reference held by each tool module,
+        the process' shared GCS client and the embedding model, and skips Vertex AI
+        initialization.
+        """
+        from vertexai import rag as real_rag
+
+        from rag_agent.tools import clients, embeddings, utils
+
+        patched = []
+        for module_name, module in list(sys.modules.items()):
+            if module_name.startswith("rag_agent.tools") and getattr(module, "rag", None) is real_rag:
+                patched.append(module)
+                module.rag = self.rag
+        initialized = utils._vertexai_initialized
+        utils._vertexai_initialized = True
+        utils.invalidate_corpus_catalog()
+        try:
+            with mock.patch.object(
+                clients, "_storage_client", _FakeStorageClient(self)
+            ), mock.patch.object(embeddings, "_get_model", lambda: _FakeEmbeddingModel(self)), mock.patch.dict(
+                embeddings._query_cache, clear=True
+            ):
+                yield self
+        finally:
+            for module in patched:
+                module.rag = real_rag
+            utils._vertexai_initialized = initialized
+            utils.invalidate_corpus_catalog()
@@ -0,0 +1,74 @@
+"""
+Import-time budget check for the rag_agent package.
+
+Imports each target module in a fresh interpreter, measures its wall-clock import time
+and checks that heavy dependencies which are only needed by specific tools (GitPython,
+Cloud Storage) are not imported eagerly.
+
+Usage:
+    python benchmarks/import_time.py
+
+Exits with a non-zero status when a budget is exceeded.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, import-time budget in seconds, modules that must not be loaded by importing it)
+BUDGETS = [
+    ("rag_agent", 0.05, ["vertexai", "google.adk", "google.cloud.storage", "git"]),
+    ("rag_agent.config", 0.2, ["vertexai", "google.adk", "google.cloud.storage", "git"]),
+    # vertexai itself imports google.cloud.storage, so only GitPython can be deferred here
+    ("rag_agent.tools", 8.0, ["git"]),
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Import a module in a fresh interpreter and return its import time and loaded modules."""
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=REPO_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    failures = 0
+    for module, budget, forbidden in BUDGETS:
+        try:
+            result = measure(module)
+        except subprocess.CalledProcessError as e:
+            print(f"{module}: import failed\n{e.stderr}")
+            failures += 1
+            continue
+
+        loaded = [name for name in forbidden if name in result["modules"]]
+        within_budget = result["elapsed"] <= budget
+        status = "ok" if within_budget and not loaded else "FAIL"
+        print(
+            f"{status:4} {module}: {result['elapsed'] * 1000:.1f} ms "
+            f"(budget {budget * 1000:.0f} ms)"
+            + (f", eagerly loaded {loaded}" if loaded else "")
+        )
+        if status != "ok":
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,34 +2,17 @@
 Vertex AI RAG Agent
 
 A package for interacting with Google Cloud Vertex AI RAG capabilities.
-"""
-
-import os
 
-import vertexai
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+Importing the package is cheap: Vertex AI is initialized on the first tool call
+(see tools.utils.ensure_vertexai_initialized) and the agent module, which pulls in
+ADK and the RAG tools, is only imported when `rag_agent.agent` is first accessed.
+"""
 
-# Get Vertex AI configuration from environment
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
+import importlib
 
-# Initialize Vertex AI at package load time
-try:
-    if PROJECT_ID and LOCATION:
-        print(f"Initializing Vertex AI with project={PROJECT_ID}, location={LOCATION}")
-        vertexai.init(project=PROJECT_ID, location=LOCATION)
-        print("Vertex AI initialization successful")
-    else:
-        print(
-            f"Missing Vertex AI configuration. PROJECT_ID={PROJECT_ID}, LOCATION={LOCATION}. "
-            f"Tools requiring Vertex AI may not work properly."
-        )
-except Exception as e:
-    print(f"Failed to initialize Vertex AI: {str(e)}")
-    print("Please check your Google Cloud credentials and project settings.")
 
-# Import agent after initialization is complete
-from . import agent
+def __getattr__(name):
+    # Import the agent lazily so cold starts do not pay for ADK and the tools up front
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,17 @@
 from agents import get_agent
 rag_agent = get_agent("rag")
 
-from .tools.add_data import add_data
-from .tools.create_corpus import create_corpus
-from .tools.delete_corpus import delete_corpus
-from .tools.delete_document import delete_document
-from .tools.get_corpus_info import get_corpus_info
-from .tools.list_corpora import list_corpora
-from .tools.rag_query import rag_query
+# Async variants keep the event loop free while Vertex AI/GCS/git calls are in flight
+from .tools.async_tools import (
+    add_data,
+    create_corpus,
+    delete_corpus,
+    delete_document,
+    get_corpus_info,
+    get_ingestion_status,
+    list_corpora,
+    rag_query,
+)
 
 root_agent = Agent(
     name="RagAgent",
@@ -20,6 +24,7 @@ root_agent = Agent(
         create_corpus,
         add_data,
         get_corpus_info,
+        get_ingestion_status,
         delete_corpus,
         delete_document,
     ],
@@ -46,12 +51,13 @@ root_agent = Agent(
         Uso das Ferramentas:
         Você tem as seguintes ferramentas especializadas à sua disposição. Utilize-as com precisão, passando os parâmetros corretos:
         
-        rag_query(corpus_name: str, query: str): Para buscar e responder perguntas. corpus_name pode ser vazio para o corpus atual.
+        rag_query(corpus_name: str, query: str, corpus_names: List[str] = None): Para buscar e responder perguntas. corpus_name pode ser vazio para o corpus atual. Quando a pergunta envolve vários corpora (ex.: o corpus do cliente e os internos), passe todos em corpus_names em uma única chamada em vez de chamar rag_query várias vezes.
         list_corpora(): Para listar todas as bases de conhecimento.
         create_corpus(corpus_name: str): Para criar uma nova base.
-        add_data(corpus_name: str, paths: List[str]): Para adicionar dados (URLs de Google Drive, GCS ou caminhos de repositório GitHub).
-        get_corpus_info(corpus_name: str): Para obter informações detalhadas.
-        delete_document(corpus_name: str, document_id: str, confirm: bool): Para deletar documentos (requer confirm=True).
+        add_data(corpus_name: str, paths: List[str], background: bool): Para adicionar dados (URLs de Google Drive, GCS ou caminhos de repositório GitHub). Para repositórios GitHub e pastas grandes, use background=True: a ingestão roda em segundo plano e a ferramenta devolve um job_id imediatamente.
+        get_ingestion_status(job_id: str, corpus_name: str): Para acompanhar uma ingestão em segundo plano (status e progresso por etapa). Com job_id vazio, lista as ingestões recentes. Informe o progresso ao usuário em vez de chamar add_data novamente.
+        get_corpus_info(corpus_name: str, page_size: int, page_token: str, summary_only: bool, fields: List[str], source_uri_prefix: str): Para obter informações detalhadas. Use summary_only=True quando só a contagem de arquivos for necessária, e next_page_token para paginar corpora grandes.
+        delete_document(corpus_name: str, document_id: str, document_ids: List[str], source_uri_prefix: str, source_uri_glob: str, repo_url: str): Para deletar documentos (requer confirmação do usuário). Para remover muitos documentos (uma lista de IDs, todos os arquivos sob um prefixo ou glob de URI de origem, ou todos os arquivos ingeridos de um repositório GitHub), faça uma única chamada com document_ids, source_uri_prefix/source_uri_glob ou repo_url, deixando document_id vazio, em vez de chamar delete_document para cada documento.
         delete_corpus(corpus_name: str, confirm: bool): Para deletar corpora (requer confirm=True).
         INTERNO: Detalhes Técnicos (Não Expor ao Usuário):
         O sistema mantém um "current corpus" no estado.
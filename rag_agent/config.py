@@ -2,15 +2,14 @@
 Configuration settings for the RAG Agent.
 
 These settings are used by the various RAG tools.
-Vertex AI initialization is performed in the package's __init__.py
+Vertex AI is initialized lazily on first use (see tools.utils.ensure_vertexai_initialized).
 """
 
 import os
 
 from dotenv import load_dotenv
 
-# Load environment variables (this is redundant if __init__.py is imported first,
-# but included for safety when importing config directly)
+# Load environment variables
 load_dotenv()
 
 # Vertex AI settings
@@ -24,3 +23,272 @@ DEFAULT_TOP_K = 3
 DEFAULT_DISTANCE_THRESHOLD = 0.5
 DEFAULT_EMBEDDING_MODEL = "publishers/google/models/text-embedding-005"
 DEFAULT_EMBEDDING_REQUESTS_PER_MIN = 1000
+
+# Chunking profiles (sizes in tokens), matched by file extension or MIME type.
+# Files matching no profile, and paths whose type cannot be told from their URI
+# (Drive file links, GCS directories), are chunked with DEFAULT_CHUNK_SIZE/OVERLAP.
+CHUNKING_PROFILES = {
+    # Functions and classes are self-contained: little overlap is needed
+    "code": {
+        "extensions": [
+            ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".rb",
+            ".php", ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".scala", ".swift", ".sql",
+            ".sh", ".ipynb",
+        ],
+        "mime_types": [],
+        "chunk_size": 512,
+        "chunk_overlap": 64,
+    },
+    # Structured notes and READMEs: section-sized chunks
+    "markdown": {
+        "extensions": [".md", ".mdx", ".rst", ".txt"],
+        "mime_types": ["text/markdown", "text/plain"],
+        "chunk_size": 512,
+        "chunk_overlap": 48,
+    },
+    # Configuration and tabular data
+    "data": {
+        "extensions": [".json", ".yaml", ".yml", ".toml", ".csv", ".xml"],
+        "mime_types": ["application/vnd.google-apps.spreadsheet", "text/csv"],
+        "chunk_size": 512,
+        "chunk_overlap": 0,
+    },
+    # Long-form documents: larger chunks keep paragraphs and their context together
+    "document": {
+        "extensions": [".pdf", ".docx", ".pptx", ".html", ".htm"],
+        "mime_types": [
+            "application/pdf",
+            "application/vnd.google-apps.document",
+            "application/vnd.google-apps.presentation",
+        ],
+        "chunk_size": 1024,
+        "chunk_overlap": 128,
+    },
+}
+
+# Corpus catalog cache settings
+CORPUS_CATALOG_TTL_SECONDS = 300
+CORPUS_CATALOG_MIN_REFRESH_INTERVAL_SECONDS = 2
+
+# GCS upload settings (GitHub ingestion)
+GCS_UPLOAD_CONCURRENCY = 8
+GCS_UPLOAD_MAX_RETRIES = 3
+GCS_UPLOAD_RETRY_BACKOFF_SECONDS = 1.0
+GCS_UPLOAD_PROGRESS_LOG_INTERVAL = 100
+GCS_CHUNKED_UPLOAD_THRESHOLD_BYTES = 64 * 1024 * 1024
+GCS_CHUNKED_UPLOAD_CHUNK_SIZE_BYTES = 16 * 1024 * 1024
+GCS_CHUNKED_UPLOAD_MAX_WORKERS = 4
+
+# GitHub ingestion settings
+GITHUB_CLONE_DEPTH = 1
+INGEST_INCLUDE_GLOBS = []  # Empty means every file not excluded below
+INGEST_EXCLUDE_GLOBS = [
+    ".git",
+    ".DS_Store",
+    "__pycache__",
+    "node_modules",
+    "vendor",
+    "third_party",
+    ".venv",
+    "venv",
+    "dist",
+    "build",
+    "*.lock",
+    "package-lock.json",
+    "pnpm-lock.yaml",
+    "go.sum",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.pyc",
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.ico",
+    "*.svg",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.eot",
+    "*.zip",
+    "*.tar",
+    "*.gz",
+    "*.jar",
+    "*.so",
+    "*.dll",
+    "*.exe",
+    "*.bin",
+]
+INGEST_IGNORE_FILE_NAMES = [".gitignore", ".ragignore"]
+INGEST_MAX_FILE_SIZE_BYTES = 2 * 1024 * 1024
+INGEST_BINARY_SNIFF_BYTES = 8000
+# Binary formats the RAG engine can parse, exempt from binary detection
+INGEST_BINARY_ALLOWED_EXTENSIONS = [".pdf", ".docx", ".pptx"]
+# Skip GitHub and GCS files whose content (MD5) is already in the corpus or in the same ingest
+INGEST_DEDUP_ENABLED = os.environ.get("RAG_INGEST_DEDUP", "true").lower() == "true"
+
+# GitHub staging area garbage collection settings
+# Unreferenced staged objects written or reused more recently than this are kept, so
+# ingests still in flight are never collected from under them
+STAGING_GC_MIN_AGE_SECONDS = 6 * 3600
+STAGING_GC_MAX_WORKERS = 8
+# Ingest manifests and content indexes are only written if unchanged since they were
+# read; an ingest that loses a race with another reads them again and merges its
+# changes in, up to this many times
+STAGING_METADATA_WRITE_MAX_ATTEMPTS = 5
+
+# Retrieval result cache settings
+RETRIEVAL_CACHE_MAX_ENTRIES = 1024
+RETRIEVAL_CACHE_TTL_SECONDS = 600
+
+# Semantic retrieval cache settings (requires numpy)
+# Opt-in: every query missing the exact-match cache then costs an extra embedding call.
+# Rephrased queries are served from a cached retrieval of the same corpus when their
+# embeddings' cosine similarity reaches the threshold. Keep it high: queries differing
+# only by an entity ("cliente X" vs "cliente Y") are still very similar.
+SEMANTIC_CACHE_ENABLED = os.environ.get("RAG_SEMANTIC_CACHE", "false").lower() == "true"
+SEMANTIC_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("RAG_SEMANTIC_CACHE_SIMILARITY_THRESHOLD", "0.95")
+)
+SEMANTIC_CACHE_MAX_ENTRIES = 2048
+
+# Multi-corpus rag_query settings
+RAG_QUERY_FANOUT_MAX_WORKERS = 8
+
+# Remote call resilience settings
+REMOTE_CALL_MAX_ATTEMPTS = 3
+REMOTE_CALL_RETRY_BASE_SECONDS = 0.2
+REMOTE_CALL_RETRY_MAX_SECONDS = 5.0
+# An endpoint's circuit opens after this many consecutive transient failures...
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+# ...and lets a probe call through after this long
+CIRCUIT_BREAKER_RESET_SECONDS = 30.0
+# Deadline of one tool call, shared by its remote calls and their retries
+TOOL_DEADLINE_SECONDS = {
+    "rag_query": 30.0,
+    "add_data": 1800.0,
+    "delete_corpus": 300.0,
+    "delete_document": 600.0,
+}
+TOOL_DEFAULT_DEADLINE_SECONDS = 60.0
+# Timeouts of single requests, shortened to what is left of the tool call's deadline
+GCS_REQUEST_TIMEOUT_SECONDS = 60.0
+RAG_IMPORT_FILES_TIMEOUT_SECONDS = 600.0
+# Under a deadline, remote calls without a request timeout of their own (the rag.* calls
+# but import_files) run on a pool of this many threads per endpoint, while their caller
+# waits at most until the deadline. An abandoned call keeps its thread until it returns,
+# so a hung endpoint can fill its own pool, never another endpoint's; time spent queued
+# for a thread counts against the caller's deadline.
+DEADLINE_CALL_MAX_WORKERS = 16
+# Send a duplicate retrieval_query when the first is slower than the recent p95 latency
+HEDGED_RETRIEVAL_ENABLED = os.environ.get("RAG_HEDGED_RETRIEVAL", "false").lower() == "true"
+HEDGE_LATENCY_PERCENTILE = 0.95
+HEDGE_LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_WORKERS = 16
+
+# Shared client settings
+# Keepalive pings on the gRPC channel to Vertex AI, so idle connections survive between tool calls
+RAG_GRPC_KEEPALIVE_SECONDS = 300
+RAG_GRPC_KEEPALIVE_TIMEOUT_SECONDS = 20
+
+# Async tool settings
+ASYNC_TOOL_MAX_WORKERS = 32
+
+# rag.import_files batching settings
+IMPORT_BATCH_MAX_PATHS = 25
+IMPORT_MAX_CONCURRENT_BATCHES = 4
+IMPORT_BATCH_MAX_ATTEMPTS = 3
+IMPORT_BATCH_RETRY_BACKOFF_SECONDS = 5.0
+
+# Embedding quota governor settings
+# DEFAULT_EMBEDDING_REQUESTS_PER_MIN is the process-wide budget shared by every concurrent
+# rag.import_files batch and local embedding request. Share of it kept for local
+# (query/index) embedding requests, so imports cannot starve rag_query:
+EMBEDDING_GOVERNOR_ONLINE_FRACTION = 0.1
+# On a quota (429) error the budget is multiplied by this factor, at most once per cooldown
+EMBEDDING_GOVERNOR_BACKOFF_FACTOR = 0.5
+EMBEDDING_GOVERNOR_BACKOFF_COOLDOWN_SECONDS = 30.0
+# Lowest budget after backoffs, as a fraction of DEFAULT_EMBEDDING_REQUESTS_PER_MIN
+EMBEDDING_GOVERNOR_MIN_FRACTION = 0.05
+# Budget regained per minute without quota errors, as a fraction of DEFAULT_EMBEDDING_REQUESTS_PER_MIN
+EMBEDDING_GOVERNOR_RECOVERY_PER_MIN = 0.1
+# Local embedding requests that may be sent in a burst
+EMBEDDING_GOVERNOR_BURST = 10
+
+# Background ingestion job settings (add_data(..., background=True))
+INGESTION_JOB_DB_PATH = os.environ.get("RAG_INGESTION_JOB_DB", "/tmp/rag_ingestion_jobs.sqlite3")
+INGESTION_JOB_MAX_WORKERS = 2
+INGESTION_JOB_MAX_ATTEMPTS = 3
+INGESTION_JOB_RETRY_BACKOFF_SECONDS = 30.0
+# A running job whose worker has not reported for this long is considered abandoned
+INGESTION_JOB_LEASE_SECONDS = 900
+INGESTION_STATUS_RECENT_JOBS = 10
+
+# delete_document bulk deletion settings
+DELETE_DOCUMENT_MAX_WORKERS = 8
+# Deleted and failed document IDs listed in the response; longer lists are truncated
+DELETE_DOCUMENT_MAX_REPORTED_IDS = 50
+
+# get_corpus_info settings
+CORPUS_INFO_DEFAULT_PAGE_SIZE = 100
+CORPUS_INFO_MAX_PAGE_SIZE = 1000
+CORPUS_INFO_DEFAULT_FIELDS = ["file_id", "display_name", "source_uri", "create_time", "update_time"]
+
+# Telemetry settings
+# Span exporter: "none" (no-op, default for local runs), "console" or "otlp".
+# "console" and "otlp" require opentelemetry-sdk (and the OTLP exporter package).
+TELEMETRY_EXPORTER = os.environ.get("RAG_TELEMETRY_EXPORTER", "none")
+TELEMETRY_LATENCY_BUCKETS_SECONDS = [
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+]
+
+# Local vector index settings
+# Corpora (display names or resource names) answered from a local in-process index,
+# e.g. RAG_LOCAL_INDEX_CORPORA="docs,faq". Requires numpy.
+LOCAL_INDEX_CORPORA = [
+    name.strip()
+    for name in os.environ.get("RAG_LOCAL_INDEX_CORPORA", "").split(",")
+    if name.strip()
+]
+LOCAL_INDEX_DIR = os.environ.get("RAG_LOCAL_INDEX_DIR", "/tmp/rag_local_index")
+# Stored vector precision: "float32" or "int8" (per-row scaled, 4x smaller)
+LOCAL_INDEX_QUANTIZATION = os.environ.get("RAG_LOCAL_INDEX_QUANTIZATION", "float32")
+LOCAL_INDEX_REFRESH_INTERVAL_SECONDS = 300
+LOCAL_INDEX_MAX_FILE_SIZE_BYTES = 2 * 1024 * 1024
+LOCAL_INDEX_DOWNLOAD_CONCURRENCY = 8
+
+# Hybrid (lexical + vector) retrieval settings
+# Corpora (display names or resource names) whose rag_query results fuse vector results
+# with a local BM25 index of their chunks, e.g. RAG_HYBRID_RETRIEVAL_CORPORA="code,faq"
+HYBRID_RETRIEVAL_CORPORA = [
+    name.strip()
+    for name in os.environ.get("RAG_HYBRID_RETRIEVAL_CORPORA", "").split(",")
+    if name.strip()
+]
+LEXICAL_INDEX_DIR = os.environ.get("RAG_LEXICAL_INDEX_DIR", "/tmp/rag_lexical_index")
+LEXICAL_INDEX_MAX_FILES = 5000
+LEXICAL_BM25_K1 = 1.2
+LEXICAL_BM25_B = 0.75
+# Reciprocal-rank fusion constant: higher values flatten the weight of top ranks
+RRF_K = 60
+# Results of one source sharing at least this share of the smaller one's word shingles
+# are fused as the same chunk (lexical and vector chunk boundaries differ)
+HYBRID_FUSION_OVERLAP_THRESHOLD = 0.5
+
+# rag_query context packing settings
+# Maximum estimated tokens of context text returned by rag_query (0 disables the limit)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("RAG_CONTEXT_TOKEN_BUDGET", "2000"))
+# Chunks of one source sharing at least this many words at their edges are merged
+CONTEXT_MIN_OVERLAP_WORDS = 8
+# Contexts with at least this share of their word shingles in a better-ranked one are dropped
+CONTEXT_NEAR_DUPLICATE_THRESHOLD = 0.8
+CONTEXT_SHINGLE_SIZE = 3
+# The last context is truncated to fit the budget only if at least this many tokens remain
+CONTEXT_MIN_TRUNCATED_TOKENS = 64
+
+# Embedding request settings (local indexes)
+EMBEDDING_BATCH_MAX_TEXTS = 250
+EMBEDDING_BATCH_MAX_TOKENS = 15000
+QUERY_EMBEDDING_CACHE_SIZE = 1024
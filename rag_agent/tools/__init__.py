@@ -7,11 +7,22 @@ from .create_corpus import create_corpus
 from .delete_corpus import delete_corpus
 from .delete_document import delete_document
 from .get_corpus_info import get_corpus_info
+from .get_ingestion_status import get_ingestion_status
 from .list_corpora import list_corpora
+from .lexical_index import get_lexical_index_stats, refresh_lexical_index
+from .local_index import get_local_index_stats, refresh_local_index
 from .rag_query import rag_query
+from .rate_governor import get_embedding_governor_stats
+from .resilience import get_circuit_states
+from .retrieval_cache import get_retrieval_cache_stats, invalidate_retrieval_cache
+from .semantic_cache import get_semantic_cache_stats, invalidate_semantic_cache
+from .staging_gc import collect_staging_garbage
+from .telemetry import export_prometheus_text, get_telemetry_snapshot
 from .utils import (
     check_corpus_exists,
+    ensure_vertexai_initialized,
     get_corpus_resource_name,
+    invalidate_corpus_catalog,
     set_current_corpus,
 )
 
@@ -21,9 +32,25 @@ __all__ = [
     "list_corpora",
     "rag_query",
     "get_corpus_info",
+    "get_ingestion_status",
     "delete_corpus",
     "delete_document",
+    "export_prometheus_text",
+    "get_telemetry_snapshot",
+    "get_embedding_governor_stats",
+    "get_circuit_states",
+    "get_lexical_index_stats",
+    "refresh_lexical_index",
+    "get_local_index_stats",
+    "refresh_local_index",
+    "get_retrieval_cache_stats",
+    "invalidate_retrieval_cache",
+    "get_semantic_cache_stats",
+    "invalidate_semantic_cache",
+    "collect_staging_garbage",
     "check_corpus_exists",
+    "ensure_vertexai_initialized",
     "get_corpus_resource_name",
+    "invalidate_corpus_catalog",
     "set_current_corpus",
 ]
\ No newline at end of file
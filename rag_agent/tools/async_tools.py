@@ -0,0 +1,123 @@
+"""
+Asyncio variants of the RAG tools.
+
+The Vertex AI RAG SDK, Cloud Storage and GitPython only offer blocking calls for the
+operations the tools use, so each async tool runs its synchronous counterpart on a
+dedicated, bounded thread pool instead of the event loop's default executor. This keeps
+the event loop free to serve other sessions while remote calls are in flight.
+
+Tools never touch the session state from a worker thread: they see a buffered view of
+tool_context.state, and their writes are applied on the event loop thread once the tool
+returns. The async tools keep the names, signatures and docstrings of the synchronous
+ones, so the agent's tool declarations are unchanged.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from ..config import ASYNC_TOOL_MAX_WORKERS
+from .add_data import add_data as _add_data
+from .create_corpus import create_corpus as _create_corpus
+from .delete_corpus import delete_corpus as _delete_corpus
+from .delete_document import delete_document as _delete_document
+from .get_corpus_info import get_corpus_info as _get_corpus_info
+from .get_ingestion_status import get_ingestion_status as _get_ingestion_status
+from .list_corpora import list_corpora as _list_corpora
+from .rag_query import rag_query as _rag_query
+
+_executor = ThreadPoolExecutor(
+    max_workers=ASYNC_TOOL_MAX_WORKERS, thread_name_prefix="rag-tool"
+)
+
+_MISSING = object()
+
+
+class _BufferedState:
+    """Read-through view of a session state that buffers writes until the tool returns."""
+
+    def __init__(self, state):
+        self._state = state
+        self._writes: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._writes:
+            return self._writes[key]
+        return self._state[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._writes[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._writes or key in self._state
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._writes.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return self._state.get(key, default)
+
+    def apply(self) -> None:
+        """Apply the buffered writes to the underlying state."""
+        for key, value in self._writes.items():
+            self._state[key] = value
+
+
+class _ToolContextProxy:
+    """Tool context handed to worker threads, exposing a buffered state."""
+
+    def __init__(self, tool_context):
+        self._tool_context = tool_context
+        self.state = _BufferedState(tool_context.state)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tool_context, name)
+
+
+async def _run_in_executor(sync_tool: Callable[..., dict], **kwargs) -> dict:
+    """Run a synchronous tool on the tool executor, applying its state writes afterwards."""
+    proxy = None
+    if kwargs.get("tool_context") is not None:
+        proxy = _ToolContextProxy(kwargs["tool_context"])
+        kwargs["tool_context"] = proxy
+
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, sync_tool, **kwargs)
+    result = await loop.run_in_executor(_executor, call)
+
+    if proxy is not None:
+        proxy.state.apply()
+    return result
+
+
+def _make_async(sync_tool: Callable[..., dict]) -> Callable[..., Any]:
+    """Build the async variant of a tool, keeping its name, docstring and signature."""
+
+    @functools.wraps(sync_tool)
+    async def async_tool(**kwargs) -> dict:
+        return await _run_in_executor(sync_tool, **kwargs)
+
+    return async_tool
+
+
+rag_query = _make_async(_rag_query)
+list_corpora = _make_async(_list_corpora)
+create_corpus = _make_async(_create_corpus)
+add_data = _make_async(_add_data)
+get_corpus_info = _make_async(_get_corpus_info)
+get_ingestion_status = _make_async(_get_ingestion_status)
+delete_corpus = _make_async(_delete_corpus)
+delete_document = _make_async(_delete_document)
+
+__all__ = [
+    "add_data",
+    "create_corpus",
+    "list_corpora",
+    "rag_query",
+    "get_corpus_info",
+    "get_ingestion_status",
+    "delete_corpus",
+    "delete_document",
+]
@@ -0,0 +1,104 @@
+"""
+Chunking profiles, local text chunking and token estimation.
+
+Files are chunked according to the chunking profile of their type (CHUNKING_PROFILES):
+add_data imports each profile's files with its own chunk size and overlap, and local
+indexes built from a corpus' source files approximate the RAG engine's fixed-size
+chunking with the same profile, without a tokenizer, so they see chunks of about the
+same size as the remote index.
+"""
+
+import math
+import posixpath
+import re
+from typing import Dict, List, Optional, Tuple
+
+from ..config import CHUNKING_PROFILES, DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+
+DEFAULT_PROFILE = "default"
+
+# Average tokens per whitespace-separated word for English prose and source code
+_TOKENS_PER_WORD = 1.3
+# Average characters per token, used for text with long unbroken words
+_CHARS_PER_TOKEN = 4
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text."""
+    if not text:
+        return 0
+    words = len(_WORD_PATTERN.findall(text))
+    return max(math.ceil(words * _TOKENS_PER_WORD), math.ceil(len(text) / _CHARS_PER_TOKEN))
+
+
+def get_chunking_profile(uri: str, mime_type: Optional[str] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Return the chunking profile of a file, by MIME type if known, else by extension.
+
+    Args:
+        uri (str): The file's URI or path
+        mime_type (Optional[str]): The file's MIME type, if known
+
+    Returns:
+        Tuple[str, Dict[str, int]]: The profile name ("default" if none matches) and its
+                                    "chunk_size" and "chunk_overlap"
+    """
+    extension = posixpath.splitext(uri.split("?", 1)[0].rstrip("/"))[1].lower()
+    for attribute, value in (("mime_types", mime_type), ("extensions", extension)):
+        if not value:
+            continue
+        for name, profile in CHUNKING_PROFILES.items():
+            if value in profile.get(attribute, []):
+                return name, {"chunk_size": profile["chunk_size"], "chunk_overlap": profile["chunk_overlap"]}
+    return DEFAULT_PROFILE, {"chunk_size": DEFAULT_CHUNK_SIZE, "chunk_overlap": DEFAULT_CHUNK_OVERLAP}
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> List[str]:
+    """
+    Split a text into overlapping chunks of about chunk_size tokens.
+
+    Chunks break on whitespace and keep the original text (including newlines)
+    between their first and last word.
+
+    Args:
+        text (str): The text to split
+        chunk_size (int): Target chunk size in tokens
+        chunk_overlap (int): Tokens shared by consecutive chunks
+
+    Returns:
+        List[str]: The chunks, in document order
+    """
+    words = list(_WORD_PATTERN.finditer(text))
+    if not words:
+        return []
+
+    # Count every word as at least one token, and long words by their length
+    costs = [
+        max(_TOKENS_PER_WORD, len(word.group()) / _CHARS_PER_TOKEN) for word in words
+    ]
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = start
+        size = 0.0
+        while end < len(words) and (end == start or size + costs[end] <= chunk_size):
+            size += costs[end]
+            end += 1
+        chunks.append(text[words[start].start() : words[end - 1].end()])
+        if end >= len(words):
+            break
+
+        # Step back far enough to share chunk_overlap tokens with the next chunk
+        next_start = end
+        overlap = 0.0
+        while next_start - 1 > start and overlap + costs[next_start - 1] <= chunk_overlap:
+            next_start -= 1
+            overlap += costs[next_start]
+        start = next_start
+    return chunks
@@ -0,0 +1,156 @@
+"""
+Process-wide Vertex AI RAG and Cloud Storage clients.
+
+vertexai.rag builds a new GAPIC client, and with it a new gRPC channel and TLS
+handshake, for every call, and every storage.Client() resolves credentials and opens
+its own connection pool. Instead, every tool in the process shares:
+- one set of credentials, refreshed in the background shortly before the token expires
+  (a single refresh for the whole process) and passed to vertexai.init, so the SDK's
+  other clients use it too,
+- one storage.Client, whose HTTP session keeps up to _gcs_pool_size() connections alive
+  for reuse, enough for every concurrent upload, download and deletion,
+- one gRPC channel to the Vertex AI endpoint, kept alive with keepalive pings and
+  multiplexing every concurrent rag.* call, including parallel import batches;
+  install_rag_clients routes vertexai.rag's client factories to long-lived clients
+  bound to it.
+
+All accessors are thread-safe and create their client on first use.
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..config import (
+    GCS_CHUNKED_UPLOAD_MAX_WORKERS,
+    GCS_UPLOAD_CONCURRENCY,
+    LOCAL_INDEX_DOWNLOAD_CONCURRENCY,
+    PROJECT_ID,
+    RAG_GRPC_KEEPALIVE_SECONDS,
+    RAG_GRPC_KEEPALIVE_TIMEOUT_SECONDS,
+    STAGING_GC_MAX_WORKERS,
+)
+
+if TYPE_CHECKING:
+    import grpc
+    from google.auth.credentials import Credentials
+    from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+_CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+
+_lock = threading.Lock()
+_credentials: Optional["Credentials"] = None
+_storage_client: Optional["storage.Client"] = None
+_rag_channel: Optional["grpc.Channel"] = None
+_rag_clients: Dict[str, Any] = {}
+
+
+def _gcs_pool_size() -> int:
+    """Connections the shared GCS session keeps, one per request that can run concurrently."""
+    return max(
+        # Every streamed upload may be split into concurrently uploaded chunks
+        GCS_UPLOAD_CONCURRENCY * GCS_CHUNKED_UPLOAD_MAX_WORKERS,
+        LOCAL_INDEX_DOWNLOAD_CONCURRENCY,
+        STAGING_GC_MAX_WORKERS,
+    )
+
+
+def get_credentials() -> "Credentials":
+    """
+    Return the application default credentials shared by every client of the process.
+
+    The token is fetched once here; afterwards it is refreshed by a single background
+    thread before it expires, while calls keep using the still valid one.
+    """
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            import google.auth
+            from google.auth.transport.requests import Request
+
+            credentials, _ = google.auth.default(scopes=[_CLOUD_PLATFORM_SCOPE])
+            credentials.with_non_blocking_refresh()
+            credentials.refresh(Request())
+            _credentials = credentials
+        return _credentials
+
+
+def get_storage_client() -> "storage.Client":
+    """Return the process' Cloud Storage client."""
+    global _storage_client
+    credentials = get_credentials() if _storage_client is None else None
+    with _lock:
+        if _storage_client is None:
+            # Imported lazily so processes that never touch GCS skip it
+            import requests
+            from google.auth.transport.requests import AuthorizedSession
+            from google.cloud import storage
+
+            pool_size = _gcs_pool_size()
+            session = AuthorizedSession(credentials)
+            session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+            _storage_client = storage.Client(project=PROJECT_ID, credentials=credentials, _http=session)
+            logger.info(f"Created the shared GCS client ({pool_size} pooled connections)")
+        return _storage_client
+
+
+def _get_rag_channel() -> "grpc.Channel":
+    global _rag_channel
+    credentials = get_credentials() if _rag_channel is None else None
+    with _lock:
+        if _rag_channel is None:
+            from google.api_core import grpc_helpers
+            from google.cloud.aiplatform import initializer
+
+            host = initializer.global_config.get_client_options().api_endpoint
+            _rag_channel = grpc_helpers.create_channel(
+                f"{host}:443",
+                credentials=credentials,
+                default_scopes=[_CLOUD_PLATFORM_SCOPE],
+                options=[
+                    ("grpc.max_send_message_length", -1),
+                    ("grpc.max_receive_message_length", -1),
+                    ("grpc.keepalive_time_ms", RAG_GRPC_KEEPALIVE_SECONDS * 1000),
+                    ("grpc.keepalive_timeout_ms", RAG_GRPC_KEEPALIVE_TIMEOUT_SECONDS * 1000),
+                    ("grpc.keepalive_permit_without_calls", 1),
+                ],
+            )
+            logger.info(f"Opened the shared gRPC channel to {host}")
+        return _rag_channel
+
+
+def _get_rag_client(client_class: type) -> Any:
+    """Return the process' client of a Vertex AI RAG GAPIC client class, bound to the shared channel."""
+    client = _rag_clients.get(client_class.__name__)
+    if client is not None:
+        return client
+    channel = _get_rag_channel()
+    with _lock:
+        client = _rag_clients.get(client_class.__name__)
+        if client is None:
+            from google.api_core import gapic_v1
+            from google.cloud.aiplatform import initializer
+
+            client_options = initializer.global_config.get_client_options()
+            transport_class = client_class.get_transport_class("grpc")
+            client = _rag_clients[client_class.__name__] = client_class(
+                transport=transport_class(host=client_options.api_endpoint, channel=channel),
+                client_options=client_options,
+                client_info=gapic_v1.client_info.ClientInfo(),
+            )
+        return client
+
+
+def install_rag_clients() -> None:
+    """
+    Make vertexai.rag use the shared clients instead of creating new ones per call.
+
+    Must run after vertexai.init, which sets the endpoint the channel connects to.
+    """
+    from google.cloud.aiplatform_v1 import VertexRagDataServiceClient, VertexRagServiceClient
+    from vertexai.rag.utils import _gapic_utils
+
+    _gapic_utils.create_rag_data_service_client = lambda: _get_rag_client(VertexRagDataServiceClient)
+    _gapic_utils.create_rag_service_client = lambda: _get_rag_client(VertexRagServiceClient)
@@ -0,0 +1,261 @@
+"""
+Content-hash deduplication of ingested files.
+
+Files are identified by the MD5 digest of their content. GCS keeps one for every
+non-composite object, so GCS sources are hashed from their metadata without being
+downloaded; files of GitHub repositories are hashed as they are read from git objects.
+
+A per-corpus content index, stored next to the ingest manifests, maps the digest of
+every file imported into the corpus to the source URI it was imported from. An ingest
+skips files whose content is already in the corpus, or was already seen earlier in the
+same ingest, so vendored copies and files saved under several names are chunked and
+embedded once. Concurrent ingests into a corpus each merge their changes into the
+index: it is written only if its GCS generation is unchanged since it was read.
+"""
+
+import base64
+import json
+import logging
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from vertexai import rag
+
+from ..config import STAGING_METADATA_WRITE_MAX_ATTEMPTS
+from .ingest_manifest import corpus_key
+from .resilience import gcs_timeout, resilient_call
+from .utils import get_rag_file_source_uri
+
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+CONTENT_INDEX_VERSION = 1
+
+# Content indexes live next to the staged repository content, under this sub-prefix
+CONTENT_INDEX_SUBPREFIX = "_content_index"
+
+def gcs_md5(blob: "storage.Blob") -> Optional[str]:
+    """Return the hex MD5 digest GCS keeps for an object, or None (composite objects have none)."""
+    if not getattr(blob, "md5_hash", None):
+        return None
+    return base64.b64decode(blob.md5_hash).hex()
+
+
+def list_gcs_source_files(
+    storage_client: "storage.Client", gcs_path: str
+) -> List[Tuple[str, Optional[str], int]]:
+    """
+    Resolve a gs:// source path (a single object or a directory prefix) to its files.
+
+    Returns:
+        List[Tuple[str, Optional[str], int]]: The gs:// URI, MD5 digest (None if unknown)
+                                              and size of every file
+    """
+    match = re.match(r"^gs://([^/]+)/?(.*)$", gcs_path)
+    if not match:
+        raise ValueError(f"Invalid GCS path: {gcs_path}")
+    bucket_name, name = match.group(1), match.group(2)
+    bucket = storage_client.bucket(bucket_name)
+
+    if name and not name.endswith("/"):
+        blob = resilient_call("gcs.get", lambda: bucket.get_blob(name, timeout=gcs_timeout()), timed=True)
+        if blob is not None:
+            return [(f"gs://{bucket_name}/{name}", gcs_md5(blob), blob.size or 0)]
+
+    prefix = f"{name.rstrip('/')}/" if name else ""
+    blobs = resilient_call(
+        "gcs.list", lambda: list(bucket.list_blobs(prefix=prefix, timeout=gcs_timeout())), timed=True
+    )
+    # Objects ending in "/" are folder placeholders, not files
+    return [
+        (f"gs://{bucket_name}/{blob.name}", gcs_md5(blob), blob.size or 0)
+        for blob in blobs
+        if not blob.name.endswith("/")
+    ]
+
+
+def content_index_blob_name(base_prefix: str, corpus_resource_name: str) -> str:
+    """Return the GCS object name of a corpus' content index."""
+    return f"{base_prefix}/{CONTENT_INDEX_SUBPREFIX}/{corpus_key(corpus_resource_name)}.json"
+
+
+class ContentDeduplicator:
+    """
+    Tracks the content hashes of one ingest into a corpus, whose content index is kept
+    in `bucket_name` under `base_prefix`.
+
+    The corpus' content index is loaded on the first claim; entries whose source URI is
+    no longer in the corpus are dropped, so content deleted since the last ingest is
+    imported again.
+    """
+
+    def __init__(
+        self,
+        storage_client: "storage.Client",
+        bucket_name: str,
+        base_prefix: str,
+        corpus_resource_name: str,
+    ):
+        self.storage_client = storage_client
+        self.bucket = storage_client.bucket(bucket_name)
+        self.base_prefix = base_prefix
+        self.corpus_resource_name = corpus_resource_name
+        self.deduplicated_files = 0
+        self.deduplicated_bytes = 0
+        # Content hash -> {"source_uri": ..., "size": ...}
+        self._indexed: Optional[Dict[str, Dict]] = None
+        self._indexed_hash_by_uri: Dict[str, str] = {}
+        self._claimed: Dict[str, Dict] = {}
+        # The stored index as loaded, and its generation
+        self._stored: Dict[str, Dict] = {}
+        self._generation = 0
+        # Content hash -> source URI of stored entries that no longer hold in the corpus
+        self._stale: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _read_index(self) -> Tuple[Dict[str, Dict], int]:
+        """Read the stored index's hashes and the GCS generation they were read at (0 if none)."""
+        # A new blob for every read: a blob that knows a generation downloads that generation
+        blob = self.bucket.blob(content_index_blob_name(self.base_prefix, self.corpus_resource_name))
+        try:
+            data = resilient_call(
+                "gcs.download_as_bytes", lambda: blob.download_as_bytes(timeout=gcs_timeout()), timed=True
+            )
+        except NotFound:
+            return {}, 0
+        try:
+            index = json.loads(data)
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable content index {blob.name}: {e}")
+            return {}, blob.generation
+        if index.get("version") != CONTENT_INDEX_VERSION:
+            logger.warning(f"Ignoring content index {blob.name} with unsupported version")
+            return {}, blob.generation
+        return index.get("hashes", {}), blob.generation
+
+    def _load_index(self) -> Dict[str, Dict]:
+        self._stored, self._generation = self._read_index()
+        hashes = self._stored
+        if hashes:
+            rag_files = resilient_call(
+                "rag.list_files", lambda: list(rag.list_files(self.corpus_resource_name))
+            )
+            present_uris = {get_rag_file_source_uri(rag_file) for rag_file in rag_files}
+            hashes = {h: entry for h, entry in hashes.items() if entry["source_uri"] in present_uris}
+            self._stale.update(
+                {h: entry["source_uri"] for h, entry in self._stored.items() if h not in hashes}
+            )
+        return dict(hashes)
+
+    def _ensure_loaded(self) -> None:
+        if self._indexed is None:
+            self._indexed = self._load_index()
+            self._indexed_hash_by_uri = {entry["source_uri"]: h for h, entry in self._indexed.items()}
+
+    def _forget(self, content_hash: str) -> None:
+        entry = self._indexed.pop(content_hash, None)
+        if entry:
+            self._stale[content_hash] = entry["source_uri"]
+
+    def claim(
+        self,
+        content_hash: Optional[str],
+        size: int,
+        source_uri: str,
+        allow_reimport: bool = True,
+    ) -> Optional[str]:
+        """
+        Register a file about to be imported.
+
+        Args:
+            content_hash (Optional[str]): The file's MD5 digest; None is never deduplicated
+            size (int): The file size in bytes
+            source_uri (str): The URI the file will be imported from
+            allow_reimport (bool): Whether a file already in the corpus under the same URI
+                                   is imported again rather than skipped; False for
+                                   URIs naming their content's hash, whose file in
+                                   the corpus is already up to date
+
+        Returns:
+            Optional[str]: The URI already holding the same content if the file is a
+                           duplicate and should be skipped, otherwise None
+        """
+        if content_hash is None:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            claimed = self._claimed.get(content_hash)
+            indexed = self._indexed.get(content_hash)
+            holder = claimed or indexed
+            if holder and (holder["source_uri"] != source_uri or claimed or not allow_reimport):
+                self.deduplicated_files += 1
+                self.deduplicated_bytes += size
+                return holder["source_uri"]
+            self._claimed[content_hash] = {"source_uri": source_uri, "size": size}
+            # A re-imported URI holds new content: forget what it held before
+            previous_hash = self._indexed_hash_by_uri.pop(source_uri, None)
+            if previous_hash and previous_hash != content_hash:
+                self._forget(previous_hash)
+            return None
+
+    def release(self, source_uri: str) -> None:
+        """Forget the content held by a corpus file that this ingest deletes."""
+        with self._lock:
+            self._ensure_loaded()
+            content_hash = self._indexed_hash_by_uri.pop(source_uri, None)
+            if content_hash:
+                self._forget(content_hash)
+
+    @property
+    def has_claims(self) -> bool:
+        return bool(self._claimed)
+
+    def save(self, present_uris: Set[str]) -> None:
+        """
+        Persist the content index with the files claimed by this ingest.
+
+        Only this ingest's changes are applied to the stored index: if another ingest
+        saved it since it was loaded, it is read again and the changes merged into it.
+
+        Args:
+            present_uris (Set[str]): Source URIs of the corpus files after the import;
+                                     claims whose file did not make it are left out
+        """
+        with self._lock:
+            claimed = {h: entry for h, entry in self._claimed.items() if entry["source_uri"] in present_uris}
+            stale = dict(self._stale)
+            loaded = self._indexed is not None
+            stored, generation = self._stored, self._generation
+
+        for attempt in range(1, STAGING_METADATA_WRITE_MAX_ATTEMPTS + 1):
+            if not loaded or attempt > 1:
+                stored, generation = self._read_index()
+            hashes = {h: entry for h, entry in stored.items() if stale.get(h) != entry["source_uri"]}
+            hashes.update(claimed)
+            index = {
+                "version": CONTENT_INDEX_VERSION,
+                "corpus": self.corpus_resource_name,
+                "hashes": hashes,
+            }
+            blob = self.bucket.blob(content_index_blob_name(self.base_prefix, self.corpus_resource_name))
+            try:
+                resilient_call(
+                    "gcs.upload_from_string",
+                    lambda: blob.upload_from_string(
+                        json.dumps(index, sort_keys=True),
+                        content_type="application/json",
+                        if_generation_match=generation,
+                        timeout=gcs_timeout(),
+                    ),
+                    timed=True,
+                )
+                break
+            except PreconditionFailed:
+                if attempt == STAGING_METADATA_WRITE_MAX_ATTEMPTS:
+                    raise
+                logger.info(f"Content index {blob.name} changed while being saved; merging again.")
+        logger.info(f"Saved content index of {self.corpus_resource_name} with {len(hashes)} hash(es).")
@@ -0,0 +1,194 @@
+"""
+Token-budgeted packing of retrieved contexts before they reach the LLM prompt.
+
+Retrieved chunks repeat text: consecutive chunks of a document share DEFAULT_CHUNK_OVERLAP
+tokens, and the same passage can come back from several sources or retrieval paths.
+pack_results, applied in rank order:
+1. merges chunks of the same source_uri that overlap (or where one contains the other),
+   keeping the shared text once,
+2. drops contexts whose word shingles mostly already appear in a better-ranked one,
+3. keeps contexts until CONTEXT_TOKEN_BUDGET estimated tokens are used, truncating the
+   last one at a word boundary when enough budget is left for it to be useful.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..config import (
+    CONTEXT_MIN_OVERLAP_WORDS,
+    CONTEXT_MIN_TRUNCATED_TOKENS,
+    CONTEXT_NEAR_DUPLICATE_THRESHOLD,
+    CONTEXT_SHINGLE_SIZE,
+    CONTEXT_TOKEN_BUDGET,
+)
+from .chunking import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text)
+
+
+def _overlap_words(first: List[str], second: List[str]) -> int:
+    """Length of the longest suffix of `first` that is a prefix of `second`, in words."""
+    if len(first) < CONTEXT_MIN_OVERLAP_WORDS or len(second) < CONTEXT_MIN_OVERLAP_WORDS:
+        return 0
+    head = second[:CONTEXT_MIN_OVERLAP_WORDS]
+    for start in range(max(0, len(first) - len(second)), len(first) - CONTEXT_MIN_OVERLAP_WORDS + 1):
+        if first[start : start + CONTEXT_MIN_OVERLAP_WORDS] == head:
+            length = len(first) - start
+            if first[start:] == second[:length]:
+                return length
+    return 0
+
+
+def _contains(outer: List[str], inner: List[str]) -> bool:
+    """Whether `inner` appears as a contiguous word sequence of `outer`."""
+    if not inner or len(inner) > len(outer):
+        return False
+    first = inner[0]
+    return any(
+        outer[start] == first and outer[start : start + len(inner)] == inner
+        for start in range(len(outer) - len(inner) + 1)
+    )
+
+
+def _append_after_words(first_text: str, second_text: str, skip_words: int) -> str:
+    """Append `second_text` to `first_text`, without its first `skip_words` words."""
+    matches = list(_WORD_PATTERN.finditer(second_text))
+    if skip_words >= len(matches):
+        return first_text
+    return first_text + second_text[matches[skip_words - 1].end() :]
+
+
+def _merge_into(target: Dict, other: Dict, text: str) -> None:
+    """Fold `other` into `target` (the better-ranked context), with the merged text."""
+    target["text"] = text
+    target["merged_chunks"] = target.get("merged_chunks", 1) + other.get("merged_chunks", 1)
+    if other.get("score") is not None and (
+        target.get("score") is None or other["score"] < target["score"]
+    ):
+        target["score"] = other["score"]
+    if "fusion_score" in other:
+        target["fusion_score"] = max(target.get("fusion_score", 0.0), other["fusion_score"])
+
+
+def _try_merge(target: Dict, other: Dict) -> bool:
+    """Merge two contexts of the same source if they overlap or one contains the other."""
+    target_words = _words(target["text"])
+    other_words = _words(other["text"])
+    if _contains(target_words, other_words):
+        _merge_into(target, other, target["text"])
+        return True
+    if _contains(other_words, target_words):
+        _merge_into(target, other, other["text"])
+        return True
+    overlap = _overlap_words(target_words, other_words)
+    if overlap:
+        _merge_into(target, other, _append_after_words(target["text"], other["text"], overlap))
+        return True
+    overlap = _overlap_words(other_words, target_words)
+    if overlap:
+        _merge_into(target, other, _append_after_words(other["text"], target["text"], overlap))
+        return True
+    return False
+
+
+def word_shingles(text: str) -> Set[Tuple[str, ...]]:
+    """Return the lowercased runs of CONTEXT_SHINGLE_SIZE consecutive words of a text."""
+    words = [word.lower() for word in _words(text)]
+    if len(words) <= CONTEXT_SHINGLE_SIZE:
+        return {tuple(words)}
+    return {tuple(words[i : i + CONTEXT_SHINGLE_SIZE]) for i in range(len(words) - CONTEXT_SHINGLE_SIZE + 1)}
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text at the last word boundary that keeps it within max_tokens."""
+    matches = list(_WORD_PATTERN.finditer(text))
+    low, high = 0, len(matches)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[: matches[middle - 1].end()]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[: matches[low - 1].end()] if low else ""
+
+
+def pack_results(
+    results: List[Dict], token_budget: Optional[int] = None
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Merge, deduplicate and budget retrieved contexts, preserving their rank order.
+
+    Args:
+        results (List[Dict]): Processed rag_query results, best first
+        token_budget (Optional[int]): Maximum estimated tokens of context text
+                                      (CONTEXT_TOKEN_BUDGET if None, 0 for no limit)
+
+    Returns:
+        Tuple[List[Dict], Dict[str, int]]: The packed results and packing statistics
+    """
+    budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    stats = {
+        "contexts_in": len(results),
+        "tokens_in": sum(estimate_tokens(result.get("text", "")) for result in results),
+        "merged": 0,
+        "near_duplicates_dropped": 0,
+        "dropped_over_budget": 0,
+        "truncated": 0,
+    }
+
+    # 1. Merge overlapping chunks of the same source into the best-ranked one
+    packed: List[Dict] = []
+    for result in results:
+        result = dict(result)
+        merged = False
+        for kept in packed:
+            if kept.get("source_uri") == result.get("source_uri") and _try_merge(kept, result):
+                stats["merged"] += 1
+                merged = True
+                break
+        if not merged:
+            packed.append(result)
+
+    # 2. Drop near-duplicates of better-ranked contexts
+    deduplicated: List[Dict] = []
+    kept_shingles: List[Set[Tuple[str, ...]]] = []
+    for result in packed:
+        shingles = word_shingles(result.get("text", ""))
+        if any(
+            len(shingles & other) / (len(shingles) or 1) >= CONTEXT_NEAR_DUPLICATE_THRESHOLD
+            for other in kept_shingles
+        ):
+            stats["near_duplicates_dropped"] += 1
+            continue
+        deduplicated.append(result)
+        kept_shingles.append(shingles)
+
+    # 3. Fit the token budget, in rank order
+    final: List[Dict] = []
+    used = 0
+    for result in deduplicated:
+        tokens = estimate_tokens(result.get("text", ""))
+        if not budget or used + tokens <= budget:
+            final.append(result)
+            used += tokens
+            continue
+        remaining = budget - used
+        if remaining >= CONTEXT_MIN_TRUNCATED_TOKENS:
+            result["text"] = _truncate_to_tokens(result["text"], remaining)
+            result["truncated"] = True
+            final.append(result)
+            used += estimate_tokens(result["text"])
+            stats["truncated"] += 1
+        else:
+            stats["dropped_over_budget"] += 1
+
+    stats["contexts_out"] = len(final)
+    stats["tokens_out"] = used
+    return final, stats
@@ -0,0 +1,49 @@
+"""
+Corpus change notifications.
+
+Tools that change a corpus' content (add_data, delete_document, delete_corpus) call
+notify_corpus_changed once; every local structure derived from a corpus (retrieval
+cache, local indexes) registers a listener here instead of being invalidated by hand
+at each call site.
+"""
+
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+CorpusChangeListener = Callable[[str, bool], None]
+
+_listeners: List[CorpusChangeListener] = []
+_listeners_lock = threading.Lock()
+
+
+def on_corpus_changed(listener: CorpusChangeListener) -> CorpusChangeListener:
+    """
+    Register a listener called as listener(corpus_resource_name, deleted).
+
+    Usable as a decorator; returns the listener unchanged.
+    """
+    with _listeners_lock:
+        _listeners.append(listener)
+    return listener
+
+
+def notify_corpus_changed(corpus_resource_name: str, deleted: bool = False) -> None:
+    """
+    Notify every listener that a corpus' content changed, or that it was deleted.
+
+    A failing listener is logged and does not prevent the others from running.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        deleted (bool): Whether the corpus itself was deleted
+    """
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(corpus_resource_name, deleted)
+        except Exception as e:
+            logger.warning(f"Corpus change listener {listener!r} failed for {corpus_resource_name}: {e}")
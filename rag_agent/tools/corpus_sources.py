@@ -0,0 +1,97 @@
+"""
+Access to a corpus' source documents, for indexes built locally from them.
+
+The RAG engine does not expose the chunks it stores, so local indexes (vector and
+lexical) read the GCS source files the corpus was imported from and chunk them with
+chunking.chunk_text.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+from vertexai import rag
+
+from ..config import (
+    LOCAL_INDEX_DOWNLOAD_CONCURRENCY,
+    LOCAL_INDEX_MAX_FILE_SIZE_BYTES,
+)
+from .clients import get_storage_client
+from .resilience import gcs_timeout, resilient_call
+from .utils import get_rag_file_source_uri
+
+logger = logging.getLogger(__name__)
+
+
+class IndexUnavailable(Exception):
+    """Raised when a corpus cannot be served from a local index."""
+
+
+def list_source_files(corpus_resource_name: str) -> Dict[str, Dict]:
+    """
+    List a corpus' files with the metadata local indexes track.
+
+    Returns:
+        Dict[str, Dict]: file_id -> {"update_time", "source_uri", "source_name"}
+
+    Raises:
+        IndexUnavailable: If a file was not imported from GCS
+    """
+    rag_files = resilient_call("rag.list_files", lambda: list(rag.list_files(corpus_resource_name)))
+
+    files: Dict[str, Dict] = {}
+    for rag_file in rag_files:
+        source_uri = get_rag_file_source_uri(rag_file)
+        if not source_uri.startswith("gs://"):
+            raise IndexUnavailable(
+                f"File {rag_file.name} has no GCS source and cannot be indexed locally"
+            )
+        files[rag_file.name.split("/")[-1]] = {
+            "update_time": str(getattr(rag_file, "update_time", "")),
+            "source_uri": source_uri,
+            "source_name": getattr(rag_file, "display_name", "") or "",
+        }
+    return files
+
+
+def download_source_text(source_uri: str) -> str:
+    """
+    Download a gs:// source file and decode it as text.
+
+    Raises:
+        IndexUnavailable: If the file is too large or not UTF-8 text
+    """
+    bucket_name, _, blob_name = source_uri[len("gs://") :].partition("/")
+    blob = get_storage_client().bucket(bucket_name).blob(blob_name)
+    data = resilient_call("gcs.download_as_bytes", lambda: blob.download_as_bytes(timeout=gcs_timeout()), timed=True)
+    if len(data) > LOCAL_INDEX_MAX_FILE_SIZE_BYTES:
+        raise IndexUnavailable(f"{source_uri} is larger than {LOCAL_INDEX_MAX_FILE_SIZE_BYTES} bytes")
+    if b"\0" in data:
+        raise IndexUnavailable(f"{source_uri} is not a text file")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        raise IndexUnavailable(f"{source_uri} is not UTF-8 text")
+
+
+def download_source_texts(files: Dict[str, Dict], file_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Download the source text of several files concurrently.
+
+    Args:
+        files (Dict[str, Dict]): Files as returned by list_source_files
+        file_ids (Iterable[str]): The files to download
+
+    Returns:
+        Dict[str, str]: file_id -> text
+    """
+    file_ids = list(file_ids)
+    if not file_ids:
+        return {}
+    with ThreadPoolExecutor(
+        max_workers=min(len(file_ids), LOCAL_INDEX_DOWNLOAD_CONCURRENCY)
+    ) as executor:
+        texts = executor.map(
+            lambda file_id: download_source_text(files[file_id]["source_uri"]), file_ids
+        )
+        return dict(zip(file_ids, texts))
@@ -10,9 +10,12 @@ from vertexai import rag
 from ..config import (
     DEFAULT_EMBEDDING_MODEL,
 )
-from .utils import check_corpus_exists
+from .resilience import resilient_call
+from .telemetry import instrument_tool
+from .utils import check_corpus_exists, invalidate_corpus_catalog
 
 
+@instrument_tool
 def create_corpus(
     corpus_name: str,
     tool_context: ToolContext,
@@ -47,14 +50,21 @@ def create_corpus(
             )
         )
 
-        # Create the corpus
-        rag_corpus = rag.create_corpus(
-            display_name=display_name,
-            backend_config=rag.RagVectorDbConfig(
-                rag_embedding_model_config=embedding_model_config
+        # Create the corpus (not retried: a retry could create it twice)
+        rag_corpus = resilient_call(
+            "rag.create_corpus",
+            lambda: rag.create_corpus(
+                display_name=display_name,
+                backend_config=rag.RagVectorDbConfig(
+                    rag_embedding_model_config=embedding_model_config
+                ),
             ),
+            retry=False,
         )
 
+        # The cached corpus catalog no longer reflects the remote listing
+        invalidate_corpus_catalog()
+
         # Update state to track corpus existence
         tool_context.state[f"corpus_exists_{corpus_name}"] = True
 
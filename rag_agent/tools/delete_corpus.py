@@ -5,9 +5,17 @@ Tool for deleting a Vertex AI RAG corpus when it's no longer needed.
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
-from .utils import check_corpus_exists, get_corpus_resource_name
+from .corpus_events import notify_corpus_changed
+from .resilience import resilient_call
+from .telemetry import instrument_tool
+from .utils import (
+    check_corpus_exists,
+    get_corpus_resource_name,
+    invalidate_corpus_catalog,
+)
 
 
+@instrument_tool
 def delete_corpus(
     corpus_name: str,
     confirm: bool,
@@ -47,7 +55,11 @@ def delete_corpus(
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
         # Delete the corpus
-        rag.delete_corpus(corpus_resource_name)
+        resilient_call("rag.delete_corpus", lambda: rag.delete_corpus(corpus_resource_name))
+
+        # The cached corpus catalog no longer reflects the remote listing
+        invalidate_corpus_catalog()
+        notify_corpus_changed(corpus_resource_name, deleted=True)
 
         # Remove from state by setting to False
         state_key = f"corpus_exists_{corpus_name}"
@@ -1,58 +1,220 @@
 """
-Tool for deleting a specific document from a Vertex AI RAG corpus.
+Tool for deleting documents from a Vertex AI RAG corpus.
+
+Documents are selected by ID, by source URI prefix or glob, or by the GitHub repository
+they were ingested from. The targets are resolved once (with at most one file listing)
+and deleted concurrently, so cleaning up a whole source takes a single tool call.
 """
 
+import contextvars
+import fnmatch
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
 from google.adk.tools.tool_context import ToolContext
+from google.api_core.exceptions import NotFound
 from vertexai import rag
 
-from .utils import check_corpus_exists, get_corpus_resource_name
+from ..config import DELETE_DOCUMENT_MAX_REPORTED_IDS, DELETE_DOCUMENT_MAX_WORKERS
+from .add_data import TEMP_GCS_BUCKET_NAME, TEMP_GCS_PREFIX
+from .clients import get_storage_client
+from .corpus_events import notify_corpus_changed
+from .ingest_manifest import load_corpus_manifests, load_manifest, update_manifest
+from .resilience import resilient_call
+from .telemetry import instrument_tool
+from .utils import check_corpus_exists, get_corpus_resource_name, get_rag_file_source_uri
+
+logger = logging.getLogger(__name__)
+
+# Outcome of deleting a file that does not exist
+_NOT_FOUND = "not found"
+
+
+def _match_source_uris(corpus_resource_name: str, source_uri_prefix: str, source_uri_glob: str) -> List[str]:
+    """Return the IDs of the corpus files whose source URI matches the prefix and the glob."""
+    rag_files = resilient_call("rag.list_files", lambda: list(rag.list_files(corpus_resource_name)))
+    file_ids = []
+    for rag_file in rag_files:
+        source_uri = get_rag_file_source_uri(rag_file)
+        if source_uri_prefix and not source_uri.startswith(source_uri_prefix):
+            continue
+        if source_uri_glob and not fnmatch.fnmatchcase(source_uri, source_uri_glob):
+            continue
+        file_ids.append(rag_file.name.split("/")[-1])
+    return file_ids
+
+
+def _delete_files(
+    corpus_resource_name: str, file_ids: List[str]
+) -> Tuple[List[str], List[str], Dict[str, str]]:
+    """
+    Delete RAG files concurrently, with at most DELETE_DOCUMENT_MAX_WORKERS in flight.
+
+    Returns:
+        Tuple[List[str], List[str], Dict[str, str]]: The IDs of the deleted files, the
+                                                     IDs of files that did not exist, and
+                                                     the error of each file that could
+                                                     not be deleted
+    """
+
+    def delete(file_id: str) -> Optional[str]:
+        rag_file_name = f"{corpus_resource_name}/ragFiles/{file_id}"
+        try:
+            resilient_call("rag.delete_file", lambda: rag.delete_file(rag_file_name))
+        except NotFound:
+            return _NOT_FOUND
+        except Exception as e:
+            return str(e)
+        return None
+
+    with ThreadPoolExecutor(
+        max_workers=min(DELETE_DOCUMENT_MAX_WORKERS, max(1, len(file_ids))), thread_name_prefix="delete-document"
+    ) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, delete, file_id) for file_id in file_ids]
+        errors = [future.result() for future in futures]
 
+    deleted = [file_id for file_id, error in zip(file_ids, errors) if error is None]
+    not_found = [file_id for file_id, error in zip(file_ids, errors) if error is _NOT_FOUND]
+    failed = {
+        file_id: error
+        for file_id, error in zip(file_ids, errors)
+        if error is not None and error is not _NOT_FOUND
+    }
+    return deleted, not_found, failed
+
+
+def _forget_deleted_files(corpus_resource_name: str, file_ids: Set[str]) -> None:
+    """
+    Drop deleted RAG files from the corpus' GitHub ingest manifests, so the next ingest
+    of their repository imports them again; manifests left empty are deleted.
+    """
 
+    def forget(manifest: Dict) -> None:
+        manifest["files"] = {
+            path: entry for path, entry in manifest["files"].items() if entry.get("rag_file_id") not in file_ids
+        }
+
+    try:
+        bucket = get_storage_client().bucket(TEMP_GCS_BUCKET_NAME)
+        for manifest in load_corpus_manifests(bucket, TEMP_GCS_PREFIX, corpus_resource_name):
+            if any(entry.get("rag_file_id") in file_ids for entry in manifest["files"].values()):
+                update_manifest(bucket, TEMP_GCS_PREFIX, corpus_resource_name, manifest["repo_url"], forget)
+    except Exception as e:
+        logger.warning(f"Could not update the ingest manifests of {corpus_resource_name}: {e}")
+
+
+@instrument_tool
 def delete_document(
     corpus_name: str,
     document_id: str,
     tool_context: ToolContext,
+    document_ids: Optional[List[str]] = None,
+    source_uri_prefix: str = "",
+    source_uri_glob: str = "",
+    repo_url: str = "",
 ) -> dict:
     """
-    Delete a specific document from a Vertex AI RAG corpus.
+    Delete documents from a Vertex AI RAG corpus: a single one, a list of them, every
+    document whose source URI matches a prefix and/or glob, or every document ingested
+    from a GitHub repository. Documents matched by several selectors are deleted once.
 
     Args:
-        corpus_name (str): The full resource name of the corpus containing the document.
+        corpus_name (str): The full resource name of the corpus containing the documents.
                           Preferably use the resource_name from list_corpora results.
-        document_id (str): The ID of the specific document/file to delete. This can be
-                          obtained from get_corpus_info results.
+        document_id (str): The ID of a single document/file to delete, as returned by
+                          get_corpus_info. Leave empty when using the other selectors.
         tool_context (ToolContext): The tool context
+        document_ids (Optional[List[str]]): IDs of several documents to delete
+        source_uri_prefix (str): Delete every document whose source URI starts with this
+                                 prefix, e.g. "gs://bucket/reports/2023/"
+        source_uri_glob (str): Delete every document whose source URI matches this glob
+                               ("*" also matches "/"), e.g. "gs://bucket/*.tmp"; combined
+                               with source_uri_prefix, documents must match both
+        repo_url (str): Delete every document ingested from this GitHub repository, and
+                        forget the repository's ingest state so a later add_data
+                        ingests it from scratch
 
     Returns:
-        dict: Status information about the deletion operation
+        dict: Status information about the deletion, with the deleted document IDs and
+              the error of each document that could not be deleted
     """
+    document_ids = [file_id for file_id in [document_id, *(document_ids or [])] if file_id]
+    response = {
+        "corpus_name": corpus_name,
+        "document_id": document_id,
+    }
+
     # Check if corpus exists
     if not check_corpus_exists(corpus_name, tool_context):
+        return {**response, "status": "error", "message": f"Corpus '{corpus_name}' does not exist"}
+
+    if not (document_ids or source_uri_prefix or source_uri_glob or repo_url):
         return {
+            **response,
             "status": "error",
-            "message": f"Corpus '{corpus_name}' does not exist",
-            "corpus_name": corpus_name,
-            "document_id": document_id,
+            "message": "Specify the documents to delete: document_id, document_ids, "
+            "source_uri_prefix, source_uri_glob or repo_url.",
         }
 
     try:
         # Get the corpus resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
-        # Delete the document
-        rag_file_path = f"{corpus_resource_name}/ragFiles/{document_id}"
-        rag.delete_file(rag_file_path)
+        # Resolve every selector to file IDs before deleting anything
+        targets = dict.fromkeys(document_ids)
+        if source_uri_prefix or source_uri_glob:
+            targets.update(dict.fromkeys(_match_source_uris(corpus_resource_name, source_uri_prefix, source_uri_glob)))
+        if repo_url:
+            bucket = get_storage_client().bucket(TEMP_GCS_BUCKET_NAME)
+            manifest = load_manifest(bucket, TEMP_GCS_PREFIX, corpus_resource_name, repo_url)
+            targets.update(
+                dict.fromkeys(entry["rag_file_id"] for entry in manifest["files"].values() if entry.get("rag_file_id"))
+            )
 
-        return {
-            "status": "success",
-            "message": f"Successfully deleted document '{document_id}' from corpus '{corpus_name}'",
-            "corpus_name": corpus_name,
-            "document_id": document_id,
-        }
+        deleted, not_found, failed = _delete_files(corpus_resource_name, list(targets))
+        if deleted:
+            notify_corpus_changed(corpus_resource_name)
     except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Error deleting document: {str(e)}",
-            "corpus_name": corpus_name,
-            "document_id": document_id,
-        }
+        return {**response, "status": "error", "message": f"Error deleting documents: {str(e)}"}
+
+    if deleted or not_found:
+        _forget_deleted_files(corpus_resource_name, set(deleted + not_found))
+    if failed:
+        logger.warning(f"Could not delete {len(failed)} of {len(targets)} document(s) from {corpus_resource_name}")
+
+    if document_id and len(targets) == 1:
+        # A single document: keep the plain answer of a one-document deletion
+        if deleted:
+            return {
+                **response,
+                "status": "success",
+                "message": f"Successfully deleted document '{document_id}' from corpus '{corpus_name}'",
+            }
+        error = "not found" if not_found else failed[document_id]
+        return {**response, "status": "error", "message": f"Error deleting document: {error}"}
+
+    if not targets:
+        status, message = "warning", f"No documents of corpus '{corpus_name}' matched"
+    elif failed and not deleted:
+        status, message = "error", f"Could not delete any of the {len(targets)} document(s) from corpus '{corpus_name}'"
+    else:
+        status = "success"
+        message = f"Deleted {len(deleted)} of {len(targets)} document(s) from corpus '{corpus_name}'"
+        if not_found:
+            message += f"; {len(not_found)} no longer existed"
+        if failed:
+            message += f"; {len(failed)} could not be deleted"
+
+    return {
+        **response,
+        "status": status,
+        "message": message,
+        "matched_count": len(targets),
+        "deleted_count": len(deleted),
+        "not_found_count": len(not_found),
+        "failed_count": len(failed),
+        # Long lists are truncated, their counts above are exact
+        "deleted_document_ids": deleted[:DELETE_DOCUMENT_MAX_REPORTED_IDS],
+        "failed": dict(list(failed.items())[:DELETE_DOCUMENT_MAX_REPORTED_IDS]),
+    }
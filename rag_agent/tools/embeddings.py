@@ -0,0 +1,137 @@
+"""
+Text embeddings with the corpora's embedding model, for local retrieval.
+
+Uses the same model as the RAG corpora (DEFAULT_EMBEDDING_MODEL) so local vectors are
+comparable with the remote index. Query embeddings are cached, since agents tend to
+repeat and rephrase the same questions. Requests are paced by the embedding governor,
+as they share the model quota with corpus imports.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ..config import (
+    DEFAULT_EMBEDDING_MODEL,
+    EMBEDDING_BATCH_MAX_TEXTS,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    QUERY_EMBEDDING_CACHE_SIZE,
+)
+from .chunking import estimate_tokens
+from .rate_governor import embedding_governor, is_quota_error
+from .retrieval_cache import normalize_query
+from .resilience import resilient_call
+from .utils import ensure_vertexai_initialized
+
+if TYPE_CHECKING:
+    from vertexai.language_models import TextEmbeddingModel
+
+logger = logging.getLogger(__name__)
+
+_model: Optional["TextEmbeddingModel"] = None
+_model_lock = threading.Lock()
+
+_query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+# Queries being embedded right now, so concurrent lookups (e.g. a multi-corpus
+# rag_query) share one request
+_query_inflight: Dict[str, Future] = {}
+_query_cache_lock = threading.Lock()
+
+
+def _get_model() -> "TextEmbeddingModel":
+    """Load the embedding model once per process."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from vertexai.language_models import TextEmbeddingModel
+
+                ensure_vertexai_initialized()
+                _model = TextEmbeddingModel.from_pretrained(DEFAULT_EMBEDDING_MODEL.split("/")[-1])
+    return _model
+
+
+def embed_texts(texts: List[str], task_type: str = "RETRIEVAL_DOCUMENT") -> List[List[float]]:
+    """
+    Embed texts in as few requests as the model's per-request limits allow.
+
+    Args:
+        texts (List[str]): The texts to embed
+        task_type (str): The embedding task type ("RETRIEVAL_DOCUMENT" or "RETRIEVAL_QUERY")
+
+    Returns:
+        List[List[float]]: One embedding per text, in order
+    """
+    from vertexai.language_models import TextEmbeddingInput
+
+    model = _get_model()
+    embeddings: List[List[float]] = []
+    batch: List[str] = []
+    batch_tokens = 0
+
+    def flush() -> None:
+        if not batch:
+            return
+        embedding_governor.acquire()
+        try:
+            response = resilient_call(
+                "embeddings.get_embeddings",
+                lambda: model.get_embeddings(
+                    [TextEmbeddingInput(text=text, task_type=task_type) for text in batch]
+                ),
+            )
+        except Exception as e:
+            if is_quota_error(e):
+                embedding_governor.report_throttled()
+            raise
+        embeddings.extend(embedding.values for embedding in response)
+        batch.clear()
+
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and (
+            len(batch) >= EMBEDDING_BATCH_MAX_TEXTS
+            or batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS
+        ):
+            flush()
+            batch_tokens = 0
+        batch.append(text)
+        batch_tokens += tokens
+    flush()
+    return embeddings
+
+
+def embed_query(query: str) -> List[float]:
+    """Embed a retrieval query, reusing the embedding of an identical earlier query."""
+    key = normalize_query(query)
+    with _query_cache_lock:
+        cached = _query_cache.get(key)
+        if cached is not None:
+            _query_cache.move_to_end(key)
+            return cached
+        inflight = _query_inflight.get(key)
+        if inflight is None:
+            inflight = _query_inflight[key] = Future()
+            owner = True
+        else:
+            owner = False
+
+    if not owner:
+        return inflight.result()
+
+    try:
+        embedding = embed_texts([query], task_type="RETRIEVAL_QUERY")[0]
+    except Exception as e:
+        with _query_cache_lock:
+            del _query_inflight[key]
+        inflight.set_exception(e)
+        raise
+    with _query_cache_lock:
+        _query_cache[key] = embedding
+        while len(_query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+        del _query_inflight[key]
+    inflight.set_result(embedding)
+    return embedding
@@ -2,23 +2,67 @@
 Tool for retrieving detailed information about a specific RAG corpus.
 """
 
+from typing import Callable, Dict, List, Optional, Tuple
+
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
-from .utils import check_corpus_exists, get_corpus_resource_name
+from ..config import (
+    CORPUS_INFO_DEFAULT_FIELDS,
+    CORPUS_INFO_DEFAULT_PAGE_SIZE,
+    CORPUS_INFO_MAX_PAGE_SIZE,
+)
+from .resilience import resilient_call
+from .telemetry import instrument_tool
+from .utils import check_corpus_exists, get_corpus_resource_name, get_rag_file_source_uri
+
+# Extractors for every field that can be projected into the file listing
+_FILE_FIELDS: Dict[str, Callable] = {
+    "file_id": lambda rag_file: rag_file.name.split("/")[-1],
+    "display_name": lambda rag_file: getattr(rag_file, "display_name", "") or "",
+    "description": lambda rag_file: getattr(rag_file, "description", "") or "",
+    "source_uri": get_rag_file_source_uri,
+    "create_time": lambda rag_file: (
+        str(rag_file.create_time) if hasattr(rag_file, "create_time") else ""
+    ),
+    "update_time": lambda rag_file: (
+        str(rag_file.update_time) if hasattr(rag_file, "update_time") else ""
+    ),
+    "state": lambda rag_file: (
+        str(rag_file.file_status.state)
+        if getattr(rag_file, "file_status", None) is not None
+        else ""
+    ),
+}
 
 
+@instrument_tool
 def get_corpus_info(
     corpus_name: str,
     tool_context: ToolContext,
+    page_size: int = CORPUS_INFO_DEFAULT_PAGE_SIZE,
+    page_token: str = "",
+    summary_only: bool = False,
+    fields: Optional[List[str]] = None,
+    source_uri_prefix: str = "",
 ) -> dict:
     """
     Get detailed information about a specific RAG corpus, including its files.
+    Files are returned one page at a time; pass the returned next_page_token to get the next page.
+    file_count is the number of files in the corpus (under source_uri_prefix, if given),
+    page_file_count the number of files in this page.
 
     Args:
         corpus_name (str): The full resource name of the corpus to get information about.
                            Preferably use the resource_name from list_corpora results.
         tool_context (ToolContext): The tool context
+        page_size (int): Maximum number of files to return (default 100, max 1000)
+        page_token (str): The next_page_token of a previous call, to continue the listing
+        summary_only (bool): If True, only count the files instead of listing them
+        fields (Optional[List[str]]): File fields to return, any of file_id, display_name,
+                           description, source_uri, create_time, update_time, state.
+                           Defaults to file_id, display_name, source_uri, create_time, update_time.
+        source_uri_prefix (str): Only include files whose source URI starts with this prefix
 
     Returns:
         dict: Information about the corpus and its files
@@ -32,63 +76,84 @@ def get_corpus_info(
                 "corpus_name": corpus_name,
             }
 
+        fields = fields or CORPUS_INFO_DEFAULT_FIELDS
+        unknown_fields = [field for field in fields if field not in _FILE_FIELDS]
+        if unknown_fields:
+            return {
+                "status": "error",
+                "message": f"Unknown fields {unknown_fields}. Supported fields: {sorted(_FILE_FIELDS)}",
+                "corpus_name": corpus_name,
+            }
+
         # Get the corpus resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
         # Try to get corpus details first
         corpus_display_name = corpus_name  # Default if we can't get actual display name
 
-        # Process file information
+        if summary_only:
+            return _summarize_files(
+                corpus_name, corpus_resource_name, corpus_display_name, source_uri_prefix
+            )
+
+        page_size = max(1, min(page_size, CORPUS_INFO_MAX_PAGE_SIZE))
+
+        # Fill the page from as many listing pages as the source_uri_prefix filter needs
         file_details = []
+        next_page_token = page_token
         try:
-            # Get the list of files
-            files = rag.list_files(corpus_resource_name)
-            for rag_file in files:
-                # Get document specific details
-                try:
-                    # Extract the file ID from the name
-                    file_id = rag_file.name.split("/")[-1]
-
-                    file_info = {
-                        "file_id": file_id,
-                        "display_name": (
-                            rag_file.display_name
-                            if hasattr(rag_file, "display_name")
-                            else ""
-                        ),
-                        "source_uri": (
-                            rag_file.source_uri
-                            if hasattr(rag_file, "source_uri")
-                            else ""
-                        ),
-                        "create_time": (
-                            str(rag_file.create_time)
-                            if hasattr(rag_file, "create_time")
-                            else ""
-                        ),
-                        "update_time": (
-                            str(rag_file.update_time)
-                            if hasattr(rag_file, "update_time")
-                            else ""
-                        ),
-                    }
-
-                    file_details.append(file_info)
-                except Exception:
-                    # Continue to the next file
-                    continue
+            while True:
+                pager = resilient_call(
+                    "rag.list_files",
+                    lambda: rag.list_files(
+                        corpus_resource_name,
+                        page_size=page_size,
+                        page_token=next_page_token or None,
+                    ),
+                )
+                matching = [
+                    rag_file
+                    for rag_file in pager.rag_files
+                    if not source_uri_prefix or get_rag_file_source_uri(rag_file).startswith(source_uri_prefix)
+                ]
+                if file_details and len(file_details) + len(matching) > page_size:
+                    # The page is full: this listing page is listed again by the next call
+                    break
+                for rag_file in matching:
+                    # Get document specific details
+                    try:
+                        file_details.append(
+                            {field: _FILE_FIELDS[field](rag_file) for field in fields}
+                        )
+                    except Exception:
+                        # Continue to the next file
+                        continue
+                next_page_token = pager.next_page_token or ""
+                if not next_page_token or len(file_details) >= page_size:
+                    break
         except Exception:
-            # Continue without file details
+            # Continue without (further) file details
             pass
 
+        # file_count keeps counting every file, not just this page's
+        if not page_token and not next_page_token:
+            file_count = len(file_details)
+        else:
+            try:
+                file_count, _ = _count_files(corpus_resource_name, source_uri_prefix)
+            except Exception:
+                file_count = None
+
         # Basic corpus info
         return {
             "status": "success",
             "message": f"Successfully retrieved information for corpus '{corpus_display_name}'",
             "corpus_name": corpus_name,
             "corpus_display_name": corpus_display_name,
-            "file_count": len(file_details),
+            "file_count": file_count,
+            "page_file_count": len(file_details),
             "files": file_details,
+            "next_page_token": next_page_token,
         }
 
     except Exception as e:
@@ -97,3 +162,48 @@ def get_corpus_info(
             "message": f"Error getting corpus information: {str(e)}",
             "corpus_name": corpus_name,
         }
+
+
+def _count_files(corpus_resource_name: str, source_uri_prefix: str) -> Tuple[int, Dict[str, int]]:
+    """Count a corpus' files (optionally under a source URI prefix), in total and by source."""
+
+    def count_files() -> Tuple[int, Dict[str, int]]:
+        total = 0
+        by_source: Dict[str, int] = {}
+        for rag_file in rag.list_files(
+            corpus_resource_name, page_size=CORPUS_INFO_MAX_PAGE_SIZE
+        ):
+            source_uri = get_rag_file_source_uri(rag_file)
+            if source_uri_prefix and not source_uri.startswith(source_uri_prefix):
+                continue
+            total += 1
+            if source_uri.startswith("gs://"):
+                source = "gcs"
+            elif "drive.google.com" in source_uri:
+                source = "google_drive"
+            else:
+                source = "other"
+            by_source[source] = by_source.get(source, 0) + 1
+        return total, by_source
+
+    # A failed page restarts the count, so retries never count a file twice
+    return resilient_call("rag.list_files", count_files)
+
+
+def _summarize_files(
+    corpus_name: str,
+    corpus_resource_name: str,
+    corpus_display_name: str,
+    source_uri_prefix: str,
+) -> dict:
+    """Summarize a corpus' files (optionally under a source URI prefix) without listing them."""
+    total, by_source = _count_files(corpus_resource_name, source_uri_prefix)
+
+    return {
+        "status": "success",
+        "message": f"Successfully summarized corpus '{corpus_display_name}'",
+        "corpus_name": corpus_name,
+        "corpus_display_name": corpus_display_name,
+        "file_count": total,
+        "file_count_by_source": by_source,
+    }
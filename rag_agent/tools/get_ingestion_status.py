@@ -0,0 +1,79 @@
+"""
+Tool for following background ingestion jobs started with add_data(..., background=True).
+"""
+
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import INGESTION_STATUS_RECENT_JOBS
+from .ingestion_jobs import get_ingestion_job, list_ingestion_jobs
+from .telemetry import instrument_tool
+from .utils import get_corpus_resource_name
+
+
+@instrument_tool
+def get_ingestion_status(
+    job_id: str,
+    tool_context: ToolContext,
+    corpus_name: str = "",
+) -> dict:
+    """
+    Get the status and per-stage progress of a background ingestion job.
+
+    Args:
+        job_id (str): The job_id returned by add_data(..., background=True).
+                      If empty, the most recent jobs are listed instead.
+        tool_context (ToolContext): The tool context
+        corpus_name (str): When listing recent jobs, only include jobs of this corpus
+
+    Returns:
+        dict: The job's status (queued, running, retrying, succeeded or failed), its stages
+              (sources, import, cleanup, finalize) with their progress, and its final result
+    """
+    try:
+        if not job_id:
+            corpus_resource_name = get_corpus_resource_name(corpus_name) if corpus_name else None
+            jobs = list_ingestion_jobs(INGESTION_STATUS_RECENT_JOBS, corpus_resource_name)
+            return {
+                "status": "success",
+                "message": f"Found {len(jobs)} recent ingestion job(s)",
+                "jobs": [
+                    {
+                        field: job[field]
+                        for field in ("job_id", "status", "corpus_name", "current_stage", "attempts", "created_at", "error")
+                    }
+                    for job in jobs
+                ],
+            }
+
+        job = get_ingestion_job(job_id)
+        if job is None:
+            return {
+                "status": "error",
+                "message": f"Ingestion job '{job_id}' does not exist",
+                "job_id": job_id,
+            }
+
+        if job["status"] in ("queued", "running", "retrying"):
+            stage = f" (stage: {job['current_stage']})" if job["current_stage"] else ""
+            message = f"Ingestion job '{job_id}' is {job['status']}{stage}"
+        elif job["status"] == "succeeded":
+            message = f"Ingestion job '{job_id}' succeeded: {(job['result'] or {}).get('message', '')}"
+            # Like a synchronous add_data, a successful ingestion sets the current corpus
+            if (job["result"] or {}).get("status") == "success" and not tool_context.state.get("current_corpus"):
+                tool_context.state["current_corpus"] = job["corpus_name"]
+        else:
+            message = f"Ingestion job '{job_id}' failed after {job['attempts']} attempt(s): {job['error']}"
+
+        return {
+            "status": "success",
+            "message": message,
+            "job_status": job.pop("status"),
+            **job,
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error getting ingestion status: {str(e)}",
+            "job_id": job_id,
+        }
@@ -0,0 +1,134 @@
+"""
+Batched, concurrent rag.import_files for large ingests.
+
+Paths are split into bounded-size batches (one transformation config per batch, so
+paths chunked differently are never mixed), and the batches are imported concurrently.
+Batches that fail are retried on their own, so one bad batch no longer sinks the whole
+import. Each batch's embedding request rate is leased from the process-wide embedding
+governor (see rate_governor).
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from vertexai import rag
+
+from ..config import (
+    IMPORT_BATCH_MAX_ATTEMPTS,
+    IMPORT_BATCH_MAX_PATHS,
+    IMPORT_BATCH_RETRY_BACKOFF_SECONDS,
+    IMPORT_MAX_CONCURRENT_BATCHES,
+    RAG_IMPORT_FILES_TIMEOUT_SECONDS,
+)
+from .rate_governor import ImportSession, embedding_governor, is_quota_error
+from .resilience import CircuitOpenError, DeadlineExceeded, remaining_time, remote_timeout, resilient_call
+
+logger = logging.getLogger(__name__)
+
+
+def _import_batch(
+    corpus_resource_name: str,
+    batch: List[str],
+    transformation_config: rag.TransformationConfig,
+    session: ImportSession,
+):
+    """Import one batch, retrying it with backoff if the request fails."""
+    for attempt in range(1, IMPORT_BATCH_MAX_ATTEMPTS + 1):
+        try:
+            with session.lease() as max_embedding_requests_per_min:
+                # Retried here, with the longer import backoff, rather than by resilient_call
+                return resilient_call(
+                    "rag.import_files",
+                    lambda: rag.import_files(
+                        corpus_resource_name,
+                        batch,
+                        transformation_config=transformation_config,
+                        max_embedding_requests_per_min=max_embedding_requests_per_min,
+                        timeout=remote_timeout(RAG_IMPORT_FILES_TIMEOUT_SECONDS),
+                    ),
+                    retry=False,
+                    timed=True,
+                )
+        except Exception as e:
+            if is_quota_error(e):
+                embedding_governor.report_throttled()
+            if attempt == IMPORT_BATCH_MAX_ATTEMPTS or isinstance(e, (CircuitOpenError, DeadlineExceeded)):
+                raise
+            delay = IMPORT_BATCH_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                raise
+            logger.warning(
+                f"Import batch of {len(batch)} path(s) failed (attempt {attempt}/{IMPORT_BATCH_MAX_ATTEMPTS}): {e}. "
+                f"Retrying in {delay:.1f}s."
+            )
+            time.sleep(delay)
+
+
+def import_in_batches(
+    corpus_resource_name: str,
+    groups: List[Tuple[List[str], rag.TransformationConfig]],
+    on_batch_done: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    Import groups of paths into a corpus as concurrent, bounded-size rag.import_files
+    batches, each group with its own transformation config.
+
+    Each batch leases its embedding request rate from the embedding governor, so
+    concurrent batches of every running import stay within the shared quota.
+    on_batch_done, if given, is called as on_batch_done(batches_done, batches_total)
+    as batches finish.
+
+    Returns:
+        dict: Aggregated "imported", "failed" and "skipped" file counts, the number of
+              "batches" and the "failed_batches" (paths and error of each batch that
+              still failed after its retries)
+    """
+    batches = [
+        (paths[i : i + IMPORT_BATCH_MAX_PATHS], transformation_config)
+        for paths, transformation_config in groups
+        for i in range(0, len(paths), IMPORT_BATCH_MAX_PATHS)
+    ]
+    path_count = sum(len(paths) for paths, _ in groups)
+    concurrency = max(1, min(len(batches), IMPORT_MAX_CONCURRENT_BATCHES))
+    summary = {"imported": 0, "failed": 0, "skipped": 0, "batches": len(batches), "failed_batches": []}
+
+    logger.info(
+        f"Importing {path_count} path(s) to {corpus_resource_name} in {len(batches)} batch(es), "
+        f"{concurrency} at a time."
+    )
+    with embedding_governor.import_session(concurrency) as session, ThreadPoolExecutor(
+        max_workers=concurrency
+    ) as executor:
+        futures = [
+            (
+                batch,
+                # Batches run with the caller's context, and so within its deadline
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _import_batch,
+                    corpus_resource_name,
+                    batch,
+                    transformation_config,
+                    session,
+                ),
+            )
+            for batch, transformation_config in batches
+        ]
+        for done, (batch, future) in enumerate(futures, start=1):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Import batch of {len(batch)} path(s) failed: {e}")
+                summary["failed_batches"].append({"paths": batch, "error": str(e)})
+            else:
+                summary["imported"] += result.imported_rag_files_count
+                summary["failed"] += result.failed_rag_files_count
+                summary["skipped"] += getattr(result, "skipped_rag_files_count", 0) or 0
+            if on_batch_done is not None:
+                on_batch_done(done, len(batches))
+
+    return summary
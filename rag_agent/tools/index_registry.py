@@ -0,0 +1,150 @@
+"""
+Bookkeeping shared by the local per-corpus indexes (vector and lexical).
+
+A registry holds one index per corpus and refreshes it in the background:
+- on first use (after trying to load a persisted snapshot),
+- after a corpus change reported through corpus_events, during which the index is
+  considered stale and not served,
+- and periodically, to pick up changes made by other processes, while still serving.
+
+A corpus whose index cannot be built is marked unavailable until its next change.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from ..config import LOCAL_INDEX_REFRESH_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundIndexRegistry:
+    """
+    Per-corpus indexes refreshed one at a time on a background thread.
+
+    Args:
+        name (str): Index kind, for logs and thread names (e.g. "local-index")
+        build (Callable): build(corpus_resource_name, previous) -> (index, stats); may
+                          reuse or update `previous` (None on first build)
+        load (Callable): load(corpus_resource_name) -> persisted index or None
+        discard (Callable): discard(corpus_resource_name) removes persisted state
+        describe (Callable): describe(index) -> dict for stats
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[str, Optional[Any]], Tuple[Any, Dict]],
+        load: Callable[[str], Optional[Any]] = lambda corpus_resource_name: None,
+        discard: Callable[[str], None] = lambda corpus_resource_name: None,
+        describe: Callable[[Any], Dict] = lambda index: {},
+    ):
+        self._name = name
+        self._build = build
+        self._load = load
+        self._discard = discard
+        self._describe = describe
+        self._indexes: Dict[str, Any] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._stale: Set[str] = set()
+        self._unavailable: Dict[str, str] = {}
+        self._building: Set[str] = set()
+        self._rebuild_requested: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def get(self, corpus_resource_name: str) -> Optional[Any]:
+        """Return the corpus' up-to-date index, scheduling a refresh if there is none."""
+        with self._lock:
+            if corpus_resource_name in self._unavailable:
+                return None
+            index = self._indexes.get(corpus_resource_name)
+            if index is None and corpus_resource_name not in self._stale:
+                index = self._load(corpus_resource_name)
+                if index is not None:
+                    self._indexes[corpus_resource_name] = index
+                    # The snapshot may predate changes made by another process
+                    self._refreshed_at[corpus_resource_name] = 0.0
+            if index is None or corpus_resource_name in self._stale:
+                self._schedule_locked(corpus_resource_name)
+                return None
+            refreshed_at = self._refreshed_at.get(corpus_resource_name, 0.0)
+            if time.monotonic() - refreshed_at >= LOCAL_INDEX_REFRESH_INTERVAL_SECONDS:
+                self._schedule_locked(corpus_resource_name)
+            return index
+
+    def mark_changed(self, corpus_resource_name: str, deleted: bool) -> None:
+        """Stop serving a changed corpus until its index is refreshed, or drop it."""
+        with self._lock:
+            self._unavailable.pop(corpus_resource_name, None)
+            if deleted:
+                self._indexes.pop(corpus_resource_name, None)
+                self._refreshed_at.pop(corpus_resource_name, None)
+                self._stale.discard(corpus_resource_name)
+                self._discard(corpus_resource_name)
+                return
+            self._stale.add(corpus_resource_name)
+            self._schedule_locked(corpus_resource_name)
+
+    def refresh(self, corpus_resource_name: str) -> Dict:
+        """Refresh a corpus' index synchronously and return the refresh statistics."""
+        with self._lock:
+            previous = self._indexes.get(corpus_resource_name) or self._load(corpus_resource_name)
+        index, stats = self._build(corpus_resource_name, previous)
+        with self._lock:
+            self._store_locked(corpus_resource_name, index)
+            self._stale.discard(corpus_resource_name)
+            self._unavailable.pop(corpus_resource_name, None)
+        return stats
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return, per corpus, the index description or why it is unavailable."""
+        with self._lock:
+            stats = {
+                corpus: dict(self._describe(index), stale=corpus in self._stale)
+                for corpus, index in self._indexes.items()
+            }
+            for corpus, reason in self._unavailable.items():
+                stats[corpus] = {"unavailable": reason}
+            return stats
+
+    def _store_locked(self, corpus_resource_name: str, index: Any) -> None:
+        self._indexes[corpus_resource_name] = index
+        self._refreshed_at[corpus_resource_name] = time.monotonic()
+
+    def _schedule_locked(self, corpus_resource_name: str) -> None:
+        if corpus_resource_name in self._building:
+            self._rebuild_requested.add(corpus_resource_name)
+            return
+        self._building.add(corpus_resource_name)
+        self._executor.submit(self._run_refresh, corpus_resource_name)
+
+    def _run_refresh(self, corpus_resource_name: str) -> None:
+        while True:
+            with self._lock:
+                self._rebuild_requested.discard(corpus_resource_name)
+                previous = self._indexes.get(corpus_resource_name)
+            try:
+                index, _ = self._build(corpus_resource_name, previous)
+            except Exception as e:
+                reason = str(e)
+                logger.warning(
+                    f"{self._name} unavailable for {corpus_resource_name}, using remote retrieval: {reason}"
+                )
+                with self._lock:
+                    self._unavailable[corpus_resource_name] = reason
+                    self._indexes.pop(corpus_resource_name, None)
+                    self._building.discard(corpus_resource_name)
+                return
+
+            with self._lock:
+                self._store_locked(corpus_resource_name, index)
+                if corpus_resource_name in self._rebuild_requested:
+                    # The corpus changed again while this refresh was running
+                    continue
+                self._stale.discard(corpus_resource_name)
+                self._building.discard(corpus_resource_name)
+                return
@@ -0,0 +1,232 @@
+"""
+File filtering for GitHub ingestion.
+
+Decides which files of a repository are worth uploading and embedding, based on
+include/exclude globs, a maximum file size, binary detection and the repository's own
+.gitignore/.ragignore files. Files can be checked on disk or, when they are read straight
+from git objects, from their size and first bytes.
+"""
+
+import fnmatch
+import logging
+import os
+import posixpath
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import (
+    INGEST_BINARY_ALLOWED_EXTENSIONS,
+    INGEST_BINARY_SNIFF_BYTES,
+    INGEST_EXCLUDE_GLOBS,
+    INGEST_IGNORE_FILE_NAMES,
+    INGEST_INCLUDE_GLOBS,
+    INGEST_MAX_FILE_SIZE_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _glob_match(relative_path: str, pattern: str) -> bool:
+    """
+    Match a repository-relative POSIX path against a glob.
+
+    Patterns without a "/" match any single path component (so "node_modules" or
+    "*.lock" apply at every depth); patterns with a "/" match the whole path.
+    """
+    if "/" not in pattern:
+        return any(fnmatch.fnmatchcase(part, pattern) for part in relative_path.split("/"))
+    pattern = pattern.lstrip("/")
+    if fnmatch.fnmatchcase(relative_path, pattern):
+        return True
+    return pattern.startswith("**/") and fnmatch.fnmatchcase(relative_path, pattern[3:])
+
+
+class _IgnoreRules:
+    """The rules of one .gitignore-style file, scoped to the directory containing it."""
+
+    def __init__(self, base_dir: str, lines: Iterable[str]):
+        self.base_dir = base_dir
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            self.rules.append((self._compile(line.lstrip("/"), anchored), negated, dir_only))
+
+    @staticmethod
+    def _compile(pattern: str, anchored: bool) -> re.Pattern:
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+            elif pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+            elif pattern[i] == "*":
+                regex += "[^/]*"
+                i += 1
+            elif pattern[i] == "?":
+                regex += "[^/]"
+                i += 1
+            else:
+                regex += re.escape(pattern[i])
+                i += 1
+        prefix = "" if anchored else "(?:.*/)?"
+        return re.compile(f"^{prefix}{regex}$")
+
+    def match(self, relative_path: str) -> Optional[bool]:
+        """
+        Return True if the path is ignored, False if it is explicitly re-included,
+        or None if no rule of this file applies.
+        """
+        if self.base_dir:
+            if not relative_path.startswith(self.base_dir + "/"):
+                return None
+            relative_path = relative_path[len(self.base_dir) + 1 :]
+
+        parts = relative_path.split("/")
+        result = None
+        for regex, negated, dir_only in self.rules:
+            # A rule matches the file itself or any of its parent directories
+            candidates = ["/".join(parts[:i]) for i in range(1, len(parts))]
+            if not dir_only:
+                candidates.append(relative_path)
+            if any(regex.match(candidate) for candidate in candidates):
+                result = not negated
+        return result
+
+
+class IngestFilter:
+    """
+    Decides whether a repository file should be ingested.
+
+    Args:
+        include_globs (List[str]): If non-empty, only paths matching one of these are kept
+        exclude_globs (List[str]): Paths matching any of these are skipped
+        max_file_size_bytes (int): Larger files are skipped (0 disables the limit)
+        ignore_file_names (List[str]): Names of .gitignore-style files honoured in the repo
+    """
+
+    def __init__(
+        self,
+        include_globs: Optional[List[str]] = None,
+        exclude_globs: Optional[List[str]] = None,
+        max_file_size_bytes: int = INGEST_MAX_FILE_SIZE_BYTES,
+        ignore_file_names: Optional[List[str]] = None,
+    ):
+        self.include_globs = INGEST_INCLUDE_GLOBS if include_globs is None else include_globs
+        self.exclude_globs = INGEST_EXCLUDE_GLOBS if exclude_globs is None else exclude_globs
+        self.max_file_size_bytes = max_file_size_bytes
+        self.ignore_file_names = (
+            INGEST_IGNORE_FILE_NAMES if ignore_file_names is None else ignore_file_names
+        )
+        self._ignore_rules: List[_IgnoreRules] = []
+
+    def load_ignore_files(self, root_dir: str, relative_paths: Iterable[str]) -> None:
+        """Load every ignore file found among the repository's paths."""
+        for relative_path in relative_paths:
+            if posixpath.basename(relative_path) not in self.ignore_file_names:
+                continue
+            local_path = os.path.join(root_dir, *relative_path.split("/"))
+            try:
+                with open(local_path, encoding="utf-8", errors="replace") as f:
+                    self.add_ignore_file(relative_path, f)
+            except OSError as e:
+                logger.warning(f"Could not read ignore file {relative_path}: {e}")
+
+    def add_ignore_file(self, relative_path: str, lines: Iterable[str]) -> None:
+        """Load the rules of one ignore file of the repository, given its lines."""
+        self._ignore_rules.append(_IgnoreRules(posixpath.dirname(relative_path), lines))
+        # Apply shallower files first so deeper ones can override them
+        self._ignore_rules.sort(key=lambda rules: rules.base_dir.count("/") + bool(rules.base_dir))
+
+    def check_path(self, relative_path: str) -> Optional[str]:
+        """
+        Apply the path-only rules (globs and ignore files).
+
+        Returns:
+            Optional[str]: The reason the path is skipped, or None if it is kept
+        """
+        if posixpath.basename(relative_path) in self.ignore_file_names:
+            return "ignore_file"
+        if self.include_globs and not any(
+            _glob_match(relative_path, pattern) for pattern in self.include_globs
+        ):
+            return "not_included"
+        if any(_glob_match(relative_path, pattern) for pattern in self.exclude_globs):
+            return "excluded"
+
+        ignored = None
+        for rules in self._ignore_rules:
+            match = rules.match(relative_path)
+            if match is not None:
+                ignored = match
+        if ignored:
+            return "ignored"
+        return None
+
+    def check(self, relative_path: str, local_path: str) -> Optional[str]:
+        """
+        Apply every rule, including the ones that need the file on disk.
+
+        Returns:
+            Optional[str]: The reason the file is skipped, or None if it is kept
+        """
+        reason = self.check_path(relative_path)
+        if reason:
+            return reason
+
+        try:
+            size = os.path.getsize(local_path)
+        except OSError:
+            return "missing"
+        reason = self.check_size(size)
+        if reason:
+            return reason
+        try:
+            with open(local_path, "rb") as f:
+                head = f.read(INGEST_BINARY_SNIFF_BYTES)
+        except OSError:
+            return "binary"
+        return self.check_head(relative_path, head)
+
+    def check_size(self, size: int) -> Optional[str]:
+        """
+        Apply the size rules to a file of `size` bytes.
+
+        Returns:
+            Optional[str]: The reason the file is skipped, or None if it is kept
+        """
+        if self.max_file_size_bytes and size > self.max_file_size_bytes:
+            return "too_large"
+        if size == 0:
+            return "empty"
+        return None
+
+    def check_head(self, relative_path: str, head: bytes) -> Optional[str]:
+        """
+        Apply binary detection to the first INGEST_BINARY_SNIFF_BYTES of a file: a NUL
+        byte marks it as binary, unless its extension is in INGEST_BINARY_ALLOWED_EXTENSIONS.
+
+        Returns:
+            Optional[str]: The reason the file is skipped, or None if it is kept
+        """
+        extension = posixpath.splitext(relative_path)[1].lower()
+        if extension not in INGEST_BINARY_ALLOWED_EXTENSIONS and b"\0" in head[:INGEST_BINARY_SNIFF_BYTES]:
+            return "binary"
+        return None
+
+
+def summarize_skips(skipped: Dict[str, int]) -> str:
+    """Format per-reason skip counts, e.g. "12 excluded, 3 binary"."""
+    return ", ".join(f"{count} {reason}" for reason, count in sorted(skipped.items()))
@@ -0,0 +1,237 @@
+"""
+Per-corpus content manifests for incremental GitHub ingestion.
+
+A manifest records, for one (corpus, repository) pair, every ingested file path
+together with the git blob SHA it was ingested from and the RAG file it produced.
+Re-ingesting the same repository compares the current tree against the manifest so
+only added or changed files are uploaded and imported, and RAG files for removed
+paths are deleted.
+
+Files are imported from per-repository keys that keep their path (see
+staged_object_name), so source URIs and citations name the repository and file. Their
+content is also stored once under its MD5 (see content_object_name), shared by every
+corpus and repository: content already there is copied server-side instead of being
+uploaded again. Manifests and the corpora's files are the references that keep staged
+objects alive (see staging_gc).
+
+Several ingests and deletions may update a manifest at once: update_manifest writes it
+only if its GCS generation is unchanged since it was read, and otherwise merges again.
+"""
+
+import json
+import logging
+import re
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from ..config import STAGING_METADATA_WRITE_MAX_ATTEMPTS
+from .resilience import gcs_timeout, resilient_call
+
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Manifests live next to the staged repository content, under this sub-prefix
+MANIFESTS_SUBPREFIX = "_manifests"
+
+# Staged file content lives under this sub-prefix, keyed by content hash
+STAGED_OBJECTS_SUBPREFIX = "_objects"
+
+# Files are imported from this sub-prefix, keyed by repository, content hash and path
+STAGED_REPOS_SUBPREFIX = "_repos"
+
+
+def repo_key(repo_url: str) -> str:
+    """
+    Build a stable, GCS-safe key for a GitHub repository URL.
+
+    "https://github.com/Org/Repo", "https://github.com/org/repo.git" and
+    "git@github.com:org/repo.git" all map to "org__repo".
+    """
+    path = re.sub(r"^(?:https://github\.com/|git@github\.com:)", "", repo_url.strip())
+    path = re.sub(r"\.git$", "", path.strip("/"))
+    return re.sub(r"[^a-zA-Z0-9_.-]", "_", path.lower().replace("/", "__"))
+
+
+def corpus_key(corpus_resource_name: str) -> str:
+    """Return the corpus ID (last path element) of a corpus resource name."""
+    return corpus_resource_name.rstrip("/").split("/")[-1]
+
+
+def content_object_name(base_prefix: str, content_hash: str) -> str:
+    """Return the GCS object name where content is stored, keyed by its MD5 hex digest."""
+    return f"{base_prefix}/{STAGED_OBJECTS_SUBPREFIX}/{content_hash}"
+
+
+def staged_object_name(base_prefix: str, repo_url: str, content_hash: str, relative_path: str) -> str:
+    """
+    Return the GCS object name a repository file is imported from.
+
+    The repository key and the file's path are kept, so "{base_prefix}/_repos/{repo_key}/"
+    selects a repository's files by source URI. The content hash before the path makes
+    every content of a path a distinct object, so a changed file never overwrites the
+    object its current RAG file was imported from.
+    """
+    return f"{base_prefix}/{STAGED_REPOS_SUBPREFIX}/{repo_key(repo_url)}/{content_hash}/{relative_path}"
+
+
+def manifest_blob_name(base_prefix: str, corpus_resource_name: str, repo_url: str) -> str:
+    """Return the GCS object name of the manifest for a (corpus, repository) pair."""
+    return (
+        f"{base_prefix}/{MANIFESTS_SUBPREFIX}/"
+        f"{corpus_key(corpus_resource_name)}/{repo_key(repo_url)}.json"
+    )
+
+
+def empty_manifest(corpus_resource_name: str, repo_url: str) -> Dict:
+    """Return a new, empty manifest."""
+    return {
+        "version": MANIFEST_VERSION,
+        "corpus": corpus_resource_name,
+        "repo_url": repo_url,
+        "commit": "",
+        "files": {},
+    }
+
+
+def load_manifest(
+    bucket: "storage.Bucket", base_prefix: str, corpus_resource_name: str, repo_url: str
+) -> Dict:
+    """
+    Load the manifest for a (corpus, repository) pair, or an empty one if none exists.
+
+    Returns:
+        dict: The manifest, with "files" mapping each path to
+              {"blob_sha": ..., "gcs_uri": ..., "rag_file_id": ...}
+    """
+    blob = bucket.blob(manifest_blob_name(base_prefix, corpus_resource_name, repo_url))
+    return _read_manifest(blob, corpus_resource_name, repo_url)[0]
+
+
+def _read_manifest(blob: "storage.Blob", corpus_resource_name: str, repo_url: str) -> Tuple[Dict, int]:
+    """Read a manifest and the GCS generation it was read at (0 if it does not exist)."""
+    try:
+        data = resilient_call(
+            "gcs.download_as_bytes", lambda: blob.download_as_bytes(timeout=gcs_timeout()), timed=True
+        )
+    except NotFound:
+        return empty_manifest(corpus_resource_name, repo_url), 0
+
+    try:
+        manifest = json.loads(data)
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable manifest {blob.name}: {e}")
+        return empty_manifest(corpus_resource_name, repo_url), blob.generation
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.warning(f"Ignoring manifest {blob.name} with unsupported version")
+        return empty_manifest(corpus_resource_name, repo_url), blob.generation
+    return manifest, blob.generation
+
+
+def load_corpus_manifests(bucket: "storage.Bucket", base_prefix: str, corpus_resource_name: str) -> List[Dict]:
+    """Load the manifests of every repository ingested into a corpus."""
+    prefix = f"{base_prefix}/{MANIFESTS_SUBPREFIX}/{corpus_key(corpus_resource_name)}/"
+    blobs = resilient_call(
+        "gcs.list", lambda: list(bucket.list_blobs(prefix=prefix, timeout=gcs_timeout())), timed=True
+    )
+    manifests = []
+    for blob in blobs:
+        try:
+            manifest = json.loads(
+                resilient_call(
+                    "gcs.download_as_bytes", lambda: blob.download_as_bytes(timeout=gcs_timeout()), timed=True
+                )
+            )
+        except NotFound:
+            continue
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable manifest {blob.name}: {e}")
+            continue
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.warning(f"Ignoring manifest {blob.name} with unsupported version")
+            continue
+        manifests.append(manifest)
+    return manifests
+
+
+def update_manifest(
+    bucket: "storage.Bucket",
+    base_prefix: str,
+    corpus_resource_name: str,
+    repo_url: str,
+    update: Callable[[Dict], None],
+) -> Dict:
+    """
+    Apply `update` to the stored manifest for a (corpus, repository) pair and persist it;
+    a manifest left without files is deleted.
+
+    The manifest is written only if its generation is unchanged since it was read. If
+    another ingest or deletion wrote it in between, it is read again and `update`
+    applied again, so `update` must only apply the caller's own changes.
+
+    Args:
+        update (Callable[[Dict], None]): Modifies the manifest in place
+
+    Returns:
+        dict: The manifest as persisted
+
+    Raises:
+        PreconditionFailed: If the manifest kept changing for every attempt
+    """
+    for attempt in range(1, STAGING_METADATA_WRITE_MAX_ATTEMPTS + 1):
+        # A new blob for every read: a blob that knows a generation downloads that generation
+        blob = bucket.blob(manifest_blob_name(base_prefix, corpus_resource_name, repo_url))
+        manifest, generation = _read_manifest(blob, corpus_resource_name, repo_url)
+        update(manifest)
+        try:
+            if manifest["files"]:
+                resilient_call(
+                    "gcs.upload_from_string",
+                    lambda: blob.upload_from_string(
+                        json.dumps(manifest, sort_keys=True),
+                        content_type="application/json",
+                        if_generation_match=generation,
+                        timeout=gcs_timeout(),
+                    ),
+                    timed=True,
+                )
+            elif generation:
+                resilient_call(
+                    "gcs.delete",
+                    lambda: blob.delete(if_generation_match=generation, timeout=gcs_timeout()),
+                    timed=True,
+                )
+            return manifest
+        except (PreconditionFailed, NotFound):
+            if attempt == STAGING_METADATA_WRITE_MAX_ATTEMPTS:
+                raise
+            logger.info(f"Manifest {blob.name} changed while being updated; merging again.")
+
+
+def diff_manifest(
+    manifest: Dict, current_shas: Dict[str, str]
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compare the current repository tree against a manifest.
+
+    Args:
+        manifest (dict): The previously stored manifest
+        current_shas (Dict[str, str]): Current path -> git blob SHA
+
+    Returns:
+        Tuple[List[str], List[str], List[str]]: Added, changed and removed paths
+    """
+    files = manifest.get("files", {})
+    added = sorted(path for path in current_shas if path not in files)
+    changed = sorted(
+        path
+        for path, sha in current_shas.items()
+        if path in files and files[path].get("blob_sha") != sha
+    )
+    removed = sorted(path for path in files if path not in current_shas)
+    return added, changed, removed
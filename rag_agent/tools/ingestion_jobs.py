@@ -0,0 +1,318 @@
+"""
+Durable background ingestion jobs for add_data.
+
+add_data(..., background=True) stores a job in a local SQLite database and returns its ID
+immediately; a bounded pool of worker threads runs the ingestion (add_data.ingest_paths)
+and records per-stage progress, which the get_ingestion_status tool reports.
+
+- Jobs whose ingestion raises, or fails in a way worth retrying (GitHub processing
+  errors, every import batch failing), are retried up to INGESTION_JOB_MAX_ATTEMPTS
+  times with exponential backoff.
+- Jobs survive restarts: queued and retrying jobs are picked up again when the job
+  runner starts, and so are running jobs whose worker stopped renewing its lease
+  (e.g. the process died).
+- Several processes may share one database: a job is claimed with a conditional
+  update, so only one worker runs it at a time.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from ..config import (
+    INGESTION_JOB_DB_PATH,
+    INGESTION_JOB_LEASE_SECONDS,
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_MAX_WORKERS,
+    INGESTION_JOB_RETRY_BACKOFF_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stages of an ingestion, in order (see add_data.ingest_paths)
+INGESTION_STAGES = ["sources", "import", "cleanup", "finalize"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    job_id TEXT PRIMARY KEY,
+    corpus_name TEXT NOT NULL,
+    corpus_resource_name TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    stages TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    heartbeat_at REAL
+)
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    directory = os.path.dirname(INGESTION_JOB_DB_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(INGESTION_JOB_DB_PATH, timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(_SCHEMA)
+    return connection
+
+
+def _execute(sql: str, parameters: tuple = ()) -> int:
+    """Run one write statement in its own transaction and return the affected row count."""
+    with closing(_connect()) as connection, connection:
+        return connection.execute(sql, parameters).rowcount
+
+
+def _query(sql: str, parameters: tuple = ()) -> List[sqlite3.Row]:
+    with closing(_connect()) as connection:
+        return connection.execute(sql, parameters).fetchall()
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value, timezone.utc).isoformat() if value else None
+
+
+def _job_to_dict(row: sqlite3.Row) -> Dict:
+    stages = json.loads(row["stages"])
+    current_stage = next(
+        (stage for stage in INGESTION_STAGES if stages[stage]["status"] in ("running", "failed")),
+        None,
+    )
+    return {
+        "job_id": row["job_id"],
+        "status": row["status"],
+        "corpus_name": row["corpus_name"],
+        "paths": json.loads(row["paths"]),
+        "attempts": row["attempts"],
+        "max_attempts": INGESTION_JOB_MAX_ATTEMPTS,
+        "current_stage": current_stage,
+        "stages": stages,
+        "error": row["error"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "created_at": _timestamp(row["created_at"]),
+        "updated_at": _timestamp(row["updated_at"]),
+        "next_attempt_at": _timestamp(row["next_attempt_at"]) if row["status"] == "retrying" else None,
+    }
+
+
+def _pending_stages() -> Dict[str, Dict]:
+    return {stage: {"status": "pending", "detail": {}} for stage in INGESTION_STAGES}
+
+
+def _is_retryable(result: Dict) -> bool:
+    """Whether a failed ingestion may succeed if run again (transient GitHub/import errors)."""
+    return result.get("status") == "error" and bool(
+        result.get("github_processing_errors")
+        or result.get("github_errors_details")
+        or result.get("failed_import_batches")
+    )
+
+
+class _IngestionJobRunner:
+    """Runs queued ingestion jobs on a bounded thread pool, renewing the leases of running jobs."""
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the worker pool and resume unfinished jobs, once per process.
+
+        Only jobs enqueued before the runner started are resumed: enqueue_ingestion_job
+        submits the jobs it creates itself.
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=INGESTION_JOB_MAX_WORKERS, thread_name_prefix="ingestion-job"
+            )
+            threading.Thread(target=self._renew_leases, name="ingestion-job-lease", daemon=True).start()
+            started_at = time.time()
+
+        now = time.time()
+        rows = _query(
+            "SELECT job_id, status, next_attempt_at, heartbeat_at FROM ingestion_jobs "
+            "WHERE status IN ('queued', 'retrying', 'running') AND created_at < ?",
+            (started_at,),
+        )
+        for row in rows:
+            if row["status"] == "running":
+                if (row["heartbeat_at"] or 0) > now - INGESTION_JOB_LEASE_SECONDS:
+                    continue  # Still owned by a live worker
+                logger.warning(f"Resuming ingestion job {row['job_id']} abandoned by its worker")
+                _execute(
+                    "UPDATE ingestion_jobs SET status = 'queued' WHERE job_id = ? AND status = 'running'",
+                    (row["job_id"],),
+                )
+            self.submit(row["job_id"], delay=max(0.0, row["next_attempt_at"] - now))
+
+    def submit(self, job_id: str, delay: float = 0.0) -> None:
+        if delay > 0:
+            timer = threading.Timer(delay, self.submit, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+            return
+        self._executor.submit(self._run, job_id)
+
+    def _renew_leases(self) -> None:
+        while True:
+            time.sleep(INGESTION_JOB_LEASE_SECONDS / 3)
+            with self._lock:
+                running = list(self._running)
+            for job_id in running:
+                try:
+                    _execute(
+                        "UPDATE ingestion_jobs SET heartbeat_at = ? WHERE job_id = ?",
+                        (time.time(), job_id),
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not renew the lease of ingestion job {job_id}: {e}")
+
+    def _claim(self, job_id: str) -> Optional[sqlite3.Row]:
+        now = time.time()
+        claimed = _execute(
+            "UPDATE ingestion_jobs SET status = 'running', attempts = attempts + 1, "
+            "heartbeat_at = ?, updated_at = ? "
+            "WHERE job_id = ? AND status IN ('queued', 'retrying') AND next_attempt_at <= ?",
+            (now, now, job_id, now + 1),
+        )
+        if not claimed:
+            return None
+        return _query("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,))[0]
+
+    def _run(self, job_id: str) -> None:
+        # Imported here: add_data imports this module to enqueue jobs
+        from .add_data import ingest_paths
+
+        job = self._claim(job_id)
+        if job is None:
+            return
+        with self._lock:
+            self._running.add(job_id)
+        stages = json.loads(job["stages"])
+        stages_lock = threading.Lock()
+
+        def progress(stage: str, status: str, detail: Optional[Dict] = None) -> None:
+            with stages_lock:
+                stages[stage] = {"status": status, "detail": detail or {}}
+                snapshot = json.dumps(stages)
+            now = time.time()
+            _execute(
+                "UPDATE ingestion_jobs SET stages = ?, updated_at = ?, heartbeat_at = ? WHERE job_id = ?",
+                (snapshot, now, now, job_id),
+            )
+
+        logger.info(f"Running ingestion job {job_id} (attempt {job['attempts']}/{INGESTION_JOB_MAX_ATTEMPTS})")
+        try:
+            result = ingest_paths(
+                job["corpus_name"], job["corpus_resource_name"], json.loads(job["paths"]), progress
+            )
+            error = result["message"] if result.get("status") == "error" else None
+            retryable = _is_retryable(result)
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}", exc_info=True)
+            result, error, retryable = None, str(e), True
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+
+        now = time.time()
+        if error is None:
+            status, next_attempt_at = "succeeded", now
+        elif retryable and job["attempts"] < INGESTION_JOB_MAX_ATTEMPTS:
+            delay = INGESTION_JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+            status, next_attempt_at = "retrying", now + delay
+            # The next attempt starts over: stages are reported afresh
+            stages = _pending_stages()
+        else:
+            status, next_attempt_at = "failed", now
+            stages = {
+                stage: dict(state, status="failed") if state["status"] == "running" else state
+                for stage, state in stages.items()
+            }
+
+        _execute(
+            "UPDATE ingestion_jobs SET status = ?, stages = ?, result = ?, error = ?, "
+            "updated_at = ?, next_attempt_at = ?, heartbeat_at = NULL WHERE job_id = ?",
+            (
+                status,
+                json.dumps(stages),
+                json.dumps(result, default=str) if result is not None else None,
+                error,
+                now,
+                next_attempt_at,
+                job_id,
+            ),
+        )
+        logger.info(f"Ingestion job {job_id} {status}" + (f": {error}" if error else ""))
+        if status == "retrying":
+            self.submit(job_id, delay=next_attempt_at - now)
+
+
+_runner = _IngestionJobRunner()
+
+
+def enqueue_ingestion_job(corpus_name: str, corpus_resource_name: str, paths: List[str]) -> str:
+    """
+    Persist a new ingestion job and schedule it on the worker pool.
+
+    Returns:
+        str: The job ID
+    """
+    # Started first, so that resuming unfinished jobs does not schedule this one too
+    _runner.start()
+    job_id = uuid.uuid4().hex[:12]
+    now = time.time()
+    _execute(
+        "INSERT INTO ingestion_jobs (job_id, corpus_name, corpus_resource_name, paths, status, "
+        "stages, created_at, updated_at, next_attempt_at) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+        (
+            job_id,
+            corpus_name,
+            corpus_resource_name,
+            json.dumps(paths),
+            json.dumps(_pending_stages()),
+            now,
+            now,
+            now,
+        ),
+    )
+    logger.info(f"Queued ingestion job {job_id} for {corpus_resource_name}: {len(paths)} path(s)")
+    _runner.submit(job_id)
+    return job_id
+
+
+def get_ingestion_job(job_id: str) -> Optional[Dict]:
+    """Return a job's status, per-stage progress and final result, or None if unknown."""
+    _runner.start()
+    rows = _query("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,))
+    return _job_to_dict(rows[0]) if rows else None
+
+
+def list_ingestion_jobs(limit: int, corpus_resource_name: Optional[str] = None) -> List[Dict]:
+    """Return the most recent jobs, newest first, optionally for one corpus."""
+    _runner.start()
+    if corpus_resource_name:
+        rows = _query(
+            "SELECT * FROM ingestion_jobs WHERE corpus_resource_name = ? ORDER BY created_at DESC LIMIT ?",
+            (corpus_resource_name, limit),
+        )
+    else:
+        rows = _query("SELECT * FROM ingestion_jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+    return [_job_to_dict(row) for row in rows]
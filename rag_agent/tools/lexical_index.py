@@ -0,0 +1,383 @@
+"""
+Incrementally maintained BM25 index over corpus chunks, for hybrid retrieval.
+
+Vector search alone tends to miss exact identifiers (function names, SKUs, client codes),
+so for the corpora listed in HYBRID_RETRIEVAL_CORPORA rag_query also runs a lexical
+search and fuses both rankings with reciprocal-rank fusion (see fuse_rankings).
+
+Each corpus' index is refreshed in the background whenever add_data (or any other tool)
+reports a change to it: only files whose update time changed are downloaded, chunked and
+(re)indexed, and postings of removed files are dropped. The chunks are persisted under
+LEXICAL_INDEX_DIR so an index survives restarts. Until a corpus' index is ready, or if
+its sources cannot be read locally, rag_query uses vector retrieval alone.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config import (
+    DEFAULT_TOP_K,
+    HYBRID_FUSION_OVERLAP_THRESHOLD,
+    HYBRID_RETRIEVAL_CORPORA,
+    LEXICAL_BM25_B,
+    LEXICAL_BM25_K1,
+    LEXICAL_INDEX_DIR,
+    LEXICAL_INDEX_MAX_FILES,
+    RRF_K,
+)
+from .chunking import chunk_text, get_chunking_profile
+from .context_packing import word_shingles
+from .corpus_events import on_corpus_changed
+from .corpus_sources import IndexUnavailable, download_source_texts, list_source_files
+from .index_registry import BackgroundIndexRegistry
+from .ingest_manifest import corpus_key
+from .utils import get_corpus_resource_name
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Words, keeping identifiers such as "get_corpus_info", "SKU-1234" or "v1.2.3" whole
+_TOKEN_PATTERN = re.compile(r"\w+(?:[.\-/:]\w+)*")
+_SUBTOKEN_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    Yield the lowercased index terms of a text.
+
+    Compound identifiers yield both the whole identifier and its parts, so
+    "getCorpusInfo" matches queries for "getcorpusinfo" as well as "corpus".
+    """
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        yield token.lower()
+        parts = [
+            part.lower()
+            for piece in re.split(r"[._\-/:]", token)
+            for part in _SUBTOKEN_PATTERN.findall(piece)
+        ]
+        if len(parts) > 1:
+            yield from parts
+
+
+class LexicalIndex:
+    """
+    A mutable BM25 index of one corpus' chunks.
+
+    Rows of removed or changed files are tombstoned and their postings dropped; the
+    index is rebuilt without them once they outnumber the live rows.
+    """
+
+    def __init__(self, corpus_resource_name: str):
+        self.corpus_resource_name = corpus_resource_name
+        self.files: Dict[str, Dict] = {}
+        self.chunks: List[Optional[Tuple[str, str]]] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._file_rows: Dict[str, List[int]] = {}
+        self._total_length = 0
+        self._live_rows = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._live_rows
+
+    def add_file(self, file_id: str, meta: Dict, chunks: List[str]) -> None:
+        with self._lock:
+            self._remove_file_locked(file_id)
+            self.files[file_id] = meta
+            rows = []
+            for text in chunks:
+                row = len(self.chunks)
+                terms = Counter(tokenize(text))
+                for term, count in terms.items():
+                    self._postings.setdefault(term, {})[row] = count
+                length = sum(terms.values())
+                self.chunks.append((file_id, text))
+                self._lengths.append(length)
+                self._total_length += length
+                rows.append(row)
+            self._file_rows[file_id] = rows
+            self._live_rows += len(rows)
+
+    def remove_file(self, file_id: str) -> None:
+        with self._lock:
+            self._remove_file_locked(file_id)
+
+    def _remove_file_locked(self, file_id: str) -> None:
+        self.files.pop(file_id, None)
+        for row in self._file_rows.pop(file_id, []):
+            _, text = self.chunks[row]
+            for term in set(tokenize(text)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(row, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths[row]
+            self._lengths[row] = 0
+            self.chunks[row] = None
+            self._live_rows -= 1
+
+    def search(self, query: str, top_k: int) -> List[Dict]:
+        """
+        Return the top_k chunks by BM25 score.
+
+        Returns:
+            List[Dict]: Results shaped like rag_query's, with the BM25 score in "lexical_score"
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not self._live_rows or not terms:
+                return []
+            average_length = self._total_length / self._live_rows or 1.0
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (self._live_rows - len(postings) + 0.5) / (len(postings) + 0.5))
+                for row, frequency in postings.items():
+                    norm = LEXICAL_BM25_K1 * (
+                        1 - LEXICAL_BM25_B + LEXICAL_BM25_B * self._lengths[row] / average_length
+                    )
+                    scores[row] = scores.get(row, 0.0) + idf * frequency * (LEXICAL_BM25_K1 + 1) / (
+                        frequency + norm
+                    )
+
+            results = []
+            for row, score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+                file_id, text = self.chunks[row]
+                source = self.files.get(file_id, {})
+                results.append(
+                    {
+                        "source_uri": source.get("source_uri", ""),
+                        "source_name": source.get("source_name", ""),
+                        "text": text,
+                        "lexical_score": score,
+                    }
+                )
+            return results
+
+    @property
+    def tombstones(self) -> int:
+        return len(self.chunks) - self._live_rows
+
+    def to_snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "version": SNAPSHOT_VERSION,
+                "corpus": self.corpus_resource_name,
+                "files": self.files,
+                "chunks": [chunk for chunk in self.chunks if chunk is not None],
+            }
+
+
+def _snapshot_path(corpus_resource_name: str) -> str:
+    return os.path.join(LEXICAL_INDEX_DIR, f"{corpus_key(corpus_resource_name)}.json")
+
+
+def _load_snapshot(corpus_resource_name: str) -> Optional[LexicalIndex]:
+    """Rebuild a corpus' index from its persisted chunks, or return None if there are none."""
+    try:
+        with open(_snapshot_path(corpus_resource_name), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load lexical index snapshot for {corpus_resource_name}: {e}")
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("corpus") != corpus_resource_name:
+        return None
+    return _index_from_snapshot(snapshot)
+
+
+def _index_from_snapshot(snapshot: Dict) -> LexicalIndex:
+    chunks_by_file: Dict[str, List[str]] = {}
+    for file_id, text in snapshot["chunks"]:
+        chunks_by_file.setdefault(file_id, []).append(text)
+    index = LexicalIndex(snapshot["corpus"])
+    for file_id, meta in snapshot["files"].items():
+        index.add_file(file_id, meta, chunks_by_file.get(file_id, []))
+    return index
+
+
+def _save_snapshot(index: LexicalIndex) -> None:
+    path = _snapshot_path(index.corpus_resource_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index.to_snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def _discard_snapshot(corpus_resource_name: str) -> None:
+    try:
+        os.remove(_snapshot_path(corpus_resource_name))
+    except FileNotFoundError:
+        pass
+
+
+def _refresh_index(
+    corpus_resource_name: str, previous: Optional[LexicalIndex]
+) -> Tuple[LexicalIndex, Dict]:
+    """
+    Bring a corpus' index up to date, indexing only added or changed files.
+
+    Raises:
+        IndexUnavailable: If the corpus is too large or a source cannot be read locally
+    """
+    files = list_source_files(corpus_resource_name)
+    if len(files) > LEXICAL_INDEX_MAX_FILES:
+        raise IndexUnavailable(
+            f"Corpus has {len(files)} files, more than LEXICAL_INDEX_MAX_FILES={LEXICAL_INDEX_MAX_FILES}"
+        )
+
+    index = previous if previous is not None else LexicalIndex(corpus_resource_name)
+    removed = [file_id for file_id in index.files if file_id not in files]
+    updated = sorted(file_id for file_id, meta in files.items() if index.files.get(file_id) != meta)
+
+    # Download everything first, so a failure leaves the index untouched
+    texts = download_source_texts(files, updated)
+    for file_id in removed:
+        index.remove_file(file_id)
+    for file_id in updated:
+        _, chunking = get_chunking_profile(files[file_id]["source_uri"])
+        index.add_file(file_id, files[file_id], chunk_text(texts[file_id], **chunking))
+    if index.tombstones > len(index):
+        index = _index_from_snapshot(index.to_snapshot())
+    if removed or updated:
+        _save_snapshot(index)
+
+    stats = {
+        "files": len(files),
+        "files_indexed": len(updated),
+        "files_removed": len(removed),
+        "chunks": len(index),
+    }
+    logger.info(f"Refreshed lexical index for {corpus_resource_name}: {stats}")
+    return index, stats
+
+
+_registry = BackgroundIndexRegistry(
+    "lexical-index",
+    build=_refresh_index,
+    load=_load_snapshot,
+    discard=_discard_snapshot,
+    describe=lambda index: {"chunks": len(index), "files": len(index.files)},
+)
+
+
+def is_hybrid_retrieval_enabled(corpus_resource_name: str) -> bool:
+    """Whether a corpus is configured to fuse lexical and vector retrieval."""
+    if not HYBRID_RETRIEVAL_CORPORA:
+        return False
+    for name in HYBRID_RETRIEVAL_CORPORA:
+        if name in (corpus_resource_name, corpus_key(corpus_resource_name)):
+            return True
+        if get_corpus_resource_name(name) == corpus_resource_name:
+            return True
+    return False
+
+
+def lexical_search(corpus_resource_name: str, query: str, top_k: int = DEFAULT_TOP_K) -> Optional[List[Dict]]:
+    """
+    Run a BM25 search over a corpus' chunks.
+
+    Returns:
+        Optional[List[Dict]]: The results, or None if hybrid retrieval is not enabled for
+                              the corpus or its index is not ready
+    """
+    if not is_hybrid_retrieval_enabled(corpus_resource_name):
+        return None
+    index = _registry.get(corpus_resource_name)
+    if index is None:
+        return None
+    return index.search(query, top_k)
+
+
+def _shingle_overlap(shingles: Set[Tuple[str, ...]], other: Set[Tuple[str, ...]]) -> float:
+    return len(shingles & other) / (min(len(shingles), len(other)) or 1)
+
+
+def fuse_rankings(rankings: List[List[Dict]], top_k: int) -> List[Dict]:
+    """
+    Merge several ranked result lists with reciprocal-rank fusion.
+
+    A chunk's fused score is the sum of 1 / (RRF_K + rank) over the lists it appears in.
+    Lexical and vector chunks of a source rarely have the same boundaries, so a result
+    is the same chunk as an earlier one of the same source URI when they share at least
+    HYBRID_FUSION_OVERLAP_THRESHOLD of the smaller one's word shingles (the best
+    overlapping one not yet matched in this list). The fields of the first occurrence,
+    including its text, are kept and completed with those of later ones.
+
+    Args:
+        rankings (List[List[Dict]]): Result lists, each ordered best first
+        top_k (int): Number of fused results to return
+
+    Returns:
+        List[Dict]: The top_k results by "fusion_score", each listing in "retrieval"
+                    the rankings ("vector", "lexical") it came from
+    """
+    fused: List[Dict] = []
+    entries_by_source: Dict[str, List[Tuple[Dict, Set[Tuple[str, ...]]]]] = {}
+    for ranking in rankings:
+        matched: Set[int] = set()
+        for rank, result in enumerate(ranking, start=1):
+            shingles = word_shingles(result.get("text", ""))
+            candidates = entries_by_source.setdefault(result.get("source_uri", ""), [])
+            overlap, entry = max(
+                (
+                    (_shingle_overlap(shingles, entry_shingles), entry)
+                    for entry, entry_shingles in candidates
+                    if id(entry) not in matched
+                ),
+                key=lambda candidate: candidate[0],
+                default=(0.0, None),
+            )
+            if entry is None or overlap < HYBRID_FUSION_OVERLAP_THRESHOLD:
+                entry = {**result, "fusion_score": 0.0, "retrieval": []}
+                fused.append(entry)
+                candidates.append((entry, shingles))
+            else:
+                for field, value in result.items():
+                    entry.setdefault(field, value)
+            matched.add(id(entry))
+            entry["fusion_score"] += 1.0 / (RRF_K + rank)
+            entry["retrieval"].append("lexical" if "lexical_score" in result else "vector")
+    ranked = sorted(fused, key=lambda result: -result["fusion_score"])
+    for result in ranked:
+        result.setdefault("score", None)
+    return ranked[:top_k]
+
+
+def refresh_lexical_index(corpus_name: str) -> Dict:
+    """
+    Build or incrementally refresh a corpus' lexical index now.
+
+    Args:
+        corpus_name (str): The corpus display name or full resource name
+
+    Returns:
+        dict: Refresh statistics (files indexed/removed, chunks)
+    """
+    return _registry.refresh(get_corpus_resource_name(corpus_name))
+
+
+def get_lexical_index_stats() -> Dict[str, Dict]:
+    """Return, per corpus, the loaded index size or why it is unavailable."""
+    return _registry.stats()
+
+
+@on_corpus_changed
+def _on_corpus_changed(corpus_resource_name: str, deleted: bool) -> None:
+    if is_hybrid_retrieval_enabled(corpus_resource_name):
+        _registry.mark_changed(corpus_resource_name, deleted)
@@ -6,7 +6,12 @@ from typing import Dict, List, Union
 
 from vertexai import rag
 
+from .resilience import resilient_call
+from .telemetry import instrument_tool
+from .utils import ensure_vertexai_initialized
 
+
+@instrument_tool
 def list_corpora() -> dict:
     """
     List all available Vertex AI RAG corpora.
@@ -19,8 +24,10 @@ def list_corpora() -> dict:
             - update_time: When the corpus was last updated
     """
     try:
+        ensure_vertexai_initialized()
+
         # Get the list of corpora
-        corpora = rag.list_corpora()
+        corpora = resilient_call("rag.list_corpora", lambda: list(rag.list_corpora()))
 
         # Process corpus information into a more usable format
         corpus_info: List[Dict[str, Union[str, int]]] = []
@@ -0,0 +1,340 @@
+"""
+Local in-process vector index for hot corpora.
+
+Corpora listed in LOCAL_INDEX_CORPORA are answered by rag_query from a local snapshot of
+their chunks instead of a remote rag.retrieval_query round-trip:
+
+- Source files are read from GCS, chunked like the RAG engine does (see chunking.py) and
+  embedded with the corpora's embedding model.
+- Normalized embeddings are stored as a float32 (or per-row scaled int8) matrix under
+  LOCAL_INDEX_DIR and memory-mapped, so a snapshot survives restarts without re-embedding.
+- Queries are a single matrix-vector product: cosine distance, top-k and distance
+  threshold match the remote retrieval settings.
+- Snapshots are rebuilt incrementally in the background: only files whose update time
+  changed are downloaded and embedded again.
+
+While a corpus' index is missing, being rebuilt after a change, or cannot be built (for
+example because the corpus holds PDFs or Drive files that cannot be read locally),
+rag_query transparently falls back to the remote retrieval.
+
+numpy is an optional dependency; without it every corpus uses remote retrieval.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..config import (
+    LOCAL_INDEX_CORPORA,
+    LOCAL_INDEX_DIR,
+    LOCAL_INDEX_QUANTIZATION,
+)
+from .chunking import chunk_text, get_chunking_profile
+from .corpus_events import on_corpus_changed
+from .corpus_sources import IndexUnavailable, download_source_texts, list_source_files
+from .embeddings import embed_query, embed_texts
+from .index_registry import BackgroundIndexRegistry
+from .ingest_manifest import corpus_key
+from .utils import get_corpus_resource_name
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: local indexes are disabled without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+_CURRENT_FILE = "CURRENT"
+
+
+class LocalIndex:
+    """
+    An immutable, memory-mapped snapshot of one corpus' chunk embeddings.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        vectors: (n_chunks, dim) float32 or int8 matrix of normalized embeddings
+        scales: Per-row dequantization scales for int8 vectors, else None
+        chunks (List[Tuple[str, str]]): (file_id, text) of each row
+        files (Dict[str, Dict]): file_id -> {"update_time", "source_uri", "source_name"}
+    """
+
+    def __init__(self, corpus_resource_name: str, vectors, scales, chunks, files):
+        self.corpus_resource_name = corpus_resource_name
+        self.vectors = vectors
+        self.scales = scales
+        self.chunks: List[Tuple[str, str]] = chunks
+        self.files: Dict[str, Dict] = files
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query_vector: List[float], top_k: int, distance_threshold: float) -> List[Dict]:
+        """
+        Return the top_k chunks closest to a query embedding.
+
+        Returns:
+            List[Dict]: Results shaped like rag_query's, "score" being the cosine distance
+        """
+        if not self.chunks:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        similarities = self.vectors @ query
+        if self.scales is not None:
+            similarities *= self.scales
+        distances = np.maximum(1.0 - similarities, 0.0)
+
+        candidates = np.flatnonzero(distances <= distance_threshold)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(distances[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+
+        results = []
+        for row in candidates:
+            file_id, text = self.chunks[row]
+            source = self.files.get(file_id, {})
+            results.append(
+                {
+                    "source_uri": source.get("source_uri", ""),
+                    "source_name": source.get("source_name", ""),
+                    "text": text,
+                    "score": float(distances[row]),
+                }
+            )
+        return results
+
+    def dense_rows(self, start: int, end: int):
+        """Return rows [start, end) as a float32 array, dequantizing int8 snapshots."""
+        rows = np.asarray(self.vectors[start:end], dtype=np.float32)
+        if self.scales is not None:
+            rows = rows * np.asarray(self.scales[start:end], dtype=np.float32)[:, None]
+        return rows
+
+
+def _corpus_dir(corpus_resource_name: str) -> str:
+    return os.path.join(LOCAL_INDEX_DIR, corpus_key(corpus_resource_name))
+
+
+def _load_snapshot(corpus_resource_name: str) -> Optional[LocalIndex]:
+    """Memory-map the current snapshot of a corpus, or return None if there is none."""
+    corpus_dir = _corpus_dir(corpus_resource_name)
+    try:
+        with open(os.path.join(corpus_dir, _CURRENT_FILE), encoding="utf-8") as f:
+            version_dir = os.path.join(corpus_dir, f.read().strip())
+        with open(os.path.join(version_dir, "chunks.json"), encoding="utf-8") as f:
+            metadata = json.load(f)
+        if (
+            metadata.get("version") != SNAPSHOT_VERSION
+            or metadata.get("corpus") != corpus_resource_name
+        ):
+            logger.warning(f"Ignoring incompatible local index snapshot in {version_dir}")
+            return None
+        vectors = np.load(os.path.join(version_dir, "vectors.npy"), mmap_mode="r")
+        scales = None
+        if metadata.get("quantization") == "int8":
+            scales = np.load(os.path.join(version_dir, "scales.npy"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load local index snapshot for {corpus_resource_name}: {e}")
+        return None
+
+    chunks = [(file_id, text) for file_id, text in metadata["chunks"]]
+    return LocalIndex(corpus_resource_name, vectors, scales, chunks, metadata["files"])
+
+
+def _write_snapshot(
+    corpus_resource_name: str, vectors, chunks: List[Tuple[str, str]], files: Dict[str, Dict]
+) -> LocalIndex:
+    """
+    Write a new snapshot version and atomically make it the current one.
+
+    Older versions are removed; indexes that still map them keep working until
+    they are dropped, since the files are only unlinked.
+    """
+    corpus_dir = _corpus_dir(corpus_resource_name)
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(corpus_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    quantization = "int8" if LOCAL_INDEX_QUANTIZATION == "int8" else "float32"
+    if quantization == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        stored = np.round(vectors / scales[:, None]).astype(np.int8)
+        np.save(os.path.join(version_dir, "scales.npy"), scales)
+    else:
+        stored = vectors.astype(np.float32)
+    np.save(os.path.join(version_dir, "vectors.npy"), stored)
+    with open(os.path.join(version_dir, "chunks.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": SNAPSHOT_VERSION,
+                "corpus": corpus_resource_name,
+                "quantization": quantization,
+                "files": files,
+                "chunks": chunks,
+            },
+            f,
+        )
+
+    current_tmp = os.path.join(corpus_dir, f"{_CURRENT_FILE}.tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(corpus_dir, _CURRENT_FILE))
+
+    for entry in os.listdir(corpus_dir):
+        if entry.startswith("v") and entry != version:
+            shutil.rmtree(os.path.join(corpus_dir, entry), ignore_errors=True)
+
+    loaded = _load_snapshot(corpus_resource_name)
+    if loaded is None:
+        raise IndexUnavailable(f"Snapshot written to {version_dir} could not be loaded")
+    return loaded
+
+
+def _build_index(corpus_resource_name: str, previous: Optional[LocalIndex]) -> Tuple[LocalIndex, Dict]:
+    """
+    Build a corpus' index, reusing the embeddings of files unchanged since `previous`.
+
+    Returns:
+        Tuple[LocalIndex, Dict]: The new index and refresh statistics
+
+    Raises:
+        IndexUnavailable: If a source file cannot be indexed locally
+    """
+    files = list_source_files(corpus_resource_name)
+
+    # Rows of each file in the previous snapshot, to reuse unchanged files' embeddings
+    previous_rows: Dict[str, Tuple[int, int]] = {}
+    if previous is not None:
+        for row, (file_id, _) in enumerate(previous.chunks):
+            start, _ = previous_rows.get(file_id, (row, row))
+            previous_rows[file_id] = (start, row + 1)
+    reused = {
+        file_id
+        for file_id, meta in files.items()
+        if file_id in previous_rows and previous.files.get(file_id) == meta
+    }
+    refetched = sorted(file_id for file_id in files if file_id not in reused)
+
+    texts = download_source_texts(files, refetched)
+    new_chunks = [
+        (file_id, chunk)
+        for file_id in refetched
+        for chunk in chunk_text(texts[file_id], **get_chunking_profile(files[file_id]["source_uri"])[1])
+    ]
+    new_vectors = np.asarray(
+        embed_texts([text for _, text in new_chunks]) if new_chunks else [], dtype=np.float32
+    )
+    if len(new_vectors):
+        new_vectors /= np.maximum(np.linalg.norm(new_vectors, axis=1, keepdims=True), 1e-12)
+
+    chunks: List[Tuple[str, str]] = []
+    blocks = []
+    for file_id in sorted(reused):
+        start, end = previous_rows[file_id]
+        chunks.extend(previous.chunks[start:end])
+        blocks.append(previous.dense_rows(start, end))
+    chunks.extend(new_chunks)
+    if len(new_vectors):
+        blocks.append(new_vectors)
+    vectors = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+    index = _write_snapshot(corpus_resource_name, vectors, chunks, files)
+    stats = {
+        "files": len(files),
+        "files_reused": len(reused),
+        "files_embedded": len(refetched),
+        "chunks": len(chunks),
+        "chunks_embedded": len(new_chunks),
+    }
+    logger.info(f"Refreshed local index for {corpus_resource_name}: {stats}")
+    return index, stats
+
+
+def _describe(index: LocalIndex) -> Dict:
+    return {
+        "chunks": len(index),
+        "files": len(index.files),
+        "quantization": "int8" if index.scales is not None else "float32",
+    }
+
+
+_registry = BackgroundIndexRegistry(
+    "local-index",
+    build=_build_index,
+    load=_load_snapshot,
+    discard=lambda corpus_resource_name: shutil.rmtree(
+        _corpus_dir(corpus_resource_name), ignore_errors=True
+    ),
+    describe=_describe,
+)
+
+
+def is_local_index_enabled(corpus_resource_name: str) -> bool:
+    """Whether a corpus is configured to be served from a local index."""
+    if np is None or not LOCAL_INDEX_CORPORA:
+        return False
+    for name in LOCAL_INDEX_CORPORA:
+        if name in (corpus_resource_name, corpus_key(corpus_resource_name)):
+            return True
+        if get_corpus_resource_name(name) == corpus_resource_name:
+            return True
+    return False
+
+
+def local_search(
+    corpus_resource_name: str, query: str, top_k: int, distance_threshold: float
+) -> Optional[List[Dict]]:
+    """
+    Answer a query from the corpus' local index.
+
+    Returns:
+        Optional[List[Dict]]: The results, or None if the index is not ready (or the
+                              query could not be embedded) and remote retrieval must be used
+    """
+    index = _registry.get(corpus_resource_name)
+    if index is None:
+        return None
+    try:
+        query_vector = embed_query(query)
+    except Exception as e:
+        logger.warning(f"Could not embed query for local retrieval, using remote retrieval: {e}")
+        return None
+    return index.search(query_vector, top_k, distance_threshold)
+
+
+def refresh_local_index(corpus_name: str) -> Dict:
+    """
+    Build or incrementally refresh a corpus' local index now, e.g. to warm it up.
+
+    Args:
+        corpus_name (str): The corpus display name or full resource name
+
+    Returns:
+        dict: Refresh statistics (files reused/embedded, chunks)
+
+    Raises:
+        IndexUnavailable: If numpy is missing or the corpus cannot be indexed locally
+    """
+    if np is None:
+        raise IndexUnavailable("numpy is not installed")
+    return _registry.refresh(get_corpus_resource_name(corpus_name))
+
+
+def get_local_index_stats() -> Dict[str, Dict]:
+    """Return, per corpus, the loaded index size or why it is unavailable."""
+    return _registry.stats()
+
+
+@on_corpus_changed
+def _on_corpus_changed(corpus_resource_name: str, deleted: bool) -> None:
+    if np is not None and is_local_index_enabled(corpus_resource_name):
+        _registry.mark_changed(corpus_resource_name, deleted)
@@ -2,7 +2,10 @@
 Tool for querying Vertex AI RAG corpora and retrieving relevant information.
 """
 
+import contextvars
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
@@ -10,27 +13,57 @@ from vertexai import rag
 from ..config import (
     DEFAULT_DISTANCE_THRESHOLD,
     DEFAULT_TOP_K,
+    HEDGED_RETRIEVAL_ENABLED,
+    RAG_QUERY_FANOUT_MAX_WORKERS,
+    RRF_K,
 )
+from .context_packing import pack_results
+from .embeddings import embed_query
+from .lexical_index import fuse_rankings, is_hybrid_retrieval_enabled, lexical_search
+from .local_index import is_local_index_enabled, local_search
+from .retrieval_cache import cache_results, get_cached_results, make_cache_key
+from .semantic_cache import (
+    cache_semantic_results,
+    get_semantic_match,
+    is_semantic_cache_enabled,
+)
+from .resilience import resilient_call
+from .telemetry import instrument_tool
 from .utils import check_corpus_exists, get_corpus_resource_name
 
+# Lexical searches run alongside the vector retrieval of the same query
+_lexical_executor = ThreadPoolExecutor(
+    max_workers=RAG_QUERY_FANOUT_MAX_WORKERS, thread_name_prefix="lexical-search"
+)
+
 
+@instrument_tool
 def rag_query(
     corpus_name: str,
     query: str,
     tool_context: ToolContext,
+    corpus_names: Optional[List[str]] = None,
 ) -> dict:
     """
-    Query a Vertex AI RAG corpus with a user question and return relevant information.
+    Query one or more Vertex AI RAG corpora with a user question and return relevant information.
 
     Args:
         corpus_name (str): The name of the corpus to query. If empty, the current corpus will be used.
                           Preferably use the resource_name from list_corpora results.
         query (str): The text query to search for in the corpus
         tool_context (ToolContext): The tool context
+        corpus_names (Optional[List[str]]): Additional corpora to query in the same call. When given,
+                          all corpora (including corpus_name, if not empty) are queried concurrently and
+                          their results merged into one ranked list, each tagged with its source corpus.
 
     Returns:
         dict: The query results and status
     """
+    if corpus_names:
+        targets = [corpus_name] if corpus_name else []
+        targets += [name for name in corpus_names if name and name not in targets]
+        return _fan_out_query(targets, query, tool_context)
+
     try:
 
         # Check if the corpus exists
@@ -45,15 +78,107 @@ def rag_query(
         # Get the corpus resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
-        # Configure retrieval parameters
-        rag_retrieval_config = rag.RagRetrievalConfig(
-            top_k=DEFAULT_TOP_K,
-            filter=rag.Filter(vector_distance_threshold=DEFAULT_DISTANCE_THRESHOLD),
+        results, cache_hit = _retrieve(corpus_resource_name, query)
+        return _build_query_response(corpus_name, query, results, cache_hit=cache_hit)
+
+    except Exception as e:
+        error_msg = f"Error querying corpus: {str(e)}"
+        logging.error(error_msg)
+        return {
+            "status": "error",
+            "message": error_msg,
+            "query": query,
+            "corpus_name": corpus_name,
+        }
+
+
+def _retrieve(corpus_resource_name: str, query: str) -> Tuple[List[Dict], bool]:
+    """
+    Retrieve the top contexts for a query from one corpus, using the exact-match and
+    semantic retrieval caches.
+
+    For corpora with hybrid retrieval enabled (HYBRID_RETRIEVAL_CORPORA), a BM25 search
+    of the corpus runs in parallel with the vector retrieval and, when it finds anything,
+    both rankings are merged with reciprocal-rank fusion.
+
+    Returns:
+        Tuple[List[Dict], bool]: The processed results and whether they came from the cache
+    """
+    # Serve repeated queries from the retrieval cache
+    cache_key = make_cache_key(
+        corpus_resource_name, query, DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD
+    )
+    results = get_cached_results(cache_key)
+    if results is not None:
+        return results, True
+
+    # Serve rephrasings of earlier queries from the semantic cache
+    query_embedding = None
+    if is_semantic_cache_enabled():
+        try:
+            query_embedding = embed_query(query)
+        except Exception as e:
+            logging.warning(f"Could not embed query for the semantic cache: {str(e)}")
+        if query_embedding is not None:
+            results = get_semantic_match(
+                corpus_resource_name, DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD, query, query_embedding
+            )
+            if results is not None:
+                cache_results(cache_key, results)
+                return results, True
+
+    lexical_future = None
+    if is_hybrid_retrieval_enabled(corpus_resource_name):
+        lexical_future = _lexical_executor.submit(
+            contextvars.copy_context().run, lexical_search, corpus_resource_name, query, DEFAULT_TOP_K
+        )
+
+    results = _vector_retrieve(corpus_resource_name, query)
+
+    if lexical_future is not None:
+        try:
+            lexical_results = lexical_future.result()
+        except Exception as e:
+            logging.warning(f"Lexical search failed, using vector results only: {str(e)}")
+            lexical_results = None
+        # Without lexical results (failed, index still building), keep the plain vector ranking
+        if lexical_results:
+            results = fuse_rankings([results, lexical_results], DEFAULT_TOP_K)
+
+    cache_results(cache_key, results)
+    if query_embedding is not None:
+        cache_semantic_results(
+            corpus_resource_name,
+            DEFAULT_TOP_K,
+            DEFAULT_DISTANCE_THRESHOLD,
+            query,
+            query_embedding,
+            results,
+        )
+    return results, False
+
+
+def _vector_retrieve(corpus_resource_name: str, query: str) -> List[Dict]:
+    """Retrieve the top contexts by vector similarity, locally for hot corpora."""
+    # Hot corpora are answered from their local vector index once it is ready
+    if is_local_index_enabled(corpus_resource_name):
+        results = local_search(
+            corpus_resource_name, query, DEFAULT_TOP_K, DEFAULT_DISTANCE_THRESHOLD
         )
+        if results is not None:
+            return results
+
+    # Configure retrieval parameters
+    rag_retrieval_config = rag.RagRetrievalConfig(
+        top_k=DEFAULT_TOP_K,
+        filter=rag.Filter(vector_distance_threshold=DEFAULT_DISTANCE_THRESHOLD),
+    )
 
-        # Perform the query
-        print("Performing retrieval query...")
-        response = rag.retrieval_query(
+    # Perform the query
+    logging.debug("Performing retrieval query...")
+    response = resilient_call(
+        "rag.retrieval_query",
+        lambda: rag.retrieval_query(
             rag_resources=[
                 rag.RagResource(
                     rag_corpus=corpus_resource_name,
@@ -61,52 +186,145 @@ def rag_query(
             ],
             text=query,
             rag_retrieval_config=rag_retrieval_config,
-        )
+        ),
+        hedge=HEDGED_RETRIEVAL_ENABLED,
+    )
 
-        # Process the response into a more usable format
-        results = []
-        if hasattr(response, "contexts") and response.contexts:
-            for ctx_group in response.contexts.contexts:
-                result = {
-                    "source_uri": (
-                        ctx_group.source_uri if hasattr(ctx_group, "source_uri") else ""
-                    ),
-                    "source_name": (
-                        ctx_group.source_display_name
-                        if hasattr(ctx_group, "source_display_name")
-                        else ""
-                    ),
-                    "text": ctx_group.text if hasattr(ctx_group, "text") else "",
-                    "score": ctx_group.score if hasattr(ctx_group, "score") else 0.0,
-                }
-                results.append(result)
-
-        # If we didn't find any results
-        if not results:
-            return {
-                "status": "warning",
-                "message": f"No results found in corpus '{corpus_name}' for query: '{query}'",
-                "query": query,
-                "corpus_name": corpus_name,
-                "results": [],
-                "results_count": 0,
+    # Process the response into a more usable format
+    results = []
+    if hasattr(response, "contexts") and response.contexts:
+        for ctx_group in response.contexts.contexts:
+            result = {
+                "source_uri": (
+                    ctx_group.source_uri if hasattr(ctx_group, "source_uri") else ""
+                ),
+                "source_name": (
+                    ctx_group.source_display_name
+                    if hasattr(ctx_group, "source_display_name")
+                    else ""
+                ),
+                "text": ctx_group.text if hasattr(ctx_group, "text") else "",
+                "score": ctx_group.score if hasattr(ctx_group, "score") else 0.0,
             }
+            results.append(result)
+
+    return results
+
 
+def _fan_out_query(corpus_names: List[str], query: str, tool_context: ToolContext) -> dict:
+    """
+    Query several corpora concurrently and merge their results into one ranked top-k.
+
+    Each corpus ranks its results on its own scale (vector distance, or fused with a
+    lexical ranking for hybrid corpora), so the corpora's lists are merged by rank, with
+    reciprocal-rank fusion (see _rank_key). Identical chunks returned by more than one
+    corpus are kept once, as returned by the corpus that ranked them best.
+    """
+    missing = [name for name in corpus_names if not check_corpus_exists(name, tool_context)]
+    existing = [name for name in corpus_names if name not in missing]
+    if not existing:
         return {
-            "status": "success",
-            "message": f"Successfully queried corpus '{corpus_name}'",
+            "status": "error",
+            "message": f"None of the corpora {corpus_names} exist. Please create them first using the create_corpus tool.",
             "query": query,
-            "corpus_name": corpus_name,
-            "results": results,
-            "results_count": len(results),
+            "corpus_names": corpus_names,
+            "missing_corpora": missing,
         }
 
-    except Exception as e:
-        error_msg = f"Error querying corpus: {str(e)}"
-        logging.error(error_msg)
+    resource_names = {name: get_corpus_resource_name(name) for name in existing}
+    corpus_errors: Dict[str, str] = {}
+    merged: Dict[Tuple[str, str], Dict] = {}
+    best_ranks: Dict[Tuple[str, str], int] = {}
+    fusion_scores: Dict[Tuple[str, str], float] = {}
+    all_cache_hits = True
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(existing), RAG_QUERY_FANOUT_MAX_WORKERS)
+    ) as executor:
+        futures = {
+            # Each corpus' retrieval runs in the tool call's context, so it shares its deadline
+            name: executor.submit(contextvars.copy_context().run, _retrieve, resource_names[name], query)
+            for name in existing
+        }
+        for name, future in futures.items():
+            try:
+                results, cache_hit = future.result()
+            except Exception as e:
+                corpus_errors[name] = str(e)
+                logging.error(f"Error querying corpus '{name}': {str(e)}")
+                continue
+            all_cache_hits = all_cache_hits and cache_hit
+            for rank, result in enumerate(results, start=1):
+                dedup_key = (result["source_uri"], result["text"])
+                fusion_scores[dedup_key] = fusion_scores.get(dedup_key, 0.0) + 1.0 / (RRF_K + rank)
+                if dedup_key not in merged or rank < best_ranks[dedup_key]:
+                    # Results may be cached: tag a copy
+                    merged[dedup_key] = {**result, "corpus_name": name}
+                    best_ranks[dedup_key] = rank
+
+    if len(corpus_errors) == len(existing):
         return {
             "status": "error",
-            "message": error_msg,
+            "message": f"Error querying corpora: {'; '.join(f'{k}: {v}' for k, v in corpus_errors.items())}",
+            "query": query,
+            "corpus_names": corpus_names,
+            "missing_corpora": missing,
+            "corpus_errors": corpus_errors,
+        }
+
+    ranked = sorted(merged, key=lambda dedup_key: _rank_key(merged[dedup_key], fusion_scores[dedup_key]))
+    results = [merged[dedup_key] for dedup_key in ranked[:DEFAULT_TOP_K]]
+    response = _build_query_response(
+        ", ".join(existing), query, results, cache_hit=all_cache_hits
+    )
+    response["corpus_names"] = corpus_names
+    response["missing_corpora"] = missing
+    response["corpus_errors"] = corpus_errors
+    return response
+
+
+def _rank_key(result: Dict, fusion_score: float) -> Tuple[float, float]:
+    """
+    Sort key of a fanned-out result, most relevant first.
+
+    Results rank by the reciprocal-rank fusion of their ranks in each corpus' results
+    (higher is better), then by vector distance (lower is better); lexical-only results
+    have no distance.
+    """
+    score = result.get("score")
+    return (-fusion_score, score if score is not None else float("inf"))
+
+
+def _build_query_response(
+    corpus_name: str, query: str, results: List[Dict], cache_hit: bool
+) -> dict:
+    """
+    Build the rag_query response for a list of processed results.
+
+    Results are packed (overlaps merged, near-duplicates dropped, token budget applied)
+    here, after caching, so the cache keeps the raw retrievals.
+    """
+    # If we didn't find any results
+    if not results:
+        return {
+            "status": "warning",
+            "message": f"No results found in corpus '{corpus_name}' for query: '{query}'",
             "query": query,
             "corpus_name": corpus_name,
+            "results": [],
+            "results_count": 0,
+            "cache_hit": cache_hit,
         }
+
+    results, packing = pack_results(results)
+    return {
+        "status": "success",
+        "message": f"Successfully queried corpus '{corpus_name}'",
+        "query": query,
+        "corpus_name": corpus_name,
+        "results": results,
+        "results_count": len(results),
+        "context_tokens": packing["tokens_out"],
+        "packing": packing,
+        "cache_hit": cache_hit,
+    }
@@ -0,0 +1,196 @@
+"""
+Process-wide governor of the embedding request quota.
+
+Every rag.import_files call is given its own max_embedding_requests_per_min, and local
+embedding requests (query embeddings, local index builds) draw on the same model quota.
+Left alone, concurrent ingests into several corpora each claim the full
+DEFAULT_EMBEDDING_REQUESTS_PER_MIN and collectively get throttled. The governor keeps
+one budget for the whole process:
+
+- Each import (import_in_batches call) opens a session; its batches lease a share of the
+  import budget for the duration of one rag.import_files call. Shares are split evenly
+  between active imports, then between an import's concurrent batches, and a batch waits
+  until enough of the budget is free, so the leases never add up to more than the budget.
+  Leases are short-lived, so shares rebalance batch by batch as imports start and finish.
+- Local embedding requests go through a token bucket refilled with the share reserved for
+  them (EMBEDDING_GOVERNOR_ONLINE_FRACTION) plus any import budget not leased.
+- Quota errors (HTTP 429 / RESOURCE_EXHAUSTED) cut the budget by
+  EMBEDDING_GOVERNOR_BACKOFF_FACTOR; it then grows back linearly towards the quota while
+  no further errors are seen.
+
+The current budget and leased share are exported as gauges (see telemetry).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from ..config import (
+    DEFAULT_EMBEDDING_REQUESTS_PER_MIN,
+    EMBEDDING_GOVERNOR_BACKOFF_COOLDOWN_SECONDS,
+    EMBEDDING_GOVERNOR_BACKOFF_FACTOR,
+    EMBEDDING_GOVERNOR_BURST,
+    EMBEDDING_GOVERNOR_MIN_FRACTION,
+    EMBEDDING_GOVERNOR_ONLINE_FRACTION,
+    EMBEDDING_GOVERNOR_RECOVERY_PER_MIN,
+)
+from .telemetry import register_gauge
+
+logger = logging.getLogger(__name__)
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Whether an exception reports an exhausted quota or rate limit (HTTP 429)."""
+    if getattr(error, "code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "resource_exhausted" in message or "quota" in message
+
+
+class ImportSession:
+    """One import's claim on the embedding budget; see EmbeddingRateGovernor.import_session."""
+
+    def __init__(self, governor: "EmbeddingRateGovernor", concurrency: int):
+        self._governor = governor
+        self.concurrency = concurrency
+
+    @contextmanager
+    def lease(self) -> Iterator[int]:
+        """Reserve this batch's share of the budget; yields it in requests per minute."""
+        requests_per_min = self._governor._acquire_lease(self)
+        try:
+            yield requests_per_min
+        finally:
+            self._governor._release_lease(requests_per_min)
+
+
+class EmbeddingRateGovernor:
+    """Shares an adaptive embedding request budget between imports and local requests."""
+
+    def __init__(self, quota_per_min: int):
+        self._quota = float(quota_per_min)
+        self._limit = self._quota
+        self._sessions: Dict[int, ImportSession] = {}
+        self._leased = 0.0
+        self._tokens = float(EMBEDDING_GOVERNOR_BURST)
+        self._updated_at = time.monotonic()
+        self._last_backoff_at = float("-inf")
+        self._throttled = 0
+        self._condition = threading.Condition()
+
+    # --- Budget bookkeeping (callers hold the condition's lock) ---
+    def _advance(self) -> None:
+        """Regrow the budget and refill the local token bucket for the time elapsed."""
+        now = time.monotonic()
+        minutes = (now - self._updated_at) / 60
+        self._updated_at = now
+        self._limit = min(self._quota, self._limit + self._quota * EMBEDDING_GOVERNOR_RECOVERY_PER_MIN * minutes)
+        online_rate = self._limit * EMBEDDING_GOVERNOR_ONLINE_FRACTION + max(0.0, self._import_budget() - self._leased)
+        self._tokens = min(float(EMBEDDING_GOVERNOR_BURST), self._tokens + online_rate * minutes)
+
+    def _import_budget(self) -> float:
+        return self._limit * (1 - EMBEDDING_GOVERNOR_ONLINE_FRACTION)
+
+    def _fair_share(self, session: ImportSession) -> float:
+        return self._import_budget() / max(1, len(self._sessions)) / session.concurrency
+
+    # --- Imports ---
+    @contextmanager
+    def import_session(self, concurrency: int) -> Iterator[ImportSession]:
+        """
+        Register an import running up to `concurrency` batches at a time.
+
+        Usage:
+            with governor.import_session(concurrency) as session:
+                with session.lease() as requests_per_min:
+                    rag.import_files(..., max_embedding_requests_per_min=requests_per_min)
+        """
+        session = ImportSession(self, max(1, concurrency))
+        with self._condition:
+            self._sessions[id(session)] = session
+        try:
+            yield session
+        finally:
+            with self._condition:
+                del self._sessions[id(session)]
+                self._condition.notify_all()
+
+    def _acquire_lease(self, session: ImportSession) -> int:
+        with self._condition:
+            while True:
+                self._advance()
+                fair_share = self._fair_share(session)
+                grant = min(fair_share, self._import_budget() - self._leased)
+                # Take at least half a fair share, so leases do not shrink towards nothing
+                # while the budget is fragmented; an idle budget is always granted
+                if grant >= fair_share / 2 or (self._leased == 0 and grant > 0):
+                    requests_per_min = max(1, int(grant))
+                    self._leased += requests_per_min
+                    return requests_per_min
+                self._condition.wait(timeout=1.0)
+
+    def _release_lease(self, requests_per_min: int) -> None:
+        with self._condition:
+            self._leased = max(0.0, self._leased - requests_per_min)
+            self._condition.notify_all()
+
+    # --- Local embedding requests ---
+    def acquire(self) -> None:
+        """Wait for a token of the local embedding request bucket."""
+        with self._condition:
+            while True:
+                self._advance()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                online_rate = self._limit * EMBEDDING_GOVERNOR_ONLINE_FRACTION + max(
+                    0.0, self._import_budget() - self._leased
+                )
+                self._condition.wait(timeout=min(1.0, 60 * (1 - self._tokens) / max(online_rate, 1.0)))
+
+    # --- Feedback ---
+    def report_throttled(self) -> None:
+        """Back off after a quota error (once per cooldown, as concurrent calls fail together)."""
+        with self._condition:
+            self._advance()
+            self._throttled += 1
+            now = time.monotonic()
+            if now - self._last_backoff_at < EMBEDDING_GOVERNOR_BACKOFF_COOLDOWN_SECONDS:
+                return
+            self._last_backoff_at = now
+            self._limit = max(
+                self._quota * EMBEDDING_GOVERNOR_MIN_FRACTION, self._limit * EMBEDDING_GOVERNOR_BACKOFF_FACTOR
+            )
+            logger.warning(f"Embedding quota exceeded: budget lowered to {self._limit:.0f} requests/min")
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            self._advance()
+            return {
+                "quota_per_min": self._quota,
+                "limit_per_min": round(self._limit, 1),
+                "import_leased_per_min": self._leased,
+                "active_imports": len(self._sessions),
+                "throttled": self._throttled,
+            }
+
+
+embedding_governor = EmbeddingRateGovernor(DEFAULT_EMBEDDING_REQUESTS_PER_MIN)
+
+register_gauge(
+    "rag_embedding_quota_limit_per_min",
+    "Embedding request budget currently allowed by the governor (requests/min)",
+    lambda: embedding_governor.stats()["limit_per_min"],
+)
+register_gauge(
+    "rag_embedding_quota_leased_per_min",
+    "Embedding request budget leased to running rag.import_files calls (requests/min)",
+    lambda: embedding_governor.stats()["import_leased_per_min"],
+)
+
+
+def get_embedding_governor_stats() -> Dict[str, float]:
+    """Return the embedding budget, its leased share, the active imports and the quota errors seen."""
+    return embedding_governor.stats()
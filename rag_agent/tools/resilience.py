@@ -0,0 +1,366 @@
+"""
+Retries, circuit breaking, deadlines and hedging for remote Vertex AI RAG and GCS calls.
+
+Remote calls go through resilient_call, which:
+- retries transient failures (unavailable, rate-limited, timed out) with full-jitter
+  exponential backoff,
+- fails fast with CircuitOpenError while an endpoint's circuit is open: a circuit opens
+  after CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive transient failures and lets a
+  single probe call through after CIRCUIT_BREAKER_RESET_SECONDS,
+- honours the deadline of the tool call it runs in (see tool_deadline): no attempt is
+  started and no backoff sleeps past it. Calls whose SDK accepts a timeout pass it
+  remote_timeout() and are made `timed`, so the request itself ends at the deadline;
+  other calls run on a per-endpoint thread pool and the caller stops waiting for them
+  when the deadline passes,
+- optionally hedges a call: if it has not answered within the endpoint's recent p95
+  latency, a duplicate request is sent and the first answer wins.
+
+Non-transient errors (not found, invalid argument, ...) are raised at once, so callers
+keep handling them as before. vertexai.rag re-raises every API error as
+`RuntimeError(...) from` it: errors are classified by the API error they wrap, and
+resilient_call raises that API error, so callers handle wrapped and plain errors alike.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from google.api_core import exceptions as api_exceptions
+
+from ..config import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    DEADLINE_CALL_MAX_WORKERS,
+    GCS_REQUEST_TIMEOUT_SECONDS,
+    HEDGE_LATENCY_PERCENTILE,
+    HEDGE_LATENCY_WINDOW,
+    HEDGE_MAX_WORKERS,
+    HEDGE_MIN_SAMPLES,
+    REMOTE_CALL_MAX_ATTEMPTS,
+    REMOTE_CALL_RETRY_BASE_SECONDS,
+    REMOTE_CALL_RETRY_MAX_SECONDS,
+)
+from .telemetry import remote_call
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_TRANSIENT_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a tool call's deadline passes before a remote call could complete."""
+
+
+def api_error(error: BaseException) -> BaseException:
+    """Return the API error a vertexai.rag RuntimeError wraps (following __cause__), or the error itself."""
+    while isinstance(error, RuntimeError) and isinstance(error.__cause__, Exception):
+        error = error.__cause__
+    return error
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a remote call failure, or the API error it wraps, is worth retrying."""
+    error = api_error(error)
+    return isinstance(error, _TRANSIENT_ERRORS) and not isinstance(error, DeadlineExceeded)
+
+
+# --- Deadlines ---
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("rag_tool_deadline", default=None)
+
+
+@contextmanager
+def tool_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the remote calls made within the block (and threads started with its context)
+    to `seconds` from now. Nested deadlines can only shorten the enclosing one.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def remote_timeout(default: float) -> float:
+    """
+    The timeout to give a single remote request: `default`, shortened to the time left
+    before the current deadline.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return default
+    # SDKs reject timeouts that are not positive
+    return max(0.01, min(default, remaining))
+
+
+def gcs_timeout() -> float:
+    """The timeout to give a single Cloud Storage request (see remote_timeout)."""
+    return remote_timeout(GCS_REQUEST_TIMEOUT_SECONDS)
+
+
+# --- Circuit breakers ---
+
+
+class _CircuitBreaker:
+    """Consecutive-failure circuit breaker of one endpoint."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < CIRCUIT_BREAKER_RESET_SECONDS or self._probing:
+                raise CircuitOpenError(f"{self.endpoint} is failing, calls are suspended for a while")
+            # Half-open: let one probe through
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit of {self.endpoint} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+                if self._opened_at is None or self._probing:
+                    logger.warning(f"Circuit of {self.endpoint} opened after {self._failures} failure(s)")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """End a probe that neither succeeded nor failed transiently."""
+        with self._lock:
+            self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or time.monotonic() - self._opened_at >= CIRCUIT_BREAKER_RESET_SECONDS:
+                return "half_open"
+            return "open"
+
+
+_breakers: Dict[str, _CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _get_breaker(endpoint: str) -> _CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = _CircuitBreaker(endpoint)
+        return breaker
+
+
+# --- Latency tracking for hedging ---
+
+_latencies: Dict[str, Deque[float]] = {}
+_latencies_lock = threading.Lock()
+
+_hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedged-call")
+
+# One pool per endpoint, so calls hung on one endpoint cannot starve the others
+_deadline_executors: Dict[str, ThreadPoolExecutor] = {}
+_deadline_executors_lock = threading.Lock()
+
+
+def _record_latency(endpoint: str, seconds: float) -> None:
+    with _latencies_lock:
+        window = _latencies.get(endpoint)
+        if window is None:
+            window = _latencies[endpoint] = deque(maxlen=HEDGE_LATENCY_WINDOW)
+        window.append(seconds)
+
+
+def _hedge_delay(endpoint: str) -> Optional[float]:
+    """The endpoint's recent latency percentile, or None until enough calls were seen."""
+    with _latencies_lock:
+        window = sorted(_latencies.get(endpoint, ()))
+    if len(window) < HEDGE_MIN_SAMPLES:
+        return None
+    return window[min(len(window) - 1, int(HEDGE_LATENCY_PERCENTILE * len(window)))]
+
+
+# --- Calls ---
+
+
+def _attempt(endpoint: str, fn: Callable[[], T]) -> T:
+    with remote_call(endpoint):
+        start = time.monotonic()
+        result = fn()
+    _record_latency(endpoint, time.monotonic() - start)
+    return result
+
+
+def _get_deadline_executor(endpoint: str) -> ThreadPoolExecutor:
+    with _deadline_executors_lock:
+        executor = _deadline_executors.get(endpoint)
+        if executor is None:
+            executor = _deadline_executors[endpoint] = ThreadPoolExecutor(
+                max_workers=DEADLINE_CALL_MAX_WORKERS, thread_name_prefix=f"deadline-{endpoint}"
+            )
+        return executor
+
+
+def _bounded_attempt(endpoint: str, fn: Callable[[], T]) -> T:
+    """
+    Run fn on the endpoint's deadline pool, waiting for it at most until the current
+    deadline. The request of an abandoned attempt keeps its thread until it ends.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return _attempt(endpoint, fn)
+    future = _get_deadline_executor(endpoint).submit(contextvars.copy_context().run, _attempt, endpoint, fn)
+    done, _ = wait({future}, timeout=max(0.0, remaining))
+    if not done:
+        future.cancel()
+        raise DeadlineExceeded(f"Deadline exceeded waiting for {endpoint}")
+    return future.result()
+
+
+def _hedged_attempt(endpoint: str, fn: Callable[[], T]) -> T:
+    """Run fn, sending a duplicate request if it is slower than the endpoint's usual tail."""
+    delay = _hedge_delay(endpoint)
+    remaining = remaining_time()
+    if delay is None or (remaining is not None and remaining <= delay):
+        return _bounded_attempt(endpoint, fn)
+
+    context = contextvars.copy_context()
+    pending = {_hedge_executor.submit(context.copy().run, _attempt, endpoint, fn)}
+    done, pending = wait(pending, timeout=delay)
+    if not done:
+        logger.info(f"Hedging {endpoint}: no answer after {delay * 1000:.0f} ms")
+        pending.add(_hedge_executor.submit(context.copy().run, _attempt, endpoint, fn))
+
+    error: Optional[BaseException] = None
+    while True:
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+        if not pending:
+            raise error
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded waiting for {endpoint}")
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+
+def resilient_call(
+    endpoint: str,
+    fn: Callable[[], T],
+    retry: bool = True,
+    hedge: bool = False,
+    timed: bool = False,
+) -> T:
+    """
+    Call a remote endpoint with retries, circuit breaking, the current deadline and
+    optional hedging, timing every attempt with remote_call.
+
+    Args:
+        endpoint (str): The remote operation name, e.g. "rag.retrieval_query"; circuit
+                        breakers and latency statistics are kept per endpoint
+        fn (Callable[[], T]): Performs the call
+        retry (bool): Whether transient failures may be retried; pass False for calls
+                      that are not idempotent or that are retried by the caller
+        hedge (bool): Whether a duplicate request may be sent when the call is slow;
+                      only for read-only calls
+        timed (bool): Whether fn passes remote_timeout() (or the deadline) to its
+                      request, which then ends by the deadline on its own: it is called
+                      on the caller's thread instead of a deadline pool's
+
+    Returns:
+        T: What fn returns
+
+    Raises:
+        Exception: The error of the last attempt; for vertexai.rag, the API error the
+                   SDK wrapped
+        CircuitOpenError: If the endpoint's circuit is open
+        DeadlineExceeded: If the tool call's deadline passed, before or during the call
+    """
+    breaker = _get_breaker(endpoint)
+    max_attempts = REMOTE_CALL_MAX_ATTEMPTS if retry else 1
+    for attempt in range(1, max_attempts + 1):
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded before calling {endpoint}")
+        breaker.before_call()
+        try:
+            if hedge:
+                result = _hedged_attempt(endpoint, fn)
+            elif timed:
+                result = _attempt(endpoint, fn)
+            else:
+                result = _bounded_attempt(endpoint, fn)
+        except Exception as e:
+            error = api_error(e)
+            if not is_transient_error(error):
+                breaker.release_probe()
+                raise error
+            breaker.record_failure()
+            if attempt == max_attempts:
+                raise error
+            delay = random.uniform(0, min(REMOTE_CALL_RETRY_MAX_SECONDS, REMOTE_CALL_RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                raise error
+            logger.warning(f"{endpoint} failed (attempt {attempt}/{max_attempts}): {error}. Retrying in {delay:.2f}s.")
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+def get_circuit_states() -> Dict[str, str]:
+    """Return the circuit state ("closed", "open" or "half_open") of every endpoint called so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.endpoint: breaker.state for breaker in breakers}
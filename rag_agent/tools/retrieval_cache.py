@@ -0,0 +1,130 @@
+"""
+In-memory cache of rag_query retrieval results.
+
+Entries are keyed by (corpus resource name, normalized query, top_k, distance threshold),
+evicted least-recently-used beyond RETRIEVAL_CACHE_MAX_ENTRIES and expired after
+RETRIEVAL_CACHE_TTL_SECONDS. A corpus' entries are dropped whenever a tool reports
+a change to it through corpus_events.notify_corpus_changed.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ..config import (
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+    RETRIEVAL_CACHE_TTL_SECONDS,
+)
+from .corpus_events import on_corpus_changed
+
+logger = logging.getLogger(__name__)
+
+_CacheKey = Tuple[str, str, int, float]
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups: case-folded, whitespace-collapsed."""
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+class _RetrievalCache:
+    """Thread-safe LRU + TTL cache of processed retrieval results."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[_CacheKey, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: _CacheKey) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self._ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(result) for result in entry[1]]
+
+    def put(self, key: _CacheKey, results: List[Dict]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, corpus_resource_name: Optional[str] = None) -> int:
+        with self._lock:
+            if corpus_resource_name is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if key[0] == corpus_resource_name]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_retrieval_cache = _RetrievalCache(
+    max_entries=RETRIEVAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS,
+)
+
+
+def make_cache_key(
+    corpus_resource_name: str, query: str, top_k: int, distance_threshold: float
+) -> _CacheKey:
+    """Build the cache key of a retrieval."""
+    return (corpus_resource_name, normalize_query(query), top_k, distance_threshold)
+
+
+def get_cached_results(key: _CacheKey) -> Optional[List[Dict]]:
+    """Return a copy of the cached results for a key, or None on a miss."""
+    return _retrieval_cache.get(key)
+
+
+def cache_results(key: _CacheKey, results: List[Dict]) -> None:
+    """Store the processed results of a retrieval."""
+    _retrieval_cache.put(key, results)
+
+
+def invalidate_retrieval_cache(corpus_resource_name: Optional[str] = None) -> None:
+    """
+    Drop cached retrievals for one corpus, or for every corpus if none is given.
+
+    Args:
+        corpus_resource_name (Optional[str]): The full resource name of the corpus
+    """
+    dropped = _retrieval_cache.invalidate(corpus_resource_name)
+    if dropped:
+        logger.info(f"Invalidated {dropped} cached retrieval(s) for {corpus_resource_name or 'all corpora'}")
+
+
+def get_retrieval_cache_stats() -> Dict[str, int]:
+    """Return the cache's entry count and hit/miss/eviction/invalidation counters."""
+    return _retrieval_cache.stats()
+
+
+@on_corpus_changed
+def _on_corpus_changed(corpus_resource_name: str, deleted: bool) -> None:
+    invalidate_retrieval_cache(corpus_resource_name)
@@ -0,0 +1,213 @@
+"""
+Semantic cache of rag_query retrievals, keyed on query embeddings.
+
+The exact-match retrieval cache misses rephrased questions ("faturamento Q3 do cliente X"
+vs "receita do terceiro trimestre do cliente X"). This cache keeps each retrieval's
+normalized query embedding next to its results and serves a new query from the most
+similar cached one of the same corpus (and retrieval settings) when their cosine
+similarity reaches SEMANTIC_CACHE_SIMILARITY_THRESHOLD and both queries hold the same
+numbers and quoted terms: "receita 2022" and "receita 2023" embed almost identically but
+must not share results.
+
+Entries are evicted least-recently-used beyond SEMANTIC_CACHE_MAX_ENTRIES across all
+corpora, expire after RETRIEVAL_CACHE_TTL_SECONDS and are dropped for a corpus whenever a
+tool reports a change to it. numpy is an optional dependency; without it the cache is
+disabled.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from ..config import (
+    RETRIEVAL_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+)
+from .corpus_events import on_corpus_changed
+from .retrieval_cache import normalize_query
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: the semantic cache is disabled without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# (corpus resource name, top_k, distance threshold): entries are only compared within one
+_Partition = Tuple[str, int, float]
+
+# Numbers ("2022", "3.5", "1,000") and quoted terms, which a similar query must repeat
+_ANCHOR_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|\"[^\"]+\"|“[^”]+”|(?<!\w)'[^']+'(?!\w)")
+
+
+def _anchor_tokens(query: str) -> FrozenSet[str]:
+    """Return the numbers and quoted terms of a normalized query."""
+    return frozenset(_ANCHOR_PATTERN.findall(query))
+
+
+class _SemanticCache:
+    """Thread-safe LRU + TTL cache of retrieval results, looked up by embedding similarity."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._similarity_threshold = similarity_threshold
+        # (partition, normalized query) -> (stored at, unit embedding, results)
+        self._entries: "OrderedDict[Tuple[_Partition, str], Tuple[float, object, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, partition: _Partition, query: str, embedding: List[float]) -> Optional[Tuple[List[Dict], float]]:
+        anchors = _anchor_tokens(query)
+        query_vector = _unit_vector(embedding)
+        now = time.monotonic()
+        with self._lock:
+            keys = []
+            vectors = []
+            for key, (stored_at, vector, _) in list(self._entries.items()):
+                if key[0] != partition:
+                    continue
+                if now - stored_at >= self._ttl_seconds:
+                    del self._entries[key]
+                    continue
+                keys.append(key)
+                vectors.append(vector)
+            if not keys:
+                self.misses += 1
+                return None
+
+            similarities = np.stack(vectors) @ query_vector
+            # The most similar query above the threshold with the same numbers and quoted terms
+            for best in np.argsort(-similarities):
+                similarity = float(similarities[best])
+                if similarity < self._similarity_threshold:
+                    break
+                key = keys[best]
+                if _anchor_tokens(key[1]) == anchors:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return [dict(result) for result in self._entries[key][2]], similarity
+            self.misses += 1
+            return None
+
+    def put(self, partition: _Partition, query: str, embedding: List[float], results: List[Dict]) -> None:
+        with self._lock:
+            key = (partition, query)
+            self._entries[key] = (
+                time.monotonic(),
+                _unit_vector(embedding),
+                [dict(result) for result in results],
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, corpus_resource_name: Optional[str] = None) -> int:
+        with self._lock:
+            if corpus_resource_name is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if key[0][0] == corpus_resource_name]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _unit_vector(embedding: List[float]):
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+_semantic_cache = _SemanticCache(
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS,
+    similarity_threshold=SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+)
+
+
+def is_semantic_cache_enabled() -> bool:
+    """Whether rag_query should look up and store retrievals by query embedding."""
+    return SEMANTIC_CACHE_ENABLED and np is not None
+
+
+def get_semantic_match(
+    corpus_resource_name: str,
+    top_k: int,
+    distance_threshold: float,
+    query: str,
+    embedding: List[float],
+) -> Optional[List[Dict]]:
+    """
+    Return a copy of the results of the most similar cached query, or None on a miss.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        top_k (int): The retrieval's top_k
+        distance_threshold (float): The retrieval's vector distance threshold
+        query (str): The new query
+        embedding (List[float]): The new query's embedding
+    """
+    match = _semantic_cache.get(
+        (corpus_resource_name, top_k, distance_threshold), normalize_query(query), embedding
+    )
+    if match is None:
+        return None
+    results, similarity = match
+    logger.info(f"Semantic cache hit for {corpus_resource_name} (similarity {similarity:.3f})")
+    return results
+
+
+def cache_semantic_results(
+    corpus_resource_name: str,
+    top_k: int,
+    distance_threshold: float,
+    query: str,
+    embedding: List[float],
+    results: List[Dict],
+) -> None:
+    """Store the results of a retrieval under its query embedding."""
+    _semantic_cache.put(
+        (corpus_resource_name, top_k, distance_threshold), normalize_query(query), embedding, results
+    )
+
+
+def invalidate_semantic_cache(corpus_resource_name: Optional[str] = None) -> None:
+    """
+    Drop semantically cached retrievals for one corpus, or for every corpus if none is given.
+
+    Args:
+        corpus_resource_name (Optional[str]): The full resource name of the corpus
+    """
+    dropped = _semantic_cache.invalidate(corpus_resource_name)
+    if dropped:
+        logger.info(f"Invalidated {dropped} semantic cache entr(ies) for {corpus_resource_name or 'all corpora'}")
+
+
+def get_semantic_cache_stats() -> Dict[str, int]:
+    """Return the cache's entry count and hit/miss/eviction/invalidation counters."""
+    return _semantic_cache.stats()
+
+
+@on_corpus_changed
+def _on_corpus_changed(corpus_resource_name: str, deleted: bool) -> None:
+    invalidate_semantic_cache(corpus_resource_name)
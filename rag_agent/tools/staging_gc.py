@@ -0,0 +1,221 @@
+"""
+Garbage collection of the GitHub ingestion staging area.
+
+Staged content is shared between corpora and repositories (see ingest_manifest), so no
+single ingest or deletion can tell when a staged object is no longer needed. The
+collector tracks references instead: the manifests of existing corpora and the source
+URIs of their RAG files reference the objects those files were imported from (files
+deleted or imported outside a manifest included), and a content store object is
+referenced while any referenced object holds its content. Every other object under the
+staging prefix is deleted, together with the manifests and content indexes of deleted
+corpora. Objects left behind by earlier staging layouts are kept while a corpus file
+still points at them, and collected like any other unreferenced object afterwards.
+
+Objects written or reused within STAGING_GC_MIN_AGE_SECONDS are kept, so ingests still
+in flight, whose manifests are saved last, are never collected from under them.
+
+A collection runs in the background after a corpus is deleted, and can be scheduled
+with `python -m rag_agent.tools.staging_gc [--dry-run]`.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from google.api_core.exceptions import NotFound
+from vertexai import rag
+
+from ..config import STAGING_GC_MAX_WORKERS, STAGING_GC_MIN_AGE_SECONDS
+from .add_data import TEMP_GCS_BUCKET_NAME, TEMP_GCS_PREFIX
+from .clients import get_storage_client
+from .content_dedup import CONTENT_INDEX_SUBPREFIX
+from .corpus_events import on_corpus_changed
+from .ingest_manifest import MANIFESTS_SUBPREFIX, STAGED_OBJECTS_SUBPREFIX, STAGED_REPOS_SUBPREFIX, corpus_key
+from .resilience import gcs_timeout, resilient_call
+from .utils import ensure_vertexai_initialized, get_rag_file_source_uri
+
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+
+def _owning_corpus(blob_name: str, base_prefix: str) -> Optional[str]:
+    """Return the corpus ID a manifest or content index belongs to, or None for staged objects."""
+    relative = blob_name[len(base_prefix) + 1 :]
+    if relative.startswith(f"{MANIFESTS_SUBPREFIX}/"):
+        return relative.split("/")[1]
+    if relative.startswith(f"{CONTENT_INDEX_SUBPREFIX}/"):
+        return relative.split("/")[1].rsplit(".json", 1)[0]
+    return None
+
+
+def _content_hash(blob_name: str, base_prefix: str) -> Optional[str]:
+    """Return the content hash of a repository file or content store object, or None."""
+    parts = blob_name[len(base_prefix) + 1 :].split("/")
+    if parts[0] == STAGED_REPOS_SUBPREFIX and len(parts) > 3:
+        return parts[2]
+    if parts[0] == STAGED_OBJECTS_SUBPREFIX and len(parts) == 2:
+        return parts[1]
+    return None
+
+
+def _manifest_references(blob: "storage.Blob") -> Set[str]:
+    """Return the staged object URIs a manifest references."""
+    manifest = json.loads(
+        resilient_call("gcs.download_as_bytes", lambda: blob.download_as_bytes(timeout=gcs_timeout()), timed=True)
+    )
+    return {entry["gcs_uri"] for entry in manifest.get("files", {}).values() if entry.get("gcs_uri")}
+
+
+def _corpus_references(corpus_resource_name: str) -> Set[str]:
+    """Return the source URIs of a corpus' RAG files."""
+    rag_files = resilient_call("rag.list_files", lambda: list(rag.list_files(corpus_resource_name)))
+    return {get_rag_file_source_uri(rag_file) for rag_file in rag_files}
+
+
+def collect_staging_garbage(
+    dry_run: bool = False,
+    min_age_seconds: float = STAGING_GC_MIN_AGE_SECONDS,
+    storage_client: Optional["storage.Client"] = None,
+) -> Dict:
+    """
+    Delete the staging objects no existing corpus references, and the manifests and
+    content indexes of deleted corpora.
+
+    Args:
+        dry_run (bool): Only report what would be deleted
+        min_age_seconds (float): Keep unreferenced objects updated more recently than this
+        storage_client (Optional[storage.Client]): The GCS client to use, by default the
+                                                   process' shared one
+
+    Returns:
+        dict: Counts of live corpora, manifests read, referenced and recently updated
+              objects kept, objects and bytes deleted, and deletion errors
+
+    Raises:
+        Exception: If the corpora, a live corpus' files or manifest cannot be read;
+                   nothing is deleted then, since unreferenced objects cannot be told apart
+    """
+    ensure_vertexai_initialized()
+    bucket = (storage_client or get_storage_client()).bucket(TEMP_GCS_BUCKET_NAME)
+    corpus_names = [corpus.name for corpus in resilient_call("rag.list_corpora", lambda: list(rag.list_corpora()))]
+    live_corpora = {corpus_key(name) for name in corpus_names}
+    blobs = resilient_call(
+        "gcs.list", lambda: list(bucket.list_blobs(prefix=f"{TEMP_GCS_PREFIX}/", timeout=gcs_timeout())), timed=True
+    )
+
+    garbage: List["storage.Blob"] = []
+    manifests: List["storage.Blob"] = []
+    staged: List["storage.Blob"] = []
+    for blob in blobs:
+        owner = _owning_corpus(blob.name, TEMP_GCS_PREFIX)
+        if owner is None:
+            staged.append(blob)
+        elif owner not in live_corpora:
+            garbage.append(blob)
+        elif blob.name.startswith(f"{TEMP_GCS_PREFIX}/{MANIFESTS_SUBPREFIX}/"):
+            manifests.append(blob)
+
+    with ThreadPoolExecutor(max_workers=STAGING_GC_MAX_WORKERS, thread_name_prefix="staging-gc") as executor:
+        referenced: Set[str] = set()
+        for references in executor.map(_manifest_references, manifests):
+            referenced |= references
+        for references in executor.map(_corpus_references, corpus_names):
+            referenced |= references
+        # Content store objects are referenced through the files holding their content
+        uri_prefix = f"gs://{bucket.name}/"
+        referenced_hashes = {
+            _content_hash(uri[len(uri_prefix) :], TEMP_GCS_PREFIX) for uri in referenced if uri.startswith(uri_prefix)
+        }
+        referenced_hashes.discard(None)
+
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=min_age_seconds)
+        kept_referenced = 0
+        kept_recent = 0
+        for blob in staged:
+            if f"{uri_prefix}{blob.name}" in referenced or (
+                blob.name.startswith(f"{TEMP_GCS_PREFIX}/{STAGED_OBJECTS_SUBPREFIX}/")
+                and _content_hash(blob.name, TEMP_GCS_PREFIX) in referenced_hashes
+            ):
+                kept_referenced += 1
+                continue
+            if blob.updated is not None and blob.updated > cutoff:
+                kept_recent += 1
+                continue
+            garbage.append(blob)
+
+        errors: List[str] = []
+
+        def delete(blob: "storage.Blob") -> bool:
+            try:
+                resilient_call("gcs.delete", lambda: blob.delete(timeout=gcs_timeout()), timed=True)
+            except NotFound:
+                pass
+            except Exception as e:
+                errors.append(f"{blob.name}: {e}")
+                return False
+            return True
+
+        deleted = garbage if dry_run else [blob for blob, ok in zip(garbage, executor.map(delete, garbage)) if ok]
+
+    report = {
+        "dry_run": dry_run,
+        "live_corpora": len(live_corpora),
+        "manifests": len(manifests),
+        "referenced_objects": kept_referenced,
+        "kept_recent_objects": kept_recent,
+        "deleted_objects": len(deleted),
+        "deleted_bytes": sum(blob.size or 0 for blob in deleted),
+        "errors": errors,
+    }
+    logger.info(
+        f"Staging garbage collection{' (dry run)' if dry_run else ''}: "
+        f"{report['deleted_objects']} object(s), {report['deleted_bytes']} bytes deleted, "
+        f"{kept_referenced} referenced and {kept_recent} recent object(s) kept, {len(errors)} error(s)."
+    )
+    return report
+
+
+# --- Background collection after corpus deletions ---
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="staging-gc-scheduler")
+_pending = False
+_pending_lock = threading.Lock()
+
+
+def _run_scheduled() -> None:
+    global _pending
+    with _pending_lock:
+        _pending = False
+    try:
+        collect_staging_garbage()
+    except Exception as e:
+        logger.warning(f"Staging garbage collection failed: {e}")
+
+
+def schedule_staging_gc() -> None:
+    """Queue a background collection; requests made while one is queued are merged into it."""
+    global _pending
+    with _pending_lock:
+        if _pending:
+            return
+        _pending = True
+    _executor.submit(_run_scheduled)
+
+
+@on_corpus_changed
+def _on_corpus_changed(corpus_resource_name: str, deleted: bool) -> None:
+    if deleted:
+        schedule_staging_gc()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Delete unreferenced objects of the GitHub ingestion staging area.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    print(json.dumps(collect_staging_garbage(dry_run=parser.parse_args().dry_run), indent=2))
@@ -0,0 +1,282 @@
+"""
+Latency metrics and tracing for the RAG tools.
+
+Every tool call and every remote call (Vertex AI RAG, Cloud Storage, git) is timed into
+an in-process latency histogram labelled by name and outcome, which gives call counts
+and error rates as well. Other modules can register gauges, read when metrics are
+exported. Metrics can be exported in the Prometheus text format with
+export_prometheus_text().
+
+When OpenTelemetry is installed, each timed call is also recorded as a span. Without an
+exporter configured (TELEMETRY_EXPORTER="none") the OpenTelemetry API is a no-op, so
+local runs pay only for the histogram bookkeeping.
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from ..config import (
+    TELEMETRY_EXPORTER,
+    TELEMETRY_LATENCY_BUCKETS_SECONDS,
+    TOOL_DEADLINE_SECONDS,
+    TOOL_DEFAULT_DEADLINE_SECONDS,
+)
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # OpenTelemetry is optional
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+_TRACER_NAME = "rag_agent"
+
+
+class _Histogram:
+    """Cumulative latency histogram with fixed bucket bounds."""
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.bucket_counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+
+class _MetricsRegistry:
+    """Thread-safe store of latency histograms keyed by (metric, name, status)."""
+
+    def __init__(self, bounds: List[float]):
+        self._bounds = bounds
+        self._histograms: Dict[Tuple[str, str, str], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, name: str, status: str, seconds: float) -> None:
+        key = (metric, name, status)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self._bounds)
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[Tuple[str, str, str], _Histogram]:
+        with self._lock:
+            copies = {}
+            for key, histogram in self._histograms.items():
+                copy = _Histogram(histogram.bounds)
+                copy.bucket_counts = list(histogram.bucket_counts)
+                copy.count = histogram.count
+                copy.sum = histogram.sum
+                copies[key] = copy
+            return copies
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {}
+
+
+_registry = _MetricsRegistry(TELEMETRY_LATENCY_BUCKETS_SECONDS)
+
+# Metric name -> (label holding the measured name, help text)
+_METRICS = {
+    "rag_tool_duration_seconds": ("tool", "Latency of RAG tool calls"),
+    "rag_remote_call_duration_seconds": ("operation", "Latency of remote Vertex AI/GCS/git calls"),
+}
+
+# Gauge metric name -> (help text, function reading its current value)
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+_exporter_lock = threading.Lock()
+_exporter_configured = False
+
+
+def configure_telemetry() -> None:
+    """
+    Install the span exporter selected by TELEMETRY_EXPORTER, once per process.
+
+    "none" leaves the OpenTelemetry no-op tracer in place. Unknown exporters or missing
+    optional packages are logged and fall back to "none".
+    """
+    global _exporter_configured
+    if _exporter_configured:
+        return
+    with _exporter_lock:
+        if _exporter_configured:
+            return
+        _exporter_configured = True
+        if TELEMETRY_EXPORTER == "none" or trace is None:
+            return
+        try:
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            if TELEMETRY_EXPORTER == "console":
+                from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+                exporter = ConsoleSpanExporter()
+            elif TELEMETRY_EXPORTER == "otlp":
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+                    OTLPSpanExporter,
+                )
+
+                exporter = OTLPSpanExporter()
+            else:
+                logger.warning(f"Unknown telemetry exporter '{TELEMETRY_EXPORTER}', tracing disabled")
+                return
+
+            provider = TracerProvider()
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+            trace.set_tracer_provider(provider)
+        except ImportError as e:
+            logger.warning(f"Telemetry exporter '{TELEMETRY_EXPORTER}' unavailable: {e}")
+
+
+@contextmanager
+def _timed(metric: str, name: str, span_name: str) -> Iterator[Dict[str, str]]:
+    """
+    Time a block into `metric`, inside an OpenTelemetry span when available.
+
+    Yields a dict whose "status" the block may set to "error" for failures that are
+    reported without raising; exceptions are always recorded as errors.
+    """
+    outcome = {"status": "ok"}
+    start = time.perf_counter()
+    span_cm = (
+        trace.get_tracer(_TRACER_NAME).start_as_current_span(span_name)
+        if trace is not None
+        else None
+    )
+    span = span_cm.__enter__() if span_cm is not None else None
+    try:
+        yield outcome
+    except BaseException as e:
+        outcome["status"] = "error"
+        if span is not None:
+            span.record_exception(e)
+        raise
+    finally:
+        _registry.observe(metric, name, outcome["status"], time.perf_counter() - start)
+        if span_cm is not None:
+            if outcome["status"] == "error":
+                span.set_status(Status(StatusCode.ERROR))
+            span_cm.__exit__(None, None, None)
+
+
+@contextmanager
+def remote_call(operation: str) -> Iterator[Dict[str, str]]:
+    """
+    Time a remote call, e.g. `with remote_call("rag.retrieval_query"): ...`.
+
+    Args:
+        operation (str): The remote operation name, such as "rag.list_corpora",
+                         "gcs.upload" or "git.clone"
+    """
+    with _timed("rag_remote_call_duration_seconds", operation, operation) as outcome:
+        yield outcome
+
+
+def instrument_tool(tool: Callable[..., dict]) -> Callable[..., dict]:
+    """
+    Wrap a tool so each call is timed and traced, and its remote calls share the tool's
+    deadline (TOOL_DEADLINE_SECONDS). A returned dict with status "error" counts as a
+    failed call.
+
+    The wrapper keeps the tool's name, docstring and signature for ADK.
+    """
+    # Imported here: resilience times its remote calls with this module
+    from .resilience import tool_deadline
+
+    configure_telemetry()
+    tool_name = tool.__name__
+    deadline_seconds = TOOL_DEADLINE_SECONDS.get(tool_name, TOOL_DEFAULT_DEADLINE_SECONDS)
+
+    @functools.wraps(tool)
+    def instrumented(*args, **kwargs) -> dict:
+        with tool_deadline(deadline_seconds), _timed(
+            "rag_tool_duration_seconds", tool_name, f"tool.{tool_name}"
+        ) as outcome:
+            result = tool(*args, **kwargs)
+            if isinstance(result, dict) and result.get("status") == "error":
+                outcome["status"] = "error"
+            return result
+
+    return instrumented
+
+
+def get_telemetry_snapshot() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Return per-name call counts, error counts and mean latencies, for debugging.
+
+    Returns:
+        dict: {metric: {name: {"calls", "errors", "mean_seconds"}}}
+    """
+    summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (metric, name, status), histogram in _registry.snapshot().items():
+        entry = summary.setdefault(metric, {}).setdefault(
+            name, {"calls": 0, "errors": 0, "total_seconds": 0.0}
+        )
+        entry["calls"] += histogram.count
+        entry["total_seconds"] += histogram.sum
+        if status == "error":
+            entry["errors"] += histogram.count
+    for names in summary.values():
+        for entry in names.values():
+            entry["mean_seconds"] = entry.pop("total_seconds") / entry["calls"]
+    return summary
+
+
+def register_gauge(metric: str, help_text: str, read: Callable[[], float]) -> None:
+    """
+    Register a gauge whose value is read by `read` whenever metrics are exported.
+
+    Args:
+        metric (str): The Prometheus metric name, e.g. "rag_embedding_quota_limit_per_min"
+        help_text (str): The metric's help text
+        read (Callable[[], float]): Returns the gauge's current value
+    """
+    _gauges[metric] = (help_text, read)
+
+
+def reset_telemetry() -> None:
+    """Drop every recorded metric."""
+    _registry.reset()
+
+
+def export_prometheus_text() -> str:
+    """Render every latency histogram and gauge in the Prometheus text exposition format."""
+    snapshot = _registry.snapshot()
+    lines: List[str] = []
+    for metric, (label, help_text) in _METRICS.items():
+        series = sorted(
+            (key, histogram) for key, histogram in snapshot.items() if key[0] == metric
+        )
+        if not series:
+            continue
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for (_, name, status), histogram in series:
+            labels = f'{label}="{name}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.bucket_counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    for metric, (help_text, read) in sorted(_gauges.items()):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {read()}")
+    return "\n".join(lines) + "\n" if lines else ""
@@ -4,17 +4,166 @@ Utility functions for the RAG tools.
 
 import logging
 import re
+import threading
+import time
+from typing import Dict, Optional
 
+import vertexai
 from google.adk.tools.tool_context import ToolContext
 from vertexai import rag
 
 from ..config import (
+    CORPUS_CATALOG_MIN_REFRESH_INTERVAL_SECONDS,
+    CORPUS_CATALOG_TTL_SECONDS,
     LOCATION,
     PROJECT_ID,
 )
+from .clients import get_credentials, install_rag_clients
+from .resilience import resilient_call
 
 logger = logging.getLogger(__name__)
 
+_vertexai_init_lock = threading.Lock()
+_vertexai_initialized = False
+
+
+def ensure_vertexai_initialized() -> None:
+    """
+    Initialize Vertex AI on first use instead of at package import time.
+
+    Thread-safe and idempotent. A failed initialization is logged and retried on the
+    next call, so tools report the underlying error instead of failing at import.
+    Vertex AI is given the process' shared credentials, and vertexai.rag the shared
+    clients (see tools.clients).
+    """
+    global _vertexai_initialized
+    if _vertexai_initialized:
+        return
+
+    with _vertexai_init_lock:
+        if _vertexai_initialized:
+            return
+        if not (PROJECT_ID and LOCATION):
+            logger.warning(
+                f"Missing Vertex AI configuration. PROJECT_ID={PROJECT_ID}, LOCATION={LOCATION}. "
+                f"Tools requiring Vertex AI may not work properly."
+            )
+            _vertexai_initialized = True
+            return
+        try:
+            logger.info(f"Initializing Vertex AI with project={PROJECT_ID}, location={LOCATION}")
+            vertexai.init(project=PROJECT_ID, location=LOCATION, credentials=get_credentials())
+            install_rag_clients()
+            _vertexai_initialized = True
+        except Exception as e:
+            logger.error(
+                f"Failed to initialize Vertex AI: {str(e)}. "
+                "Please check your Google Cloud credentials and project settings."
+            )
+
+
+_RESOURCE_NAME_PATTERN = re.compile(
+    r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$"
+)
+
+
+class _CorpusCatalog:
+    """
+    Process-wide cache of display-name <-> resource-name mappings for RAG corpora.
+
+    The catalog is loaded from a single rag.list_corpora() call and reused until its
+    TTL expires. A lookup miss forces a refresh (rate limited so that repeated lookups
+    of a missing corpus do not turn into a listing per call). All access is guarded by
+    a lock, so concurrent tool calls share one listing instead of racing to reload it.
+    """
+
+    def __init__(self, ttl_seconds: float, min_refresh_interval_seconds: float):
+        self._ttl_seconds = ttl_seconds
+        self._min_refresh_interval_seconds = min_refresh_interval_seconds
+        self._lock = threading.Lock()
+        self._by_display_name: Dict[str, str] = {}
+        self._by_resource_name: Dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+
+    def _refresh_locked(self) -> None:
+        corpora = resilient_call("rag.list_corpora", lambda: list(rag.list_corpora()))
+        by_display_name: Dict[str, str] = {}
+        by_resource_name: Dict[str, str] = {}
+        for corpus in corpora:
+            display_name = getattr(corpus, "display_name", "") or ""
+            by_resource_name[corpus.name] = display_name
+            if display_name:
+                by_display_name[display_name] = corpus.name
+        self._by_display_name = by_display_name
+        self._by_resource_name = by_resource_name
+        self._loaded_at = time.monotonic()
+        logger.info(f"Corpus catalog refreshed with {len(by_resource_name)} corpora")
+
+    def _ensure_fresh_locked(self) -> None:
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self._ttl_seconds
+        ):
+            self._refresh_locked()
+
+    def _refresh_on_miss_locked(self) -> bool:
+        """Refresh after a lookup miss unless the catalog was just reloaded."""
+        if (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at
+            < self._min_refresh_interval_seconds
+        ):
+            return False
+        self._refresh_locked()
+        return True
+
+    def resolve(self, display_name: str) -> Optional[str]:
+        """Return the resource name for a display name, or None if it is unknown."""
+        with self._lock:
+            self._ensure_fresh_locked()
+            resource_name = self._by_display_name.get(display_name)
+            if resource_name is None and self._refresh_on_miss_locked():
+                resource_name = self._by_display_name.get(display_name)
+            return resource_name
+
+    def contains(self, corpus_name: str, resource_name: str) -> bool:
+        """Return True if the corpus is known by either its display or resource name."""
+        with self._lock:
+            self._ensure_fresh_locked()
+            if self._contains_locked(corpus_name, resource_name):
+                return True
+            if self._refresh_on_miss_locked():
+                return self._contains_locked(corpus_name, resource_name)
+            return False
+
+    def _contains_locked(self, corpus_name: str, resource_name: str) -> bool:
+        return (
+            resource_name in self._by_resource_name
+            or corpus_name in self._by_display_name
+        )
+
+    def invalidate(self) -> None:
+        """Drop the cached catalog so the next lookup reloads it."""
+        with self._lock:
+            self._by_display_name = {}
+            self._by_resource_name = {}
+            self._loaded_at = None
+
+
+_corpus_catalog = _CorpusCatalog(
+    ttl_seconds=CORPUS_CATALOG_TTL_SECONDS,
+    min_refresh_interval_seconds=CORPUS_CATALOG_MIN_REFRESH_INTERVAL_SECONDS,
+)
+
+
+def invalidate_corpus_catalog() -> None:
+    """
+    Invalidate the process-wide corpus catalog cache.
+
+    Must be called after any operation that creates, renames or deletes a corpus.
+    """
+    _corpus_catalog.invalidate()
+
 
 def get_corpus_resource_name(corpus_name: str) -> str:
     """
@@ -30,16 +179,14 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     logger.info(f"Getting resource name for corpus: {corpus_name}")
 
     # If it's already a full resource name with the projects/locations/ragCorpora format
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if _RESOURCE_NAME_PATTERN.match(corpus_name):
         return corpus_name
 
     # Check if this is a display name of an existing corpus
     try:
-        # List all corpora and check if there's a match with the display name
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if hasattr(corpus, "display_name") and corpus.display_name == corpus_name:
-                return corpus.name
+        resource_name = _corpus_catalog.resolve(corpus_name)
+        if resource_name:
+            return resource_name
     except Exception as e:
         logger.warning(f"Error when checking for corpus display name: {str(e)}")
         # If we can't check, continue with the default behavior
@@ -59,17 +206,20 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     return f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
 
 
-def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
+def check_corpus_exists(corpus_name: str, tool_context: ToolContext, set_current: bool = True) -> bool:
     """
     Check if a corpus with the given name exists.
 
     Args:
         corpus_name (str): The name of the corpus to check
         tool_context (ToolContext): The tool context for state management
+        set_current (bool): Whether an existing corpus becomes the current corpus if none is set
 
     Returns:
         bool: True if the corpus exists, False otherwise
     """
+    ensure_vertexai_initialized()
+
     # Check state first if tool_context is provided
     if tool_context.state.get(f"corpus_exists_{corpus_name}"):
         return True
@@ -78,19 +228,14 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
         # Get full resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
-        # List all corpora and check if this one exists
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if (
-                corpus.name == corpus_resource_name
-                or corpus.display_name == corpus_name
-            ):
-                # Update state
-                tool_context.state[f"corpus_exists_{corpus_name}"] = True
-                # Also set this as the current corpus if no current corpus is set
-                if not tool_context.state.get("current_corpus"):
-                    tool_context.state["current_corpus"] = corpus_name
-                return True
+        # Check the cached catalog (refreshed on a miss) for this corpus
+        if _corpus_catalog.contains(corpus_name, corpus_resource_name):
+            # Update state
+            tool_context.state[f"corpus_exists_{corpus_name}"] = True
+            # Also set this as the current corpus if no current corpus is set
+            if set_current and not tool_context.state.get("current_corpus"):
+                tool_context.state["current_corpus"] = corpus_name
+            return True
 
         return False
     except Exception as e:
@@ -115,3 +260,25 @@ def set_current_corpus(corpus_name: str, tool_context: ToolContext) -> bool:
         tool_context.state["current_corpus"] = corpus_name
         return True
     return False
+
+
+def get_rag_file_source_uri(rag_file) -> str:
+    """
+    Return the source URI a RAG file was imported from.
+
+    Args:
+        rag_file: A RagFile as returned by rag.list_files or rag.get_file
+
+    Returns:
+        str: The GCS/Drive source URI, or an empty string if it cannot be determined
+    """
+    gcs_source = getattr(rag_file, "gcs_source", None)
+    if gcs_source is not None and getattr(gcs_source, "uris", None):
+        return gcs_source.uris[0]
+
+    drive_source = getattr(rag_file, "google_drive_source", None)
+    resource_ids = getattr(drive_source, "resource_ids", None) if drive_source else None
+    if resource_ids:
+        return f"https://drive.google.com/file/d/{resource_ids[0].resource_id}/view"
+
+    return getattr(rag_file, "source_uri", "") or ""
@@ -0,0 +1,7 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Make rag_agent and benchmarks importable however pytest is started
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,108 @@
+from unittest import mock
+
+import pytest
+
+from benchmarks.fake_backend import FakeBackend, FakeToolContext
+from rag_agent.tools.add_data import TEMP_GCS_BUCKET_NAME, TEMP_GCS_PREFIX, _finalize_github_syncs, add_data
+from rag_agent.tools.clients import get_storage_client
+from rag_agent.tools.get_ingestion_status import get_ingestion_status
+from rag_agent.tools.ingest_manifest import empty_manifest, load_manifest
+
+REPO = "https://github.com/org/repo"
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    with backend.installed():
+        yield backend
+
+
+@pytest.fixture
+def paths(backend):
+    backend.create_corpus("docs")
+    for i in range(3):
+        backend.objects[("source", f"docs/{i}.md")] = f"document {i}".encode()
+    return [f"gs://source/docs/{i}.md" for i in range(3)]
+
+
+def test_successful_ingestion_sets_the_current_corpus(paths):
+    tool_context = FakeToolContext()
+
+    result = add_data(corpus_name="docs", paths=paths, tool_context=tool_context)
+
+    assert result["status"] == "success"
+    assert tool_context.state["current_corpus"] == "docs"
+
+
+def test_failed_ingestion_leaves_the_current_corpus_unset(backend, paths):
+    backend.failure_rate["rag.import_files"] = 1.0
+    tool_context = FakeToolContext()
+
+    with mock.patch("rag_agent.tools.import_batches.IMPORT_BATCH_RETRY_BACKOFF_SECONDS", 0):
+        result = add_data(corpus_name="docs", paths=paths, tool_context=tool_context)
+
+    assert result["status"] == "error"
+    assert result["files_added_to_corpus"] == 0
+    assert "current_corpus" not in tool_context.state
+
+
+@pytest.mark.parametrize("status, expected", [("success", "docs"), ("error", None)])
+def test_finished_job_sets_the_current_corpus_only_when_its_ingestion_succeeded(status, expected):
+    job = {
+        "job_id": "job-1",
+        "status": "succeeded",
+        "corpus_name": "docs",
+        "result": {"status": status, "message": "", "files_added_to_corpus": 0},
+    }
+    tool_context = FakeToolContext()
+
+    with mock.patch("rag_agent.tools.get_ingestion_status.get_ingestion_job", return_value=job):
+        get_ingestion_status(job_id="job-1", tool_context=tool_context)
+
+    assert tool_context.state.get("current_corpus") == expected
+
+
+def _sync(manifest, uploaded):
+    return {
+        "repo_url": REPO,
+        "bucket": get_storage_client().bucket(TEMP_GCS_BUCKET_NAME),
+        "manifest": manifest,
+        "manifest_file_ids": {entry.get("rag_file_id") for entry in manifest["files"].values()},
+        "current_shas": {path: "sha" for path in uploaded},
+        "uploaded": uploaded,
+    }
+
+
+def test_concurrent_ingests_of_a_repository_keep_each_others_manifest_entries(backend):
+    corpus = backend.create_corpus("docs").name
+    bucket = get_storage_client().bucket(TEMP_GCS_BUCKET_NAME)
+    # Both ingests loaded the manifest before either saved it
+    first = _sync(load_manifest(bucket, TEMP_GCS_PREFIX, corpus, REPO), {"a.md": "gs://s/a.md"})
+    second = _sync(load_manifest(bucket, TEMP_GCS_PREFIX, corpus, REPO), {"b.md": "gs://s/b.md"})
+    file_ids_by_uri = {
+        uri: backend.add_file(corpus, uri, "text").name.split("/")[-1] for uri in ("gs://s/a.md", "gs://s/b.md")
+    }
+
+    _finalize_github_syncs(corpus, [first], {"gs://s/a.md": file_ids_by_uri["gs://s/a.md"]})
+    _finalize_github_syncs(corpus, [second], file_ids_by_uri)
+
+    assert set(load_manifest(bucket, TEMP_GCS_PREFIX, corpus, REPO)["files"]) == {"a.md", "b.md"}
+
+
+def test_manifest_entries_of_deleted_rag_files_are_dropped(backend):
+    corpus = backend.create_corpus("docs").name
+    bucket = get_storage_client().bucket(TEMP_GCS_BUCKET_NAME)
+    old_file = backend.add_file(corpus, "gs://s/old.md", "old")
+    new_file = backend.add_file(corpus, "gs://s/a.md", "text")
+    _finalize_github_syncs(
+        corpus,
+        [_sync(empty_manifest(corpus, REPO), {"old.md": "gs://s/old.md"})],
+        {"gs://s/old.md": old_file.name.split("/")[-1]},
+    )
+    backend.rag.delete_file(old_file.name)
+
+    sync = _sync(load_manifest(bucket, TEMP_GCS_PREFIX, corpus, REPO), {"a.md": "gs://s/a.md"})
+    _finalize_github_syncs(corpus, [sync], {"gs://s/a.md": new_file.name.split("/")[-1]})
+
+    assert list(load_manifest(bucket, TEMP_GCS_PREFIX, corpus, REPO)["files"]) == ["a.md"]
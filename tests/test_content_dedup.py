@@ -0,0 +1,135 @@
+import pytest
+
+from benchmarks.fake_backend import FakeBackend
+from rag_agent.tools.clients import get_storage_client
+from rag_agent.tools.content_dedup import ContentDeduplicator
+
+BUCKET = "staging"
+PREFIX = "tmp"
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    with backend.installed():
+        yield backend
+
+
+@pytest.fixture
+def corpus(backend):
+    return backend.create_corpus("docs").name
+
+
+def _deduplicator(corpus):
+    return ContentDeduplicator(get_storage_client(), BUCKET, PREFIX, corpus)
+
+
+def test_duplicate_content_in_one_ingest_is_skipped(corpus):
+    deduplicator = _deduplicator(corpus)
+
+    assert deduplicator.claim("h1", 10, "gs://b/a.md") is None
+    assert deduplicator.claim("h1", 10, "gs://b/copy_of_a.md") == "gs://b/a.md"
+    assert deduplicator.claim("h2", 20, "gs://b/b.md") is None
+
+    assert deduplicator.deduplicated_files == 1
+    assert deduplicator.deduplicated_bytes == 10
+    assert deduplicator.has_claims
+
+
+def test_unknown_hashes_are_never_deduplicated(corpus):
+    deduplicator = _deduplicator(corpus)
+
+    assert deduplicator.claim(None, 10, "gs://b/a.md") is None
+    assert deduplicator.claim(None, 10, "gs://b/b.md") is None
+    assert not deduplicator.has_claims
+
+
+def test_content_already_in_the_corpus_is_skipped(backend, corpus):
+    backend.add_file(corpus, "gs://b/a.md", "text")
+    first = _deduplicator(corpus)
+    first.claim("h1", 10, "gs://b/a.md")
+    first.save({"gs://b/a.md"})
+
+    deduplicator = _deduplicator(corpus)
+
+    assert deduplicator.claim("h1", 10, "gs://b/copy_of_a.md") == "gs://b/a.md"
+    # The same URI is imported again, unless its URI names its content
+    assert deduplicator.claim("h1", 10, "gs://b/a.md", allow_reimport=False) == "gs://b/a.md"
+    assert deduplicator.claim("h1", 10, "gs://b/a.md") is None
+
+
+def test_files_no_longer_in_the_corpus_are_forgotten(backend, corpus):
+    rag_file = backend.add_file(corpus, "gs://b/a.md", "text")
+    first = _deduplicator(corpus)
+    first.claim("h1", 10, "gs://b/a.md")
+    first.save({"gs://b/a.md"})
+    backend.rag.delete_file(rag_file.name)
+
+    assert _deduplicator(corpus).claim("h1", 10, "gs://b/copy_of_a.md") is None
+
+
+def test_claims_of_files_that_were_not_imported_are_not_saved(backend, corpus):
+    backend.add_file(corpus, "gs://b/a.md", "text")
+    first = _deduplicator(corpus)
+    first.claim("h1", 10, "gs://b/a.md")
+    first.claim("h2", 10, "gs://b/failed.md")
+    first.save({"gs://b/a.md"})
+
+    assert _deduplicator(corpus).claim("h2", 10, "gs://b/other.md") is None
+
+
+def test_reimported_uri_with_new_content_releases_its_old_hash(backend, corpus):
+    backend.add_file(corpus, "gs://b/a.md", "text")
+    first = _deduplicator(corpus)
+    first.claim("old", 10, "gs://b/a.md")
+    first.save({"gs://b/a.md"})
+
+    deduplicator = _deduplicator(corpus)
+    assert deduplicator.claim("new", 10, "gs://b/a.md") is None
+
+    assert deduplicator.claim("old", 10, "gs://b/b.md") is None
+
+
+def test_released_files_no_longer_hold_their_content(backend, corpus):
+    backend.add_file(corpus, "gs://b/a.md", "text")
+    first = _deduplicator(corpus)
+    first.claim("h1", 10, "gs://b/a.md")
+    first.save({"gs://b/a.md"})
+
+    deduplicator = _deduplicator(corpus)
+    deduplicator.release("gs://b/a.md")
+
+    assert deduplicator.claim("h1", 10, "gs://b/b.md") is None
+
+
+def test_concurrent_ingests_keep_each_others_claims(backend, corpus):
+    backend.add_file(corpus, "gs://b/a.md", "a")
+    backend.add_file(corpus, "gs://b/b.md", "b")
+    first, second = _deduplicator(corpus), _deduplicator(corpus)
+    first.claim("h1", 10, "gs://b/a.md")
+    second.claim("h2", 10, "gs://b/b.md")
+
+    first.save({"gs://b/a.md"})
+    second.save({"gs://b/b.md"})
+
+    deduplicator = _deduplicator(corpus)
+    assert deduplicator.claim("h1", 10, "gs://b/copy_of_a.md") == "gs://b/a.md"
+    assert deduplicator.claim("h2", 10, "gs://b/copy_of_b.md") == "gs://b/b.md"
+
+
+def test_content_released_by_a_concurrent_ingest_stays_released(backend, corpus):
+    backend.add_file(corpus, "gs://b/a.md", "a")
+    backend.add_file(corpus, "gs://b/b.md", "b")
+    initial = _deduplicator(corpus)
+    initial.claim("h1", 10, "gs://b/a.md")
+    initial.save({"gs://b/a.md"})
+    first, second = _deduplicator(corpus), _deduplicator(corpus)
+    first.release("gs://b/a.md")
+    second.claim("h2", 10, "gs://b/b.md")
+
+    first.save({"gs://b/b.md"})
+    second.save({"gs://b/a.md", "gs://b/b.md"})
+
+    deduplicator = _deduplicator(corpus)
+    assert deduplicator.claim("h1", 10, "gs://b/copy_of_a.md") is None
+    assert deduplicator.claim("h2", 10, "gs://b/copy_of_b.md") == "gs://b/b.md"
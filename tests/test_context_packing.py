@@ -0,0 +1,92 @@
+from rag_agent.tools.chunking import estimate_tokens
+from rag_agent.tools.context_packing import pack_results
+
+
+def _words(start, stop):
+    return " ".join(f"w{i}" for i in range(start, stop))
+
+
+def test_overlapping_chunks_of_a_source_are_merged():
+    results = [
+        {"source_uri": "gs://b/a.md", "text": _words(0, 30), "score": 0.3},
+        {"source_uri": "gs://b/a.md", "text": _words(20, 50), "score": 0.1},
+    ]
+
+    packed, stats = pack_results(results, token_budget=0)
+
+    assert [result["text"] for result in packed] == [_words(0, 50)]
+    assert packed[0]["merged_chunks"] == 2
+    # The merged context keeps the best score of its chunks
+    assert packed[0]["score"] == 0.1
+    assert stats["merged"] == 1
+
+
+def test_contained_chunk_is_merged_and_short_overlaps_are_not():
+    results = [
+        {"source_uri": "gs://b/a.md", "text": _words(0, 40)},
+        {"source_uri": "gs://b/a.md", "text": _words(10, 20)},
+        # Overlaps by fewer than CONTEXT_MIN_OVERLAP_WORDS words
+        {"source_uri": "gs://b/a.md", "text": _words(37, 60)},
+    ]
+
+    packed, stats = pack_results(results, token_budget=0)
+
+    assert [result["text"] for result in packed] == [_words(0, 40), _words(37, 60)]
+    assert stats["merged"] == 1
+
+
+def test_chunks_of_different_sources_are_not_merged():
+    results = [
+        {"source_uri": "gs://b/a.md", "text": _words(0, 30)},
+        {"source_uri": "gs://b/b.md", "text": _words(20, 50)},
+    ]
+
+    packed, stats = pack_results(results, token_budget=0)
+
+    assert len(packed) == 2
+    assert stats["merged"] == 0
+
+
+def test_near_duplicates_of_better_ranked_contexts_are_dropped():
+    text = _words(0, 40)
+    results = [
+        {"source_uri": "gs://b/a.md", "text": text},
+        {"source_uri": "gs://b/copy.md", "text": text.upper()},
+        {"source_uri": "gs://b/other.md", "text": _words(100, 140)},
+    ]
+
+    packed, stats = pack_results(results, token_budget=0)
+
+    assert [result["source_uri"] for result in packed] == ["gs://b/a.md", "gs://b/other.md"]
+    assert stats["near_duplicates_dropped"] == 1
+
+
+def test_budget_keeps_rank_order_and_truncates_the_last_context():
+    results = [
+        {"source_uri": f"gs://b/{i}.md", "text": _words(i * 1000, i * 1000 + 200)} for i in range(3)
+    ]
+    first_tokens = estimate_tokens(results[0]["text"])
+    budget = first_tokens + 100
+
+    packed, stats = pack_results(results, token_budget=budget)
+
+    assert [result["source_uri"] for result in packed] == ["gs://b/0.md", "gs://b/1.md"]
+    assert packed[1]["truncated"] is True
+    assert results[1]["text"].startswith(packed[1]["text"])
+    assert stats["tokens_out"] <= budget
+    assert stats["truncated"] == 1
+    assert stats["dropped_over_budget"] == 1
+    assert stats["contexts_in"] == 3
+    assert stats["contexts_out"] == 2
+
+
+def test_input_results_are_not_modified():
+    results = [
+        {"source_uri": "gs://b/a.md", "text": _words(0, 30)},
+        {"source_uri": "gs://b/a.md", "text": _words(20, 50)},
+    ]
+
+    pack_results(results, token_budget=0)
+
+    assert results[0]["text"] == _words(0, 30)
+    assert "merged_chunks" not in results[0]
@@ -0,0 +1,67 @@
+import pytest
+
+from benchmarks.fake_backend import FakeBackend, FakeToolContext
+from rag_agent.tools.get_corpus_info import get_corpus_info
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    with backend.installed():
+        yield backend
+
+
+@pytest.fixture
+def corpus(backend):
+    corpus = backend.create_corpus("docs").name
+    # Files under the prefix are sparse: 1 in every 4
+    for i in range(20):
+        folder = "keep" if i % 4 == 0 else "skip"
+        backend.add_file(corpus, f"gs://b/{folder}/{i:02d}.md", f"file {i}")
+    return corpus
+
+
+def _list_all(**kwargs):
+    pages, token = [], ""
+    while True:
+        response = get_corpus_info(corpus_name="docs", tool_context=FakeToolContext(), page_token=token, **kwargs)
+        assert response["status"] == "success"
+        pages.append(response)
+        token = response["next_page_token"]
+        if not token:
+            return pages
+
+
+def test_pages_are_listed_in_order_with_the_corpus_file_count(corpus):
+    pages = _list_all(page_size=8)
+
+    assert [page["page_file_count"] for page in pages] == [8, 8, 4]
+    assert all(page["file_count"] == 20 for page in pages)
+    uris = [file["source_uri"] for page in pages for file in page["files"]]
+    assert len(uris) == len(set(uris)) == 20
+
+
+def test_prefix_filtered_pages_are_filled_from_several_listing_pages(corpus):
+    pages = _list_all(page_size=2, source_uri_prefix="gs://b/keep/")
+
+    assert [page["page_file_count"] for page in pages] == [2, 2, 1]
+    assert all(page["file_count"] == 5 for page in pages)
+    assert [file["source_uri"] for page in pages for file in page["files"]] == [
+        f"gs://b/keep/{i:02d}.md" for i in range(0, 20, 4)
+    ]
+
+
+def test_no_page_ends_empty_with_more_to_list(corpus):
+    pages = _list_all(page_size=3, source_uri_prefix="gs://b/keep/")
+
+    assert all(page["files"] for page in pages)
+    assert sum(page["page_file_count"] for page in pages) == 5
+
+
+def test_single_page_listing_counts_without_another_listing(backend, corpus):
+    backend.reset_counters()
+
+    response = get_corpus_info(corpus_name="docs", tool_context=FakeToolContext(), page_size=100)
+
+    assert response["file_count"] == response["page_file_count"] == 20
+    assert backend.calls["rag.list_files"] == 1
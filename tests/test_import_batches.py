@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from benchmarks.fake_backend import FakeBackend
+from rag_agent.tools.import_batches import import_in_batches
+from rag_agent.tools.resilience import tool_deadline
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    with backend.installed():
+        yield backend
+
+
+def _stage(backend, count):
+    paths = []
+    for i in range(count):
+        backend.objects[("staging", f"docs/{i}.md")] = f"document {i}".encode()
+        paths.append(f"gs://staging/docs/{i}.md")
+    return paths
+
+
+def test_batches_are_imported(backend):
+    corpus = backend.create_corpus("docs").name
+
+    summary = import_in_batches(corpus, [(_stage(backend, 3), None)])
+
+    assert summary["imported"] == 3
+    assert summary["failed_batches"] == []
+    assert len(backend.files[corpus]) == 3
+
+
+def test_batches_run_within_the_callers_deadline(backend):
+    corpus = backend.create_corpus("docs").name
+    backend.latency["rag.import_files"] = 1.0
+    timeouts = []
+    import_files = backend.rag.import_files
+
+    def spy(*args, **kwargs):
+        timeouts.append(kwargs["timeout"])
+        return import_files(*args, **kwargs)
+
+    backend.rag.import_files = spy
+    start = time.monotonic()
+    with tool_deadline(0.2):
+        summary = import_in_batches(corpus, [(_stage(backend, 3), None)])
+
+    assert time.monotonic() - start < 0.8
+    assert timeouts and all(timeout <= 0.2 for timeout in timeouts)
+    assert len(summary["failed_batches"]) == 1
+    assert "timed out" in summary["failed_batches"][0]["error"]
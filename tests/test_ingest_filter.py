@@ -0,0 +1,68 @@
+from rag_agent.tools.ingest_filter import IngestFilter
+
+
+def _filter(**ignore_files):
+    ingest_filter = IngestFilter(include_globs=[], exclude_globs=[], ignore_file_names=[".gitignore"])
+    for path, content in ignore_files.items():
+        ingest_filter.add_ignore_file(path, content.splitlines())
+    return ingest_filter
+
+
+def test_negation_reincludes_a_path():
+    ingest_filter = _filter(**{".gitignore": "*.log\n!keep.log\n"})
+    assert ingest_filter.check_path("debug.log") == "ignored"
+    assert ingest_filter.check_path("logs/debug.log") == "ignored"
+    assert ingest_filter.check_path("keep.log") is None
+    assert ingest_filter.check_path("logs/keep.log") is None
+
+
+def test_last_matching_rule_wins():
+    ingest_filter = _filter(**{".gitignore": "!keep.log\n*.log\n"})
+    assert ingest_filter.check_path("keep.log") == "ignored"
+
+
+def test_pattern_with_slash_is_anchored():
+    ingest_filter = _filter(**{".gitignore": "/build\ndocs/tmp\n"})
+    assert ingest_filter.check_path("build/main.o") == "ignored"
+    assert ingest_filter.check_path("src/build/main.py") is None
+    assert ingest_filter.check_path("docs/tmp/draft.md") == "ignored"
+    assert ingest_filter.check_path("src/docs/tmp/draft.md") is None
+
+
+def test_pattern_without_slash_matches_at_any_depth():
+    ingest_filter = _filter(**{".gitignore": "build\n"})
+    assert ingest_filter.check_path("build/main.o") == "ignored"
+    assert ingest_filter.check_path("src/build/main.py") == "ignored"
+
+
+def test_directory_only_pattern_skips_files_of_that_name():
+    ingest_filter = _filter(**{".gitignore": "out/\n"})
+    assert ingest_filter.check_path("out/report.txt") == "ignored"
+    assert ingest_filter.check_path("src/out") is None
+
+
+def test_double_star_matches_nested_directories():
+    ingest_filter = _filter(**{".gitignore": "docs/**/*.tmp\n"})
+    assert ingest_filter.check_path("docs/a.tmp") == "ignored"
+    assert ingest_filter.check_path("docs/a/b/c.tmp") == "ignored"
+    assert ingest_filter.check_path("src/docs/a.tmp") is None
+
+
+def test_nested_ignore_file_is_scoped_and_overrides_parent():
+    ingest_filter = _filter(
+        **{
+            "sub/.gitignore": "!important.log\n/local.txt\n",
+            ".gitignore": "*.log\n",
+        }
+    )
+    assert ingest_filter.check_path("sub/important.log") is None
+    assert ingest_filter.check_path("important.log") == "ignored"
+    assert ingest_filter.check_path("sub/other.log") == "ignored"
+    # Anchored to the directory of the ignore file, not the repository root
+    assert ingest_filter.check_path("sub/local.txt") == "ignored"
+    assert ingest_filter.check_path("local.txt") is None
+    assert ingest_filter.check_path("sub/deeper/local.txt") is None
+
+
+def test_ignore_files_themselves_are_skipped():
+    assert _filter().check_path("sub/.gitignore") == "ignore_file"
@@ -0,0 +1,99 @@
+import pytest
+
+from benchmarks.fake_backend import FakeBackend
+from rag_agent.tools.clients import get_storage_client
+from rag_agent.tools.ingest_manifest import (
+    content_object_name,
+    diff_manifest,
+    empty_manifest,
+    load_manifest,
+    manifest_blob_name,
+    repo_key,
+    staged_object_name,
+    update_manifest,
+)
+
+CORPUS = "projects/p/locations/l/ragCorpora/123"
+REPO = "https://github.com/org/repo"
+
+
+def _manifest(files):
+    manifest = empty_manifest(CORPUS, "https://github.com/org/repo")
+    manifest["files"] = {path: {"blob_sha": sha, "gcs_uri": f"gs://b/{path}"} for path, sha in files.items()}
+    return manifest
+
+
+def test_diff_manifest_classifies_paths():
+    manifest = _manifest({"a.md": "1", "b.md": "2", "c.md": "3"})
+
+    added, changed, removed = diff_manifest(manifest, {"a.md": "1", "b.md": "20", "d.md": "4", "0.md": "5"})
+
+    assert added == ["0.md", "d.md"]
+    assert changed == ["b.md"]
+    assert removed == ["c.md"]
+
+
+def test_diff_manifest_of_an_empty_manifest_adds_everything():
+    added, changed, removed = diff_manifest(empty_manifest(CORPUS, "org/repo"), {"b.md": "2", "a.md": "1"})
+
+    assert (added, changed, removed) == (["a.md", "b.md"], [], [])
+
+
+def test_diff_manifest_of_an_unchanged_tree_is_empty():
+    assert diff_manifest(_manifest({"a.md": "1"}), {"a.md": "1"}) == ([], [], [])
+
+
+def test_repo_key_normalizes_url_forms():
+    keys = {
+        repo_key("https://github.com/Org/Repo"),
+        repo_key("https://github.com/org/repo.git"),
+        repo_key("git@github.com:org/repo.git"),
+        repo_key(" https://github.com/org/repo/ "),
+    }
+    assert keys == {"org__repo"}
+
+
+def test_staged_object_names():
+    assert content_object_name("tmp", "abc") == "tmp/_objects/abc"
+    assert (
+        staged_object_name("tmp", "https://github.com/Org/Repo.git", "abc", "docs/guide.md")
+        == "tmp/_repos/org__repo/abc/docs/guide.md"
+    )
+    assert manifest_blob_name("tmp", CORPUS, "https://github.com/org/repo") == "tmp/_manifests/123/org__repo.json"
+
+
+@pytest.fixture
+def bucket():
+    with FakeBackend().installed():
+        yield get_storage_client().bucket("staging")
+
+
+def _add(path):
+    def update(manifest):
+        manifest["files"][path] = {"blob_sha": "1", "gcs_uri": f"gs://b/{path}", "rag_file_id": path}
+
+    return update
+
+
+def test_update_manifest_merges_a_concurrent_update(bucket):
+    update_manifest(bucket, "tmp", CORPUS, REPO, _add("a.md"))
+    calls = []
+
+    def add_b_while_c_is_added(manifest):
+        if not calls:
+            update_manifest(bucket, "tmp", CORPUS, REPO, _add("c.md"))
+        calls.append(manifest)
+        _add("b.md")(manifest)
+
+    update_manifest(bucket, "tmp", CORPUS, REPO, add_b_while_c_is_added)
+
+    assert len(calls) == 2
+    assert set(load_manifest(bucket, "tmp", CORPUS, REPO)["files"]) == {"a.md", "b.md", "c.md"}
+
+
+def test_update_manifest_deletes_a_manifest_left_without_files(bucket):
+    update_manifest(bucket, "tmp", CORPUS, REPO, _add("a.md"))
+
+    update_manifest(bucket, "tmp", CORPUS, REPO, lambda manifest: manifest["files"].clear())
+
+    assert bucket.get_blob(manifest_blob_name("tmp", CORPUS, REPO)) is None
@@ -0,0 +1,48 @@
+import time
+from unittest import mock
+
+import pytest
+
+from rag_agent.tools import ingestion_jobs
+from rag_agent.tools.ingestion_jobs import enqueue_ingestion_job, get_ingestion_job
+
+
+@pytest.fixture
+def ingest_paths(tmp_path):
+    """A fresh job database and runner, with ingestions that succeed at once."""
+    ingest = mock.Mock(return_value={"status": "success", "message": "done", "files_added_to_corpus": 1})
+    with mock.patch.object(ingestion_jobs, "INGESTION_JOB_DB_PATH", str(tmp_path / "jobs.sqlite3")), \
+            mock.patch.object(ingestion_jobs, "_runner", ingestion_jobs._IngestionJobRunner()), \
+            mock.patch("rag_agent.tools.add_data.ingest_paths", ingest):
+        yield ingest
+
+
+def _wait_until_finished(job_id):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = get_ingestion_job(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Ingestion job {job_id} did not finish")
+
+
+def test_new_job_is_submitted_once_when_it_starts_the_runner(ingest_paths):
+    runner = ingestion_jobs._runner
+    with mock.patch.object(runner, "submit", wraps=runner.submit) as submit:
+        job_id = enqueue_ingestion_job("docs", "corpora/1", ["gs://b/a.md"])
+
+        assert _wait_until_finished(job_id)["status"] == "succeeded"
+
+    assert [call.args[0] for call in submit.call_args_list] == [job_id]
+    assert ingest_paths.call_count == 1
+
+
+def test_jobs_queued_before_the_runner_started_are_resumed(ingest_paths):
+    # Queued by an earlier process, whose runner never ran it
+    with mock.patch.object(ingestion_jobs._runner, "submit"):
+        job_id = enqueue_ingestion_job("docs", "corpora/1", ["gs://b/a.md"])
+    ingestion_jobs._runner = ingestion_jobs._IngestionJobRunner()
+
+    assert _wait_until_finished(job_id)["status"] == "succeeded"
+    assert ingest_paths.call_count == 1
@@ -0,0 +1,112 @@
+from rag_agent.config import RRF_K
+from rag_agent.tools.lexical_index import LexicalIndex, fuse_rankings, tokenize
+
+
+def _index():
+    index = LexicalIndex("projects/p/locations/l/ragCorpora/1")
+    index.add_file(
+        "1",
+        {"source_uri": "gs://b/retry.py", "source_name": "retry.py"},
+        ["def resilient_call(endpoint): retry the call with backoff", "backoff helpers"],
+    )
+    index.add_file(
+        "2",
+        {"source_uri": "gs://b/readme.md", "source_name": "readme.md"},
+        ["the readme describes how to call it"],
+    )
+    return index
+
+
+def test_tokenize_splits_compound_identifiers():
+    assert list(tokenize("getCorpusInfo")) == ["getcorpusinfo", "get", "corpus", "info"]
+
+
+def test_search_ranks_rare_terms_first():
+    results = _index().search("resilient_call backoff", top_k=10)
+    # "call", a part of resilient_call, also matches the readme, but is the commonest term
+    assert [result["text"] for result in results] == [
+        "def resilient_call(endpoint): retry the call with backoff",
+        "backoff helpers",
+        "the readme describes how to call it",
+    ]
+    assert results[0]["source_uri"] == "gs://b/retry.py"
+    assert results[0]["lexical_score"] > results[1]["lexical_score"] > results[2]["lexical_score"] > 0
+
+
+def test_search_limits_results_and_ignores_unknown_terms():
+    index = _index()
+    assert len(index.search("call", top_k=1)) == 1
+    assert index.search("nonexistent", top_k=10) == []
+    assert index.search("", top_k=10) == []
+
+
+def test_removed_and_replaced_files_leave_the_index():
+    index = _index()
+    index.remove_file("1")
+    assert len(index) == 1
+    assert index.search("backoff", top_k=10) == []
+
+    index.add_file("2", {"source_uri": "gs://b/readme.md"}, ["now about backoff"])
+    assert len(index) == 1
+    assert [result["text"] for result in index.search("backoff", top_k=10)] == ["now about backoff"]
+    assert index.search("readme", top_k=10) == []
+
+
+_SHARED = "the circuit breaker opens after five consecutive failures and lets one probe through"
+
+
+def test_fuse_rankings_merges_overlapping_chunks_of_a_source():
+    vector = [{"source_uri": "gs://b/a.md", "text": f"Resilience. {_SHARED}", "score": 0.2}]
+    lexical = [{"source_uri": "gs://b/a.md", "text": f"{_SHARED} after a reset.", "lexical_score": 3.0}]
+
+    fused = fuse_rankings([vector, lexical], top_k=5)
+
+    assert len(fused) == 1
+    assert fused[0]["retrieval"] == ["vector", "lexical"]
+    assert fused[0]["fusion_score"] == 2.0 / (RRF_K + 1)
+    # The first occurrence's fields are kept and completed with the later ones
+    assert fused[0]["text"] == f"Resilience. {_SHARED}"
+    assert fused[0]["score"] == 0.2
+    assert fused[0]["lexical_score"] == 3.0
+
+
+def test_fuse_rankings_keeps_distinct_chunks_apart():
+    vector = [
+        {"source_uri": "gs://b/a.md", "text": _SHARED, "score": 0.2},
+        {"source_uri": "gs://b/b.md", "text": "an unrelated passage about chunk sizes", "score": 0.4},
+    ]
+    lexical = [
+        {"source_uri": "gs://b/a.md", "text": "a different passage of the same document", "lexical_score": 5.0},
+        # Same text as a vector result, but another source
+        {"source_uri": "gs://b/c.md", "text": _SHARED, "lexical_score": 4.0},
+    ]
+
+    fused = fuse_rankings([vector, lexical], top_k=10)
+
+    assert len(fused) == 4
+    assert all(len(result["retrieval"]) == 1 for result in fused)
+    assert [result["score"] for result in fused if result["retrieval"] == ["lexical"]] == [None, None]
+
+
+def test_fuse_rankings_matches_each_entry_once_per_ranking():
+    vector = [{"source_uri": "gs://b/a.md", "text": _SHARED, "score": 0.1}]
+    lexical = [
+        {"source_uri": "gs://b/a.md", "text": _SHARED, "lexical_score": 2.0},
+        {"source_uri": "gs://b/a.md", "text": _SHARED, "lexical_score": 1.0},
+    ]
+
+    fused = fuse_rankings([vector, lexical], top_k=10)
+
+    assert [result["retrieval"] for result in fused] == [["vector", "lexical"], ["lexical"]]
+
+
+def test_fuse_rankings_orders_by_fused_score_and_truncates():
+    vector = [
+        {"source_uri": "gs://b/1.md", "text": "first vector passage here", "score": 0.1},
+        {"source_uri": "gs://b/2.md", "text": "second vector passage here", "score": 0.2},
+    ]
+    lexical = [{"source_uri": "gs://b/2.md", "text": "second vector passage here", "lexical_score": 1.0}]
+
+    fused = fuse_rankings([vector, lexical], top_k=1)
+
+    assert [result["source_uri"] for result in fused] == ["gs://b/2.md"]
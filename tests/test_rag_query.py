@@ -0,0 +1,95 @@
+import importlib
+from unittest import mock
+
+import pytest
+
+from benchmarks.fake_backend import FakeBackend, FakeToolContext
+from rag_agent.config import DEFAULT_TOP_K
+from rag_agent.tools.rag_query import rag_query
+
+# rag_agent.tools re-exports the tool under the module's name
+rag_query_module = importlib.import_module("rag_agent.tools.rag_query")
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    with backend.installed():
+        yield backend
+
+
+def _hybrid(lexical_results):
+    return mock.patch.multiple(
+        rag_query_module,
+        is_hybrid_retrieval_enabled=lambda corpus: True,
+        lexical_search=lambda corpus, query, top_k: lexical_results,
+    )
+
+
+def test_hybrid_corpus_without_lexical_results_keeps_the_vector_ranking(backend):
+    corpus = backend.create_corpus("docs").name
+    backend.add_file(corpus, "gs://b/a.md", "pipeline latencia custo")
+
+    with _hybrid(None):
+        results, _ = rag_query_module._retrieve(corpus, "pipeline latencia warming")
+
+    assert [result["source_uri"] for result in results] == ["gs://b/a.md"]
+    assert "fusion_score" not in results[0]
+
+
+def test_hybrid_corpus_fuses_lexical_results(backend):
+    corpus = backend.create_corpus("docs").name
+    backend.add_file(corpus, "gs://b/a.md", "pipeline latencia custo")
+    lexical = [{"source_uri": "gs://b/other.md", "source_name": "other.md", "text": "custo", "lexical_score": 1.0}]
+
+    with _hybrid(lexical):
+        results, _ = rag_query_module._retrieve(corpus, "pipeline latencia fused")
+
+    assert [result["retrieval"] for result in results] == [["vector"], ["lexical"]]
+
+
+def test_fan_out_ranks_every_corpus_on_the_same_scale(backend):
+    for name in ("hybrid", "plain"):
+        backend.create_corpus(name)
+    retrieved = {
+        "hybrid": [
+            {"source_uri": "gs://h/1.md", "text": "hybrid first", "score": 0.5, "fusion_score": 0.03},
+            {"source_uri": "gs://h/2.md", "text": "hybrid second", "score": 0.6, "fusion_score": 0.02},
+        ],
+        "plain": [
+            {"source_uri": "gs://p/1.md", "text": "plain first", "score": 0.1},
+            {"source_uri": "gs://p/2.md", "text": "plain second", "score": 0.2},
+        ],
+    }
+    display_names = {corpus.name: corpus.display_name for corpus in backend.corpora.values()}
+
+    with mock.patch.object(
+        rag_query_module, "_retrieve", lambda corpus, query: ([dict(r) for r in retrieved[display_names[corpus]]], False)
+    ):
+        response = rag_query(corpus_name="", query="q", tool_context=FakeToolContext(), corpus_names=["hybrid", "plain"])
+
+    # Corpora alternate by rank, ties going to the closer vector match: the hybrid
+    # corpus' fusion scores do not put its results above the other corpus'
+    ranked = ["plain first", "hybrid first", "plain second", "hybrid second"][:DEFAULT_TOP_K]
+    assert [result["text"] for result in response["results"]] == ranked
+    assert response["results"][0]["corpus_name"] == "plain"
+
+
+def test_fan_out_keeps_a_chunk_found_in_several_corpora_once(backend):
+    for name in ("one", "two"):
+        backend.create_corpus(name)
+    shared = {"source_uri": "gs://s/shared.md", "text": "shared passage", "score": 0.3}
+    retrieved = {
+        "one": [{"source_uri": "gs://s/1.md", "text": "first of one", "score": 0.1}, shared],
+        "two": [shared, {"source_uri": "gs://s/2.md", "text": "second of two", "score": 0.2}],
+    }
+    display_names = {corpus.name: corpus.display_name for corpus in backend.corpora.values()}
+
+    with mock.patch.object(
+        rag_query_module, "_retrieve", lambda corpus, query: ([dict(r) for r in retrieved[display_names[corpus]]], False)
+    ):
+        response = rag_query(corpus_name="", query="q", tool_context=FakeToolContext(), corpus_names=["one", "two"])
+
+    assert [result["text"] for result in response["results"]] == ["shared passage", "first of one", "second of two"]
+    # Kept as returned by the corpus that ranked it best
+    assert response["results"][0]["corpus_name"] == "two"
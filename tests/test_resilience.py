@@ -0,0 +1,256 @@
+import itertools
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from google.api_core.exceptions import NotFound, ServiceUnavailable
+
+from benchmarks.fake_backend import FakeBackend
+
+from rag_agent.config import CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_SECONDS, REMOTE_CALL_MAX_ATTEMPTS
+from rag_agent.tools import resilience
+from rag_agent.tools.resilience import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    _CircuitBreaker,
+    get_circuit_states,
+    resilient_call,
+    tool_deadline,
+)
+
+_endpoints = itertools.count()
+
+
+def _endpoint():
+    """A fresh endpoint name, so every test starts with a closed circuit."""
+    return f"test.endpoint_{next(_endpoints)}"
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    with mock.patch.object(resilience, "time", SimpleNamespace(monotonic=lambda: now[0])):
+        yield now
+
+
+@pytest.fixture
+def no_backoff():
+    with mock.patch.object(resilience.time, "sleep") as sleep:
+        yield sleep
+
+
+def _sdk_error(error):
+    """Raise `error` the way vertexai.rag does: wrapped in a RuntimeError."""
+    try:
+        raise error
+    except Exception as e:
+        raise RuntimeError("Failed in retrieving contexts due to: ", e) from e
+
+
+def _open(breaker):
+    for _ in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    breaker = _CircuitBreaker("e")
+    for _ in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = _CircuitBreaker("e")
+    for _ in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_circuit_lets_a_single_probe_through(clock):
+    breaker = _CircuitBreaker("e")
+    _open(breaker)
+
+    clock[0] += CIRCUIT_BREAKER_RESET_SECONDS
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = _CircuitBreaker("e")
+    _open(breaker)
+    clock[0] += CIRCUIT_BREAKER_RESET_SECONDS
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    clock[0] += CIRCUIT_BREAKER_RESET_SECONDS - 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock[0] += 1
+    breaker.before_call()
+
+
+def test_released_probe_lets_another_one_through(clock):
+    breaker = _CircuitBreaker("e")
+    _open(breaker)
+    clock[0] += CIRCUIT_BREAKER_RESET_SECONDS
+    breaker.before_call()
+
+    breaker.release_probe()
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_resilient_call_retries_transient_errors(no_backoff):
+    endpoint = _endpoint()
+    outcomes = iter([ServiceUnavailable("down"), "ok"])
+
+    def call():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert resilient_call(endpoint, call) == "ok"
+    assert no_backoff.call_count == 1
+    assert get_circuit_states()[endpoint] == "closed"
+
+
+def test_resilient_call_gives_up_after_max_attempts(no_backoff):
+    fn = mock.Mock(side_effect=ServiceUnavailable("down"))
+
+    with pytest.raises(ServiceUnavailable):
+        resilient_call(_endpoint(), fn)
+
+    assert fn.call_count == REMOTE_CALL_MAX_ATTEMPTS
+
+
+def test_resilient_call_does_not_retry_without_retry(no_backoff):
+    fn = mock.Mock(side_effect=ServiceUnavailable("down"))
+
+    with pytest.raises(ServiceUnavailable):
+        resilient_call(_endpoint(), fn, retry=False)
+
+    assert fn.call_count == 1
+
+
+def test_non_transient_errors_are_raised_at_once_and_do_not_open_the_circuit(no_backoff):
+    endpoint = _endpoint()
+    fn = mock.Mock(side_effect=ValueError("bad request"))
+
+    for _ in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD + 1):
+        with pytest.raises(ValueError):
+            resilient_call(endpoint, fn)
+
+    assert fn.call_count == CIRCUIT_BREAKER_FAILURE_THRESHOLD + 1
+    assert get_circuit_states()[endpoint] == "closed"
+
+
+def test_wrapped_transient_errors_are_retried_and_open_the_circuit(no_backoff):
+    endpoint = _endpoint()
+    fn = mock.Mock(side_effect=lambda: _sdk_error(ServiceUnavailable("down")))
+
+    with pytest.raises(ServiceUnavailable):
+        resilient_call(endpoint, fn)
+    assert fn.call_count == REMOTE_CALL_MAX_ATTEMPTS
+
+    # The circuit opens during the retries of the next call
+    with pytest.raises(CircuitOpenError):
+        resilient_call(endpoint, fn)
+    assert fn.call_count == CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    assert get_circuit_states()[endpoint] == "open"
+
+
+def test_wrapped_errors_are_raised_unwrapped(no_backoff):
+    backend = FakeBackend()
+    corpus = backend.create_corpus("docs").name
+
+    with pytest.raises(NotFound):
+        resilient_call(_endpoint(), lambda: backend.rag.delete_file(f"{corpus}/ragFiles/404"))
+    assert backend.calls["rag.delete_file"] == 1
+
+    with pytest.raises(RuntimeError):
+        backend.rag.delete_file(f"{corpus}/ragFiles/404")
+
+
+def test_open_circuit_fails_fast(no_backoff):
+    endpoint = _endpoint()
+    failing = mock.Mock(side_effect=ServiceUnavailable("down"))
+    while get_circuit_states().get(endpoint) != "open":
+        with pytest.raises((ServiceUnavailable, CircuitOpenError)):
+            resilient_call(endpoint, failing)
+
+    fn = mock.Mock(return_value="ok")
+    with pytest.raises(CircuitOpenError):
+        resilient_call(endpoint, fn)
+    fn.assert_not_called()
+
+
+def test_passed_deadline_fails_before_calling():
+    fn = mock.Mock(return_value="ok")
+
+    with tool_deadline(0), pytest.raises(DeadlineExceeded):
+        resilient_call(_endpoint(), fn)
+
+    fn.assert_not_called()
+
+
+def test_deadline_bounds_a_hanging_call():
+    endpoint = _endpoint()
+    release = threading.Event()
+
+    try:
+        with tool_deadline(0.2), pytest.raises(DeadlineExceeded):
+            resilient_call(endpoint, lambda: release.wait(10))
+    finally:
+        release.set()
+
+    # Running out of time is not the endpoint's failure
+    assert get_circuit_states()[endpoint] == "closed"
+
+
+def test_timed_calls_run_on_the_callers_thread():
+    threads = []
+
+    with tool_deadline(5):
+        resilient_call(_endpoint(), lambda: threads.append(threading.current_thread()), timed=True)
+        resilient_call(_endpoint(), lambda: threads.append(threading.current_thread()))
+
+    assert threads[0] is threading.current_thread()
+    assert threads[1] is not threading.current_thread()
+
+
+def test_an_endpoint_hung_on_every_thread_does_not_stall_the_others():
+    hung, healthy = _endpoint(), _endpoint()
+    release = threading.Event()
+
+    try:
+        with mock.patch.object(resilience, "DEADLINE_CALL_MAX_WORKERS", 1):
+            with tool_deadline(0.1), pytest.raises(DeadlineExceeded):
+                resilient_call(hung, lambda: release.wait(10))
+            with tool_deadline(0.1), pytest.raises(DeadlineExceeded):
+                resilient_call(hung, lambda: "queued behind the hung call")
+            with tool_deadline(1):
+                assert resilient_call(healthy, lambda: "ok") == "ok"
+    finally:
+        release.set()
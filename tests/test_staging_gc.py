@@ -0,0 +1,107 @@
+import json
+from unittest import mock
+
+import pytest
+from google.api_core.exceptions import PermissionDenied
+
+from benchmarks.fake_backend import FakeBackend
+from rag_agent.tools.add_data import TEMP_GCS_BUCKET_NAME, TEMP_GCS_PREFIX
+from rag_agent.tools.clients import get_storage_client
+from rag_agent.tools.ingest_manifest import corpus_key
+from rag_agent.tools.staging_gc import collect_staging_garbage
+
+P = TEMP_GCS_PREFIX
+
+
+def _uri(name):
+    return f"gs://{TEMP_GCS_BUCKET_NAME}/{name}"
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    with backend.installed():
+        yield backend
+
+
+@pytest.fixture
+def staging(backend):
+    """A live corpus and a deleted one, with referenced and unreferenced staged objects."""
+    corpus = backend.create_corpus("live").name
+    live, dead = corpus_key(corpus), "999"
+
+    def put(name, data=b"x"):
+        backend.objects[(TEMP_GCS_BUCKET_NAME, name)] = data
+
+    put(f"{P}/_repos/o__r/h1/a.md")
+    put(f"{P}/_objects/h1")
+    put(f"{P}/_repos/o__r/h2/b.md")
+    put(f"{P}/_objects/h2")
+    put(f"{P}/_repos/o__r/h3/c.md")
+    put(f"{P}/_objects/h3")
+    put(f"{P}/_objects/abc/old.md")
+    put(f"{P}/_objects/def/gone.md")
+    manifest = {"version": 1, "files": {"a.md": {"gcs_uri": _uri(f"{P}/_repos/o__r/h1/a.md")}}}
+    put(f"{P}/_manifests/{live}/o__r.json", json.dumps(manifest).encode())
+    put(f"{P}/_manifests/{dead}/o__r.json", json.dumps(manifest).encode())
+    put(f"{P}/_content_index/{live}.json", b"{}")
+    put(f"{P}/_content_index/{dead}.json", b"{}")
+    # Imported outside the manifest, and from an earlier staging layout
+    backend.add_file(corpus, _uri(f"{P}/_repos/o__r/h2/b.md"), "b")
+    backend.add_file(corpus, _uri(f"{P}/_objects/abc/old.md"), "old")
+    return live, dead
+
+
+def _names(backend):
+    return {name for _, name in backend.objects}
+
+
+def test_only_unreferenced_objects_are_collected(backend, staging):
+    live, dead = staging
+
+    report = collect_staging_garbage(min_age_seconds=0)
+
+    assert _names(backend) == {
+        f"{P}/_repos/o__r/h1/a.md",
+        f"{P}/_objects/h1",
+        f"{P}/_repos/o__r/h2/b.md",
+        f"{P}/_objects/h2",
+        f"{P}/_objects/abc/old.md",
+        f"{P}/_manifests/{live}/o__r.json",
+        f"{P}/_content_index/{live}.json",
+    }
+    assert report["live_corpora"] == 1
+    assert report["manifests"] == 1
+    assert report["referenced_objects"] == 5
+    assert report["deleted_objects"] == 5
+    assert report["errors"] == []
+
+
+def test_dry_run_deletes_nothing(backend, staging):
+    before = _names(backend)
+
+    report = collect_staging_garbage(dry_run=True, min_age_seconds=0)
+
+    assert _names(backend) == before
+    assert report["deleted_objects"] == 5
+
+
+def test_recently_updated_objects_are_kept(backend, staging):
+    bucket = get_storage_client().bucket(TEMP_GCS_BUCKET_NAME)
+    bucket.blob(f"{P}/_objects/h4").upload_from_string(b"in flight")
+
+    report = collect_staging_garbage(min_age_seconds=3600)
+
+    assert f"{P}/_objects/h4" in _names(backend)
+    assert report["kept_recent_objects"] == 1
+    # Objects without an update time are old enough
+    assert f"{P}/_objects/h3" not in _names(backend)
+
+
+def test_nothing_is_deleted_when_a_corpus_cannot_be_read(backend, staging):
+    before = _names(backend)
+    with mock.patch.object(backend.rag, "list_files", side_effect=PermissionDenied("denied")):
+        with pytest.raises(PermissionDenied):
+            collect_staging_garbage(min_age_seconds=0)
+
+    assert _names(backend) == before